@@ -1,17 +1,58 @@
-"""Database backup and recovery management."""
+"""Database backup and recovery management.
 
+Full backups are ``pg_dump`` custom-format archives. Incremental backups (see
+``app.core.change_capture``) export only the rows changed since the previous
+backup; each names its parent and base in its manifest, and restoring one
+restores the base archive and then replays the chain of increments up to it.
+"""
+
+import gzip
+import hashlib
+import json
 import logging
 import os
+import re
 import subprocess
-from datetime import UTC, datetime
+import tempfile
+import time
+from collections import deque
+from datetime import UTC, datetime, timedelta
 from urllib.parse import urlparse
 
 import boto3
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
 
+from app.core.cache_reset import reset_caches
+from app.core.change_capture import apply_changes, export_changes
 from app.core.config import settings
+from app.core.database import engine
+from app.models import Job, SchedulerState
 
 logger = logging.getLogger(__name__)
 
+BACKUP_PREFIX = "backup_"
+BACKUP_EXTENSION = ".dump"  # pg_dump custom format; older backups are plain .sql
+INCREMENTAL_EXTENSION = ".changes.jsonl.gz"
+BACKUP_CONTENT_TYPE = "application/octet-stream"
+MANIFEST_PREFIX = "manifests/"
+# Tables describing the running deployment rather than its data: their rows are
+# not dumped, and a live restore leaves them (and their indexes) untouched
+OPERATIONAL_TABLES = (Job.__table__, SchedulerState.__table__)
+# Dump bytes held in memory at a time (also the multipart part size)
+BACKUP_PART_SIZE = 8 * 1024 * 1024
+# pg_restore --verbose lines reporting that one TOC entry has been restored
+RESTORE_ITEM_PATTERN = re.compile(
+    r"pg_restore: (creating |processing data for table|finished item)"
+)
+# Increments re-export rows changed shortly before the previous backup was taken,
+# so a transaction that committed late with an older updated_at is not missed
+CHANGE_CAPTURE_OVERLAP = timedelta(minutes=5)
+
+
+def manifest_key(backup_filename: str) -> str:
+    return f"{MANIFEST_PREFIX}{backup_filename}.json"
+
 
 class BackupManager:
     """Handles database backups and restoration."""
@@ -26,6 +67,8 @@ class BackupManager:
             region_name="us-east-1",
         )
         self.backup_bucket = "letsee-backups"
+        self.engine = engine  # Source of incremental exports; live restore target
+        self.restore_progress: dict = {}
         self._ensure_bucket_exists()
 
     def _ensure_bucket_exists(self):
@@ -50,153 +93,571 @@ class BackupManager:
             "password": url.password or "",
         }
 
-    def create_backup(self, backup_type: str = "auto") -> str | None:
+    def _connection_args(self, creds: dict) -> list[str]:
+        return ["-h", creds["host"], "-p", str(creds["port"]), "-U", creds["user"]]
+
+    def _upload_stream(
+        self, key: str, stream, metadata: dict[str, str], progress: dict | None = None
+    ) -> dict:
+        """Copy ``stream`` to ``key`` by multipart upload, one part in memory at a time.
+
+        Returns the size and SHA-256 of what was uploaded. The upload is aborted if
+        reading or uploading fails.
+        """
+        checksum = hashlib.sha256()
+        size = 0
+        upload_id = self.s3_client.create_multipart_upload(
+            Bucket=self.backup_bucket,
+            Key=key,
+            ContentType=BACKUP_CONTENT_TYPE,
+            Metadata=metadata,
+        )["UploadId"]
+        parts = []
+        try:
+            while True:
+                chunk = stream.read(BACKUP_PART_SIZE)
+                # Every part but the last must be non-empty; an empty dump still needs one
+                if not chunk and parts:
+                    break
+                checksum.update(chunk)
+                size += len(chunk)
+                if progress is not None:
+                    progress["bytes_done"] = size
+                response = self.s3_client.upload_part(
+                    Bucket=self.backup_bucket,
+                    Key=key,
+                    UploadId=upload_id,
+                    PartNumber=len(parts) + 1,
+                    Body=chunk,
+                )
+                parts.append({"PartNumber": len(parts) + 1, "ETag": response["ETag"]})
+                if len(chunk) < BACKUP_PART_SIZE:
+                    break
+            self.s3_client.complete_multipart_upload(
+                Bucket=self.backup_bucket,
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": parts},
+            )
+        except BaseException:
+            try:
+                self.s3_client.abort_multipart_upload(
+                    Bucket=self.backup_bucket, Key=key, UploadId=upload_id
+                )
+            except Exception as e:
+                logger.error(f"Failed to abort upload of {key}: {e}")
+            raise
+        return {"size": size, "sha256": checksum.hexdigest()}
+
+    def _write_manifest(self, backup_filename: str, manifest: dict) -> None:
+        self.s3_client.put_object(
+            Bucket=self.backup_bucket,
+            Key=manifest_key(backup_filename),
+            Body=json.dumps(manifest).encode(),
+            ContentType="application/json",
+        )
+
+    def read_manifest(self, backup_filename: str) -> dict | None:
+        """Checksum and run metrics recorded for a backup (None for older backups)."""
+        try:
+            response = self.s3_client.get_object(
+                Bucket=self.backup_bucket, Key=manifest_key(backup_filename)
+            )
+            return json.loads(response["Body"].read())
+        except Exception:
+            return None
+
+    def _list_backup_objects(self) -> list[dict]:
+        """Every backup object in the bucket (all listing pages), oldest first."""
+        objects = []
+        kwargs = {"Bucket": self.backup_bucket, "Prefix": BACKUP_PREFIX}
+        while True:
+            response = self.s3_client.list_objects_v2(**kwargs)
+            objects.extend(response.get("Contents", []))
+            if not response.get("IsTruncated"):
+                break
+            kwargs["ContinuationToken"] = response["NextContinuationToken"]
+        return sorted(objects, key=lambda x: x["LastModified"])
+
+    def _chain_head(self) -> dict | None:
+        """Manifest of the newest backup, if an incremental backup can extend it."""
+        backups = self._list_backup_objects()
+        if not backups:
+            return None
+        manifest = self.read_manifest(backups[-1]["Key"])
+        # Backups from before incremental mode do not record when they were taken
+        if not manifest or "captured_at" not in manifest:
+            return None
+        return manifest
+
+    def _base_is_recent(self, head: dict) -> bool:
+        base_captured_at = datetime.fromisoformat(head.get("base_captured_at", head["captured_at"]))
+        age = datetime.now(UTC) - base_captured_at
+        return age < timedelta(hours=settings.BACKUP_FULL_INTERVAL_HOURS)
+
+    def create_backup(
+        self, backup_type: str = "auto", progress: dict | None = None, incremental: bool = False
+    ) -> str | None:
         """
         Create a database backup using pg_dump.
 
+        The dump is written in pg_dump's compressed custom format and streamed to
+        storage in parts while pg_dump runs, so memory use does not grow with the
+        database. Its SHA-256, size, duration and throughput are stored in a
+        manifest next to it (see ``read_manifest``).
+
         Args:
             backup_type: 'auto' for scheduled, 'manual' for user-triggered
+            progress: Dict updated in place with the bytes uploaded so far
+            incremental: Only export the rows changed since the newest backup.
+                Falls back to a full backup when there is no backup to extend or,
+                for 'auto' backups, when the chain's base is older than
+                ``BACKUP_FULL_INTERVAL_HOURS``.
 
         Returns:
             Backup filename if successful, None otherwise
         """
+        if incremental:
+            try:
+                head = self._chain_head()
+            except Exception as e:
+                logger.error(f"Failed to find the newest backup: {e}")
+                head = None
+            if head is not None and (backup_type != "auto" or self._base_is_recent(head)):
+                return self._create_incremental_backup(backup_type, head, progress)
+            logger.info("No recent base backup to extend; creating a full backup")
+
         try:
             creds = self._extract_postgres_credentials()
             timestamp = datetime.now(UTC).strftime("%Y%m%d_%H%M%S")
-            backup_filename = f"backup_{backup_type}_{timestamp}.sql"
+            backup_filename = f"backup_{backup_type}_{timestamp}{BACKUP_EXTENSION}"
 
             # Create backup using pg_dump
             env = {"PGPASSWORD": creds["password"]}
             cmd = [
                 "pg_dump",
-                "-h",
-                creds["host"],
-                "-p",
-                str(creds["port"]),
-                "-U",
-                creds["user"],
+                *self._connection_args(creds),
                 "-d",
                 creds["database"],
+                "--format=custom",
+                f"--compress={settings.BACKUP_COMPRESSION_LEVEL}",
                 "--no-owner",
                 "--no-acl",
+                # Operational state: restoring it would revive finished or stale jobs
+                *(f"--exclude-table-data={table.name}" for table in OPERATIONAL_TABLES),
             ]
 
-            process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                env={**os.environ, **env},
+            started = time.monotonic()
+            # Taken before the dump's snapshot: the next increment starts from here
+            captured_at = datetime.now(UTC)
+            # stderr goes to a file so a chatty pg_dump cannot block on a full pipe
+            with tempfile.TemporaryFile() as stderr_file:
+                process = subprocess.Popen(
+                    cmd,
+                    stdout=subprocess.PIPE,
+                    stderr=stderr_file,
+                    env={**os.environ, **env},
+                )
+                try:
+                    uploaded = self._upload_stream(
+                        backup_filename,
+                        process.stdout,
+                        {"timestamp": timestamp, "type": backup_type, "format": "custom"},
+                        progress,
+                    )
+                    returncode = process.wait()
+                except BaseException:
+                    process.kill()
+                    process.wait()
+                    raise
+                finally:
+                    process.stdout.close()  # type: ignore[union-attr]
+
+                if returncode != 0:
+                    stderr_file.seek(0)
+                    logger.error(f"pg_dump failed: {stderr_file.read().decode(errors='replace')}")
+                    self.s3_client.delete_object(Bucket=self.backup_bucket, Key=backup_filename)
+                    return None
+
+            duration = time.monotonic() - started
+            manifest = {
+                "filename": backup_filename,
+                "type": backup_type,
+                "format": "custom",
+                "created_at": datetime.now(UTC).isoformat(),
+                "captured_at": captured_at.isoformat(),
+                "size": uploaded["size"],
+                "sha256": uploaded["sha256"],
+                "duration_seconds": round(duration, 3),
+                "throughput_mb_s": round(uploaded["size"] / 1024 / 1024 / max(duration, 0.001), 2),
+            }
+            self._write_manifest(backup_filename, manifest)
+            logger.info(
+                f"Backup created successfully: {backup_filename} "
+                f"(size: {uploaded['size'] / 1024 / 1024:.2f}MB, "
+                f"{manifest['duration_seconds']}s, {manifest['throughput_mb_s']}MB/s)"
             )
-            stdout, stderr = process.communicate()
+            return backup_filename
 
-            if process.returncode != 0:
-                logger.error(f"pg_dump failed: {stderr.decode()}")
-                return None
+        except Exception as e:
+            logger.error(f"Backup creation failed: {e}")
+            return None
 
-            # Upload to S3/Minio
-            backup_data = stdout
-            try:
-                self.s3_client.put_object(
-                    Bucket=self.backup_bucket,
-                    Key=backup_filename,
-                    Body=backup_data,
-                    ContentType="text/plain",
-                    Metadata={
-                        "timestamp": timestamp,
-                        "type": backup_type,
-                        "size": str(len(backup_data)),
-                    },
-                )
-                logger.info(
-                    f"Backup created successfully: {backup_filename} "
-                    f"(size: {len(backup_data) / 1024 / 1024:.2f}MB)"
+    def _create_incremental_backup(
+        self, backup_type: str, parent: dict, progress: dict | None
+    ) -> str | None:
+        """Export the rows changed since ``parent`` was taken as a new backup."""
+        try:
+            captured_at = datetime.now(UTC)
+            since = datetime.fromisoformat(parent["captured_at"]) - CHANGE_CAPTURE_OVERLAP
+            timestamp = captured_at.strftime("%Y%m%d_%H%M%S")
+            backup_filename = f"backup_{backup_type}_{timestamp}{INCREMENTAL_EXTENSION}"
+
+            started = time.monotonic()
+            # Spooled to disk first: the export runs in one transaction, kept short
+            with tempfile.TemporaryFile() as spool:
+                with gzip.GzipFile(
+                    fileobj=spool, mode="wb", compresslevel=settings.BACKUP_COMPRESSION_LEVEL
+                ) as output:
+                    with self.engine.connect() as connection:
+                        if connection.dialect.name == "postgresql":
+                            connection.execution_options(isolation_level="REPEATABLE READ")
+                        rows = export_changes(connection, since, output)
+                spool.seek(0)
+                uploaded = self._upload_stream(
+                    backup_filename,
+                    spool,
+                    {"timestamp": timestamp, "type": backup_type, "format": "changes"},
+                    progress,
                 )
-                return backup_filename
-            except Exception as e:
-                logger.error(f"Failed to upload backup to S3: {e}")
-                return None
+
+            duration = time.monotonic() - started
+            manifest = {
+                "filename": backup_filename,
+                "type": backup_type,
+                "format": "changes",
+                "created_at": datetime.now(UTC).isoformat(),
+                "captured_at": captured_at.isoformat(),
+                "since": since.isoformat(),
+                "parent": parent["filename"],
+                "base": parent.get("base", parent["filename"]),
+                "base_captured_at": parent.get("base_captured_at", parent["captured_at"]),
+                "rows": rows,
+                "size": uploaded["size"],
+                "sha256": uploaded["sha256"],
+                "duration_seconds": round(duration, 3),
+                "throughput_mb_s": round(uploaded["size"] / 1024 / 1024 / max(duration, 0.001), 2),
+            }
+            self._write_manifest(backup_filename, manifest)
+            logger.info(
+                f"Incremental backup created successfully: {backup_filename} "
+                f"({sum(rows.values())} changed rows, {uploaded['size'] / 1024:.1f}KB, "
+                f"{manifest['duration_seconds']}s)"
+            )
+            return backup_filename
 
         except Exception as e:
-            logger.error(f"Backup creation failed: {e}")
+            logger.error(f"Incremental backup creation failed: {e}")
             return None
 
-    def restore_backup(self, backup_filename: str) -> bool:
+    def backup_chain(self, backup_filename: str) -> list[str]:
+        """Backups to restore, in order, to recover ``backup_filename``.
+
+        A full backup is its own chain; an incremental one is preceded by its
+        base and the increments between them.
+        """
+        chain = [backup_filename]
+        while chain[0].endswith(INCREMENTAL_EXTENSION):
+            manifest = self.read_manifest(chain[0])
+            if not manifest or not manifest.get("parent"):
+                raise RuntimeError(f"Backup chain is broken: no manifest for {chain[0]}")
+            chain.insert(0, manifest["parent"])
+        return chain
+
+    def _run_psql(self, creds: dict, database: str, sql: str) -> str:
+        """Run one SQL command with psql and return its unaligned output."""
+        result = subprocess.run(
+            ["psql", *self._connection_args(creds), "-d", database, "-tAc", sql],
+            capture_output=True,
+            env={**os.environ, "PGPASSWORD": creds["password"]},
+        )
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.decode(errors="replace").strip())
+        return result.stdout.decode().strip()
+
+    def _download(self, body, destination, expected_sha256: str | None) -> None:
+        """Copy a storage body to ``destination`` chunk by chunk, checking its SHA-256."""
+        checksum = hashlib.sha256()
+        while chunk := body.read(BACKUP_PART_SIZE):
+            checksum.update(chunk)
+            destination.write(chunk)
+            self.restore_progress["bytes_done"] += len(chunk)
+        if expected_sha256 and checksum.hexdigest() != expected_sha256:
+            raise RuntimeError("Backup checksum does not match its manifest")
+
+    def _pg_restore(
+        self, creds: dict, database: str, archive_path: str, keep_operational: bool
+    ) -> None:
+        """Parallel pg_restore of a custom-format archive, tracking finished TOC items.
+
+        With ``keep_operational`` the archive's entries for ``OPERATIONAL_TABLES``
+        are left out, so the live tables are neither dropped nor recreated.
+        """
+        env = {**os.environ, "PGPASSWORD": creds["password"]}
+        listing = subprocess.run(["pg_restore", "-l", archive_path], capture_output=True)
+        if listing.returncode != 0:
+            raise RuntimeError(f"Invalid backup archive: {listing.stderr.decode(errors='replace')}")
+        entries = [
+            line
+            for line in listing.stdout.decode().splitlines()
+            if line and not line.startswith(";")
+        ]
+        if keep_operational:
+            skipped = set()
+            for table in OPERATIONAL_TABLES:
+                skipped.add(table.name)
+                skipped.update(index.name for index in table.indexes)
+            # "<id>; <oids> <TYPE> <schema> <name> <owner>"; constraints are "<table> <name>"
+            entries = [line for line in entries if not skipped & set(line.split()[3:])]
+        self.restore_progress["items_total"] = len(entries)
+
+        errors: deque[str] = deque(maxlen=20)
+        with tempfile.NamedTemporaryFile("w", suffix=".list") as list_file:
+            list_file.write("\n".join(entries) + "\n")
+            list_file.flush()
+            process = subprocess.Popen(
+                [
+                    "pg_restore",
+                    *self._connection_args(creds),
+                    "-d",
+                    database,
+                    f"--jobs={settings.BACKUP_RESTORE_JOBS}",
+                    "--clean",
+                    "--if-exists",
+                    "--no-owner",
+                    "--no-acl",
+                    "--verbose",
+                    f"--use-list={list_file.name}",
+                    archive_path,
+                ],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                env=env,
+            )
+            for raw_line in process.stderr:  # type: ignore[union-attr]
+                line = raw_line.decode(errors="replace").strip()
+                if RESTORE_ITEM_PATTERN.search(line):
+                    # Some entries log more than one of these lines; the count is an estimate
+                    self.restore_progress["items_done"] = min(
+                        self.restore_progress["items_done"] + 1,
+                        self.restore_progress["items_total"],
+                    )
+                elif "error" in line.lower():
+                    errors.append(line)
+            returncode = process.wait()
+        if returncode != 0:
+            raise RuntimeError("pg_restore failed: " + "; ".join(errors))
+
+    def _psql_restore(self, creds: dict, database: str, body) -> None:
+        """Stream a plain SQL backup into psql's stdin."""
+        with tempfile.TemporaryFile() as stderr_file:
+            process = subprocess.Popen(
+                [
+                    "psql",
+                    *self._connection_args(creds),
+                    "-d",
+                    database,
+                    "-v",
+                    "ON_ERROR_STOP=1",
+                ],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
+                stderr=stderr_file,
+                env={**os.environ, "PGPASSWORD": creds["password"]},
+            )
+            try:
+                self._download(body, process.stdin, None)
+            except BrokenPipeError:
+                pass  # psql stopped early; its exit status reports why
+            finally:
+                try:
+                    process.stdin.close()  # type: ignore[union-attr]
+                except BrokenPipeError:
+                    pass
+            if process.wait() != 0:
+                stderr_file.seek(0)
+                raise RuntimeError(
+                    f"psql restore failed: {stderr_file.read().decode(errors='replace')}"
+                )
+
+    def _restore_base(
+        self, creds: dict, database: str, backup_filename: str, keep_operational: bool
+    ) -> None:
+        """Download and restore a full backup into ``database``."""
+        response = self.s3_client.get_object(Bucket=self.backup_bucket, Key=backup_filename)
+        self.restore_progress["bytes_total"] += response.get("ContentLength", 0)
+        try:
+            if backup_filename.endswith(BACKUP_EXTENSION):
+                manifest = self.read_manifest(backup_filename) or {}
+                with tempfile.NamedTemporaryFile(suffix=BACKUP_EXTENSION) as archive:
+                    self._download(response["Body"], archive, manifest.get("sha256"))
+                    archive.flush()
+                    self.restore_progress["phase"] = "restoring"
+                    self._pg_restore(creds, database, archive.name, keep_operational)
+            else:
+                # Plain SQL is replayed while it downloads
+                self.restore_progress["phase"] = "restoring"
+                self._psql_restore(creds, database, response["Body"])
+        finally:
+            response["Body"].close()
+
+    def _replay_incremental(self, target_engine, backup_filename: str) -> None:
+        """Download an incremental backup, check it and apply it in one transaction."""
+        manifest = self.read_manifest(backup_filename) or {}
+        response = self.s3_client.get_object(Bucket=self.backup_bucket, Key=backup_filename)
+        self.restore_progress["bytes_total"] += response.get("ContentLength", 0)
+        with tempfile.TemporaryFile() as spool:
+            try:
+                self._download(response["Body"], spool, manifest.get("sha256"))
+            finally:
+                response["Body"].close()
+            spool.seek(0)
+            with gzip.GzipFile(fileobj=spool, mode="rb") as lines:
+                with target_engine.begin() as connection:
+                    apply_changes(connection, lines)
+
+    def restore_backup(
+        self, backup_filename: str, dry_run: bool = False, progress: dict | None = None
+    ) -> bool:
         """
         Restore database from backup.
 
+        The backup is streamed from storage: custom-format dumps are spooled to a
+        temporary file (checked against the manifest's SHA-256) and restored with
+        ``pg_restore --jobs``; older plain SQL backups are piped into psql. For an
+        incremental backup its base is restored first and every increment up to it
+        is then replayed in order. After a live restore every worker's caches are
+        reset and SSE clients are told to resync. Progress is written to ``progress`` (also kept
+        as ``restore_progress``).
+
+        A live restore replaces every table of the backup, including
+        ``alembic_version``, except ``OPERATIONAL_TABLES`` (jobs and scheduler
+        state), which keep their current contents. Plain SQL backups cannot be
+        filtered and replace those tables as well.
+
         Args:
             backup_filename: Name of backup file to restore
+            dry_run: Restore into a temporary scratch database, which is dropped
+                afterwards, to verify the backup without touching live data
+            progress: Dict updated in place while the restore runs
 
         Returns:
             True if successful, False otherwise
         """
+        self.restore_progress = {} if progress is None else progress
+        self.restore_progress.update(
+            {
+                "status": "running",
+                "filename": backup_filename,
+                "dry_run": dry_run,
+                "phase": "downloading",
+                "bytes_total": 0,
+                "bytes_done": 0,
+                "items_total": None,
+                "items_done": 0,
+                "chain": None,
+                "increments_done": 0,
+                "tables": None,
+                "started_at": datetime.now(UTC).isoformat(),
+                "finished_at": None,
+                "error": None,
+            }
+        )
+        creds = None
+        scratch_database = None
+        live_data_replaced = False
         try:
+            chain = self.backup_chain(backup_filename)
+            self.restore_progress["chain"] = chain
             creds = self._extract_postgres_credentials()
-
-            # Download backup from S3/Minio
-            try:
-                response = self.s3_client.get_object(Bucket=self.backup_bucket, Key=backup_filename)
-                backup_data = response["Body"].read()
-            except Exception as e:
-                logger.error(f"Failed to download backup from S3: {e}")
-                return False
-
-            # Restore using psql
-            env = {"PGPASSWORD": creds["password"]}
-            cmd = [
-                "psql",
-                "-h",
-                creds["host"],
-                "-p",
-                str(creds["port"]),
-                "-U",
-                creds["user"],
-                "-d",
-                creds["database"],
-            ]
-
-            process = subprocess.Popen(
-                cmd,
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                env={**os.environ, **env},
+            database = creds["database"]
+            if dry_run:
+                scratch_database = f"{database}_restore_check_{int(time.time())}"
+                self._run_psql(creds, "postgres", f'CREATE DATABASE "{scratch_database}"')
+                database = scratch_database
+
+            live_data_replaced = not dry_run
+            self._restore_base(creds, database, chain[0], keep_operational=not dry_run)
+
+            if len(chain) > 1:
+                self.restore_progress["phase"] = "replaying"
+                target_engine = self.engine
+                if scratch_database:
+                    target_engine = create_engine(
+                        self.engine.url.set(database=scratch_database), poolclass=NullPool
+                    )
+                try:
+                    for increment in chain[1:]:
+                        self._replay_incremental(target_engine, increment)
+                        self.restore_progress["increments_done"] += 1
+                finally:
+                    if target_engine is not self.engine:
+                        target_engine.dispose()
+
+            self.restore_progress["phase"] = "verifying"
+            self.restore_progress["tables"] = int(
+                self._run_psql(
+                    creds,
+                    database,
+                    "SELECT count(*) FROM information_schema.tables WHERE table_schema = 'public'",
+                )
+            )
+            self.restore_progress["status"] = "completed"
+            logger.info(
+                f"Backup {'verified' if dry_run else 'restored'} successfully: {backup_filename}"
             )
-            stdout, stderr = process.communicate(input=backup_data)
-
-            if process.returncode != 0:
-                logger.error(f"psql restore failed: {stderr.decode()}")
-                return False
-
-            logger.info(f"Backup restored successfully: {backup_filename}")
             return True
 
         except Exception as e:
             logger.error(f"Restore failed: {e}")
+            self.restore_progress["status"] = "failed"
+            self.restore_progress["error"] = str(e)
             return False
+        finally:
+            if scratch_database and creds:
+                try:
+                    self._run_psql(
+                        creds, "postgres", f'DROP DATABASE IF EXISTS "{scratch_database}"'
+                    )
+                except Exception as e:
+                    logger.error(f"Failed to drop scratch database {scratch_database}: {e}")
+            if live_data_replaced:
+                # Also after a failure: the tables may already be partly replaced
+                try:
+                    with self.engine.begin() as connection:
+                        reset_caches(connection)
+                except Exception as e:
+                    logger.error(f"Failed to reset caches after restore: {e}")
+            self.restore_progress["phase"] = None
+            self.restore_progress["finished_at"] = datetime.now(UTC).isoformat()
 
     def list_backups(self, limit: int = 50) -> list:
         """
-        List available backups.
+        List available backups, newest first.
 
         Returns:
-            List of backup metadata
+            Metadata of the ``limit`` most recent backups
         """
         try:
-            response = self.s3_client.list_objects_v2(Bucket=self.backup_bucket, MaxKeys=limit)
-
-            backups = []
-            if "Contents" in response:
-                for obj in sorted(response["Contents"], key=lambda x: x["LastModified"]):
-                    backups.append(
-                        {
-                            "filename": obj["Key"],
-                            "size_mb": round(obj["Size"] / 1024 / 1024, 2),
-                            "created_at": obj["LastModified"].isoformat(),
-                        }
-                    )
-
-            return sorted(backups, key=lambda x: x["created_at"], reverse=True)
+            backups = self._list_backup_objects()
+            return [
+                {
+                    "filename": obj["Key"],
+                    "size_mb": round(obj["Size"] / 1024 / 1024, 2),
+                    "created_at": obj["LastModified"].isoformat(),
+                }
+                for obj in reversed(backups[-limit:] if limit > 0 else [])
+            ]
 
         except Exception as e:
             logger.error(f"Failed to list backups: {e}")
@@ -206,31 +667,50 @@ class BackupManager:
         """
         Delete old backups to save storage.
 
+        Retention works on chains: a full backup plus the increments taken on top
+        of it. The newest ``keep_daily`` automatic full backups are kept as daily
+        restore points; older ones are deleted together with their increments.
+        The newest ``keep_hourly`` increments stay restorable, so they are kept
+        with the earlier increments of their chain; every other increment is
+        deleted, which leaves older chains as just their full backup. Manual full
+        backups are never deleted.
+
         Args:
-            keep_daily: Number of daily backups to keep
-            keep_hourly: Number of hourly backups to keep
+            keep_daily: Number of automatic full backups (chains) to keep
+            keep_hourly: Number of most recent increments to keep restorable
 
         Returns:
             Number of backups deleted
         """
         try:
-            response = self.s3_client.list_objects_v2(Bucket=self.backup_bucket)
-            if "Contents" not in response:
-                return 0
-
-            backups = sorted(response["Contents"], key=lambda x: x["LastModified"])
-            daily_backups = [b for b in backups if "auto" in b["Key"] and "_" in b["Key"]]
-
-            to_delete = []
-
-            # Keep only recent backups
-            if len(daily_backups) > keep_daily + keep_hourly:
-                to_delete = daily_backups[: len(daily_backups) - keep_daily - keep_hourly]
+            backups = self._list_backup_objects()
+            increments = [b for b in backups if b["Key"].endswith(INCREMENTAL_EXTENSION)]
+            full_auto = [b for b in backups if "auto" in b["Key"] and b not in increments]
+
+            to_delete = full_auto[: max(len(full_auto) - keep_daily, 0)]
+            remaining = {b["Key"] for b in backups} - {b["Key"] for b in to_delete}
+
+            manifests = {b["Key"]: self.read_manifest(b["Key"]) or {} for b in increments}
+            kept: set[str] = set()
+            for increment in increments[max(len(increments) - keep_hourly, 0) :]:
+                # Restoring an increment needs every earlier increment of its chain
+                key = increment["Key"]
+                while key in manifests and key not in kept:
+                    kept.add(key)
+                    key = manifests[key].get("parent")
+            for increment in increments:
+                manifest = manifests[increment["Key"]]
+                # Increments cannot be restored without their base
+                if increment["Key"] not in kept or manifest.get("base") not in remaining:
+                    to_delete.append(increment)
 
             deleted_count = 0
             for backup in to_delete:
                 try:
                     self.s3_client.delete_object(Bucket=self.backup_bucket, Key=backup["Key"])
+                    self.s3_client.delete_object(
+                        Bucket=self.backup_bucket, Key=manifest_key(backup["Key"])
+                    )
                     logger.info(f"Deleted old backup: {backup['Key']}")
                     deleted_count += 1
                 except Exception as e:
@@ -0,0 +1,39 @@
+"""Cluster-wide reset of in-process caches after data is replaced in bulk.
+
+Mapper hooks keep the roster, principal and revocation caches current for
+ordinary writes. A restore replaces whole tables behind the ORM, so afterwards
+every worker is told, on each cache's existing NOTIFY channel, to drop what it
+holds, and SSE clients get a ``resync`` event so they reload.
+"""
+
+import logging
+
+from sqlalchemy import Connection
+from sqlalchemy.orm import Session
+
+from app.core.events import EVENTS_CHANNEL, RESYNC_EVENT, event_broadcaster
+from app.core.notifications import publish, supports_notify
+from app.core.principals import PRINCIPAL_CHANNEL, principal_cache
+from app.core.revocation import REVOCATION_CHANNEL, revocation_cache
+from app.core.roster_cache import roster_cache
+
+logger = logging.getLogger(__name__)
+
+RESET_PAYLOAD = {"reset": True}
+
+
+def reset_caches(connection: Connection) -> None:
+    """Reset this worker's caches now and every worker's once ``connection`` commits."""
+    publish(connection, EVENTS_CHANNEL, RESYNC_EVENT)
+    publish(connection, PRINCIPAL_CHANNEL, RESET_PAYLOAD)
+    publish(connection, REVOCATION_CHANNEL, RESET_PAYLOAD)
+
+    roster_cache.clear()
+    principal_cache.clear()
+    if revocation_cache.ready:
+        with Session(bind=connection) as db:
+            revocation_cache.load(db)
+    if not supports_notify(connection):
+        # No listener delivers the resync to this worker's clients
+        event_broadcaster.broadcast(RESYNC_EVENT)
+    logger.info("Caches reset after bulk data replacement")
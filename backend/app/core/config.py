@@ -20,6 +20,19 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    # Authenticated principal cache (upper bound on how long a deactivated user
+    # may still be accepted by a worker that missed the invalidation notice)
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 30
+    PRINCIPAL_CACHE_SIZE: int = 1024
+    # bcrypt work runs on a dedicated thread pool; excess concurrent requests get 503
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 32
+    # Server-Sent Events (/api/events/stream), limits are per worker
+    SSE_HEARTBEAT_SECONDS: int = 15
+    SSE_QUEUE_SIZE: int = 100
+    SSE_MAX_CONNECTIONS: int = 200
+    # Schedule analytics: nominal length of one shift, used for worked-hours totals
+    SCHEDULE_SHIFT_HOURS: float = 8.0
 
     # CORS (expect JSON string or list in env)
     # Include common dev ports for when running frontend/backend directly (not just via docker-compose.dev)
@@ -34,6 +47,7 @@ class Settings(BaseSettings):
     CORS_ALLOW_CREDENTIALS: bool = True
     CORS_ALLOW_METHODS: list[str] = ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"]
     CORS_ALLOW_HEADERS: list[str] = ["Authorization", "Content-Type"]
+    CORS_EXPOSE_HEADERS: list[str] = ["X-Next-Cursor", "ETag", "Content-Range"]
 
     # File upload / Minio
     MINIO_URL: str = "http://minio:9000"
@@ -41,6 +55,32 @@ class Settings(BaseSettings):
     MINIO_SECRET_KEY: str = "minioadmin"
     MINIO_BUCKET: str = "letsee-attachments"
     MAX_FILE_SIZE: int = 10 * 1024 * 1024  # 10MB
+    # Answer /api/files/download with a redirect to a presigned MinIO URL instead of
+    # proxying the bytes. MINIO_PUBLIC_URL is the MinIO address browsers can reach
+    # (defaults to MINIO_URL) and must allow CORS from the frontend origin.
+    FILES_DOWNLOAD_REDIRECT: bool = False
+    MINIO_PUBLIC_URL: str | None = None
+    PRESIGNED_URL_TTL_SECONDS: int = 300
+    # Attachment thumbnails (/api/files/thumb): longest side in pixels, WebP quality
+    THUMBNAIL_MAX_SIZE: int = 320
+    THUMBNAIL_QUALITY: int = 75
+    # Larger images (after JPEG draft scaling) get no thumbnail instead of being decoded
+    THUMBNAIL_MAX_PIXELS: int = 40_000_000
+
+    # Database backups (bucket letsee-backups)
+    BACKUP_COMPRESSION_LEVEL: int = 6  # pg_dump custom-format compression (0-9)
+    BACKUP_RESTORE_JOBS: int = 4  # pg_restore --jobs
+    # Scheduled backups are incremental, with a new full (base) backup this often
+    BACKUP_FULL_INTERVAL_HOURS: int = 24
+    # Background jobs (backup/restore/cleanup): queue poll interval, progress
+    # heartbeat, and how long a silent running job is kept before it is failed
+    JOB_POLL_SECONDS: int = 30
+    JOB_HEARTBEAT_SECONDS: int = 5
+    JOB_STALE_SECONDS: int = 300
+    # Scheduler leader election: lease renewal/retry interval, and how long a
+    # leader may go without renewing before another worker takes over
+    SCHEDULER_LEASE_SECONDS: int = 15
+    SCHEDULER_LEASE_TIMEOUT_SECONDS: int = 120
 
     # Environment
     DEBUG: bool = False
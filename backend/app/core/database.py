@@ -1,4 +1,5 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import sessionmaker
 
@@ -9,7 +10,7 @@ database_url = settings.DATABASE_URL
 if "+psycopg" not in database_url and database_url.startswith("postgresql://"):
     database_url = database_url.replace("postgresql://", "postgresql+psycopg://")
 
-# Database engine
+# Database engine (sync) - used by background jobs, scripts and migrations
 engine = create_engine(
     database_url,
     echo=settings.DEBUG,
@@ -18,17 +19,41 @@ engine = create_engine(
     max_overflow=20,
 )
 
-# Session factory
+# Async database engine - used by request handlers. The psycopg dialect picks its
+# async driver automatically under create_async_engine.
+async_engine = create_async_engine(
+    database_url,
+    echo=settings.DEBUG,
+    pool_pre_ping=True,
+    pool_size=10,
+    max_overflow=20,
+)
+
+# Session factories
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# expire_on_commit=False: attributes must stay readable after commit without an
+# implicit (and, under asyncio, disallowed) lazy reload.
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False,
+)
 
 # Base class for models
 Base = declarative_base()
 
 
-def get_db():
-    """Dependency to get DB session in routes."""
+async def get_db():
+    """Dependency to get an async DB session in routes."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def get_sync_db():
+    """Dependency to get a synchronous DB session (for code run in a threadpool)."""
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
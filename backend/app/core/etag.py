@@ -0,0 +1,43 @@
+"""Conditional GET support for collection endpoints.
+
+A collection's ETag is derived from a cheap aggregate over the rows the request
+would return (row count and latest ``updated_at``) plus the request's query string,
+so an unchanged collection can be answered with ``304 Not Modified`` before any
+rows are loaded or serialised.
+"""
+
+import hashlib
+
+from fastapi import Request, Response, status
+
+# Clients must revalidate every time, but may reuse the cached body on a 304
+CACHE_CONTROL = "private, no-cache"
+
+
+def collection_etag(request: Request, scope: str, *version_parts) -> str:
+    """Build a weak ETag for ``scope`` at the given version."""
+    raw = "|".join([scope, request.url.query, *(str(part) for part in version_parts)])
+    return f'W/"{hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Return True when the request's If-None-Match includes ``etag`` (weak comparison)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL},
+    )
+
+
+def set_etag(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
@@ -0,0 +1,167 @@
+"""Change events for live clients (Server-Sent Events).
+
+Inserts, updates and deletes of handovers, schedules and users are published on a
+Postgres NOTIFY channel when the writing transaction commits. Each worker's
+``pg_listener`` receives them and the ``EventBroadcaster`` fans them out to the
+SSE connections held by that worker. Every connection has a bounded queue: a
+client that stops reading gets a single ``resync`` event instead of an unbounded
+backlog, and is expected to reload its data.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+from sqlalchemy.orm import object_session
+
+from app.core.config import settings
+from app.core.notifications import defer_until_commit, pg_listener, publish, supports_notify
+from app.models import Handover, Schedule, User
+
+logger = logging.getLogger(__name__)
+
+EVENTS_CHANNEL = "letsee_events"
+
+RESYNC_EVENT = {"entity": "resync", "action": "resync"}
+
+
+@dataclass(eq=False)
+class EventSubscription:
+    """One SSE connection's pending events."""
+
+    queue: asyncio.Queue
+    user_id: str
+    dropped: int = 0
+    lagging: bool = field(default=False)
+    # Credentials the stream was opened with, re-checked while it stays open
+    token: str | None = None
+    expires_at: float | None = None
+
+
+class EventBroadcaster:
+    """Fans change events out to the SSE connections of this worker."""
+
+    def __init__(self, queue_size: int, max_subscribers: int):
+        """Initialize broadcaster state."""
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self._subscribers: set[EventSubscription] = set()
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(
+        self, user_id: str, token: str | None = None, expires_at: float | None = None
+    ) -> EventSubscription | None:
+        """Register a connection; None when the worker is at its connection limit."""
+        if len(self._subscribers) >= self.max_subscribers:
+            return None
+        self._loop = asyncio.get_running_loop()
+        subscription = EventSubscription(
+            queue=asyncio.Queue(self.queue_size),
+            user_id=user_id,
+            token=token,
+            expires_at=expires_at,
+        )
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: EventSubscription) -> None:
+        self._subscribers.discard(subscription)
+
+    def broadcast(self, payload: dict) -> None:
+        """Deliver ``payload`` to every connection; safe to call from any thread."""
+        loop = self._loop
+        if loop is None or not self._subscribers:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._fan_out(payload)
+        else:
+            loop.call_soon_threadsafe(self._fan_out, payload)
+
+    def _fan_out(self, payload: dict) -> None:
+        for subscription in list(self._subscribers):
+            if subscription.lagging:
+                subscription.dropped += 1
+                continue
+            try:
+                subscription.queue.put_nowait(payload)
+            except asyncio.QueueFull:
+                # Slow reader: discard its backlog and tell it to reload instead
+                subscription.lagging = True
+                subscription.dropped += subscription.queue.qsize() + 1
+                while not subscription.queue.empty():
+                    subscription.queue.get_nowait()
+                subscription.queue.put_nowait(RESYNC_EVENT)
+
+    def handle_notification(self, payload: dict) -> None:
+        """Forward an event received from any worker."""
+        self.broadcast(payload)
+
+    async def handle_reconnect(self) -> None:
+        """Events may have been missed while the listener was down; ask clients to reload."""
+        self.broadcast(RESYNC_EVENT)
+
+
+# Global broadcaster instance
+event_broadcaster = EventBroadcaster(
+    queue_size=settings.SSE_QUEUE_SIZE,
+    max_subscribers=settings.SSE_MAX_CONNECTIONS,
+)
+
+pg_listener.subscribe(
+    EVENTS_CHANNEL,
+    event_broadcaster.handle_notification,
+    on_connect=event_broadcaster.handle_reconnect,
+)
+
+
+def emit_event(session, connection, payload: dict) -> None:
+    """Publish on commit: via NOTIFY on Postgres, directly to this worker otherwise.
+
+    Called by the mapper hooks below; bulk Core statements that bypass the ORM call
+    it directly.
+    """
+    if supports_notify(connection):
+        publish(connection, EVENTS_CHANNEL, payload)
+    else:
+        defer_until_commit(session, lambda: event_broadcaster.broadcast(payload))
+
+
+def _handover_payload(action: str, target: Handover) -> dict:
+    if action == "updated" and target.deleted_at is not None:
+        action = "deleted"
+    return {"entity": "handover", "action": action, "id": str(target.id), "date": target.date}
+
+
+def _schedule_payload(action: str, target: Schedule) -> dict:
+    return {"entity": "schedule", "action": action, "id": str(target.id), "date": target.date}
+
+
+def _user_payload(action: str, target: User) -> dict:
+    return {"entity": "user", "action": action, "id": str(target.id)}
+
+
+def _register(model, build_payload) -> None:
+    for mapper_event, action in (
+        ("after_insert", "created"),
+        ("after_update", "updated"),
+        ("after_delete", "deleted"),
+    ):
+
+        def _listener(mapper, connection, target, action=action):
+            emit_event(object_session(target), connection, build_payload(action, target))
+
+        event.listen(model, mapper_event, _listener)
+
+
+_register(Handover, _handover_payload)
+_register(Schedule, _schedule_payload)
+_register(User, _user_payload)
@@ -0,0 +1,298 @@
+"""Persisted background jobs (backups, restores, backup cleanup, schedule normalization).
+
+API handlers and the scheduler only insert a row into ``jobs`` and return; the
+job runner claims queued jobs one at a time and executes them in the thread
+pool, writing their progress back to the row every few seconds so any worker
+can report it (``GET /api/backups/jobs/{id}``).
+
+Every worker runs a runner, but claiming is serialized with a Postgres advisory
+lock and a job is only claimed while no other job is running, so jobs execute
+one at a time across the whole deployment. New jobs wake the runners through a
+NOTIFY on ``JOBS_CHANNEL``; runners also poll. A running job whose heartbeat
+stops (its worker died) is marked failed.
+"""
+
+import asyncio
+import logging
+import threading
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.backup import backup_manager
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.notifications import defer_until_commit, pg_listener, publish, supports_notify
+from app.core.schedule_normalization import schedule_normalizer
+from app.models import Job
+
+logger = logging.getLogger(__name__)
+
+JOBS_CHANNEL = "letsee_jobs"
+
+# Arbitrary application-wide key for pg_advisory_xact_lock around job claims
+JOB_CLAIM_LOCK_KEY = 7_301_001
+
+# A job receives its params and a progress dict it may update; returns its result
+JobHandler = Callable[[dict, dict], dict]
+
+
+class JobFailedError(Exception):
+    """Raised by handlers to fail a job with a message."""
+
+
+def _run_backup(params: dict, progress: dict) -> dict:
+    filename = backup_manager.create_backup(
+        params.get("backup_type", "manual"), progress, incremental=params.get("incremental", False)
+    )
+    if not filename:
+        raise JobFailedError("Failed to create backup")
+    return {"backup_filename": filename, "manifest": backup_manager.read_manifest(filename)}
+
+
+def _run_restore(params: dict, progress: dict) -> dict:
+    if not backup_manager.restore_backup(
+        params["filename"], dry_run=params.get("dry_run", False), progress=progress
+    ):
+        raise JobFailedError(progress.get("error") or "Failed to restore backup")
+    return {"tables": progress.get("tables")}
+
+
+def _run_cleanup(params: dict, progress: dict) -> dict:
+    deleted = backup_manager.cleanup_old_backups(
+        keep_daily=params.get("keep_daily", 7), keep_hourly=params.get("keep_hourly", 24)
+    )
+    return {"deleted_count": deleted}
+
+
+def _run_schedule_normalization(params: dict, progress: dict) -> dict:
+    schedule_normalizer.run(params.get("batch_size"), progress)
+    if progress["status"] == "failed":
+        raise JobFailedError(progress["error"])
+    return {
+        "processed": progress["processed"],
+        "updated": progress["updated"],
+        "unresolved": len(progress["unresolved"]),
+    }
+
+
+class JobRunner:
+    """Claims and executes queued jobs, one at a time."""
+
+    def __init__(self, session_factory=SessionLocal):
+        """Initialize runner state."""
+        self.session_factory = session_factory
+        self.handlers: dict[str, JobHandler] = {
+            "backup": _run_backup,
+            "restore": _run_restore,
+            "cleanup": _run_cleanup,
+            "normalize_schedules": _run_schedule_normalization,
+        }
+        self.is_running = False
+        self._task: asyncio.Task | None = None
+        self._wake: asyncio.Event | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    async def start(self):
+        if self.is_running:
+            return
+        self.is_running = True
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run_loop())
+
+    async def stop(self):
+        if not self.is_running:
+            return
+        self.is_running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def wake(self, payload: dict | None = None) -> None:
+        """Check for queued jobs now; safe to call from any thread."""
+        if self._loop is not None and self._wake is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def _run_loop(self):
+        loop = asyncio.get_running_loop()
+        while self.is_running:
+            try:
+                ran = await loop.run_in_executor(None, self.run_one)
+            except Exception as e:
+                logger.error(f"Error in job runner: {e}")
+                ran = False
+            if ran:
+                continue
+            self._wake.clear()  # type: ignore[union-attr]
+            try:
+                await asyncio.wait_for(
+                    self._wake.wait(),  # type: ignore[union-attr]
+                    timeout=settings.JOB_POLL_SECONDS,
+                )
+            except TimeoutError:
+                pass
+
+    def _claim(self, db: Session) -> Job | None:
+        """Mark the oldest queued job running, unless a job is already running."""
+        if db.get_bind().dialect.name == "postgresql":
+            db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": JOB_CLAIM_LOCK_KEY})
+
+        now = datetime.now(UTC)
+        stale_before = now - timedelta(seconds=settings.JOB_STALE_SECONDS)
+        for job in db.scalars(select(Job).where(Job.status == "running")):
+            heartbeat = job.heartbeat_at or job.started_at
+            if heartbeat is not None and heartbeat.tzinfo is None:
+                heartbeat = heartbeat.replace(tzinfo=UTC)
+            if heartbeat is not None and heartbeat >= stale_before:
+                return None
+            logger.error(f"Job {job.id} ({job.kind}) stopped reporting; marking it failed")
+            job.status = "failed"
+            job.error = "Job runner stopped unexpectedly"
+            job.finished_at = now
+
+        job = db.scalar(
+            select(Job)
+            .where(Job.status == "queued")
+            .order_by(Job.created_at, Job.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        if job is not None:
+            job.status = "running"
+            job.started_at = now
+            job.heartbeat_at = now
+        return job
+
+    def _save(self, claimed: dict, **values) -> None:
+        """Update the claimed job's row, re-inserting it if the row has disappeared."""
+        with self.session_factory() as db:
+            job = db.get(Job, claimed["id"])
+            if job is None:
+                # E.g. an older backup restored over the jobs table while this ran
+                logger.warning(
+                    f"Job {claimed['id']} ({claimed['kind']}) is missing; recording it again"
+                )
+                job = Job(**claimed)
+                db.add(job)
+            for key, value in values.items():
+                setattr(job, key, value)
+            db.commit()
+
+    def run_one(self) -> bool:
+        """Claim and execute one job (blocking). Returns False when none was runnable."""
+        with self.session_factory() as db:
+            job = self._claim(db)
+            db.commit()
+            if job is None:
+                return False
+            job_id, kind, params = job.id, job.kind, dict(job.params or {})
+            claimed = {
+                "id": job_id,
+                "kind": kind,
+                "status": job.status,
+                "params": params,
+                "created_by": job.created_by,
+                "created_at": job.created_at,
+                "started_at": job.started_at,
+            }
+
+        logger.info(f"Running job {job_id} ({kind})")
+        progress: dict = {}
+        stop_heartbeat = threading.Event()
+
+        def heartbeat():
+            while not stop_heartbeat.wait(settings.JOB_HEARTBEAT_SECONDS):
+                try:
+                    self._save(claimed, progress=dict(progress), heartbeat_at=datetime.now(UTC))
+                except Exception as e:
+                    logger.error(f"Failed to record progress of job {job_id}: {e}")
+
+        heartbeat_thread = threading.Thread(target=heartbeat, daemon=True)
+        heartbeat_thread.start()
+        status, result, error = "completed", None, None
+        try:
+            handler = self.handlers.get(kind)
+            if handler is None:
+                raise JobFailedError(f"Unknown job kind: {kind}")
+            result = handler(params, progress)
+        except Exception as e:
+            logger.error(f"Job {job_id} ({kind}) failed: {e}")
+            status, error = "failed", str(e)
+        finally:
+            stop_heartbeat.set()
+            heartbeat_thread.join()
+
+        self._save(
+            claimed,
+            status=status,
+            result=result,
+            error=error,
+            progress=dict(progress),
+            finished_at=datetime.now(UTC),
+        )
+        logger.info(f"Job {job_id} ({kind}) {status}")
+        return True
+
+
+# Global job runner instance
+job_runner = JobRunner()
+
+pg_listener.subscribe(JOBS_CHANNEL, job_runner.wake)
+
+
+def _announce(session: Session, job: Job) -> None:
+    """Wake runners once the job is committed: all workers on Postgres, this one otherwise."""
+    connection = session.connection()
+    if supports_notify(connection):
+        publish(connection, JOBS_CHANNEL, {"id": str(job.id), "kind": job.kind})
+    else:
+        defer_until_commit(session, job_runner.wake)
+
+
+async def enqueue_job(
+    db: AsyncSession, kind: str, params: dict, created_by: str | None = None
+) -> Job:
+    """Queue a job from a request handler and commit."""
+    job = Job(kind=kind, params=params, progress={}, created_by=created_by)
+    db.add(job)
+    await db.flush()
+    await db.run_sync(lambda session: _announce(session, job))
+    await db.commit()
+    return job
+
+
+async def active_job(db: AsyncSession, kind: str) -> Job | None:
+    """A queued or running job of ``kind``, if any."""
+    return await db.scalar(
+        select(Job).where(Job.kind == kind, Job.status.in_(("queued", "running"))).limit(1)
+    )
+
+
+def enqueue_scheduled_job(
+    db: Session, kind: str, params: dict, min_interval_seconds: int
+) -> Job | None:
+    """Queue a periodic job unless one of ``kind`` was queued within the interval.
+
+    The check and insert run under the claim lock, so a scheduler tick repeated by
+    a new leader right after a failover does not queue a second job.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": JOB_CLAIM_LOCK_KEY})
+    since = datetime.now(UTC) - timedelta(seconds=min_interval_seconds)
+    recent = db.scalar(select(Job.id).where(Job.kind == kind, Job.created_at >= since).limit(1))
+    if recent is not None:
+        db.commit()
+        return None
+    job = Job(kind=kind, params=params, progress={})
+    db.add(job)
+    db.flush()
+    _announce(db, job)
+    db.commit()
+    return job
@@ -0,0 +1,168 @@
+"""Cross-worker notifications over Postgres LISTEN/NOTIFY.
+
+Every gunicorn worker keeps a single dedicated connection that LISTENs on the
+channels registered here and dispatches payloads to in-process callbacks.
+Publishing happens on the caller's own connection so notifications are only
+delivered once the surrounding transaction commits.
+"""
+
+import asyncio
+import json
+import logging
+from collections.abc import Awaitable, Callable
+
+import psycopg
+from sqlalchemy import event, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.core.database import engine
+
+logger = logging.getLogger(__name__)
+
+NotifyCallback = Callable[[dict], None]
+ConnectCallback = Callable[[], Awaitable[None]]
+
+_AFTER_COMMIT_KEY = "after_commit_callbacks"
+
+
+def supports_notify(connection: Connection) -> bool:
+    """Return True when the connection's database supports LISTEN/NOTIFY."""
+    return connection.dialect.name == "postgresql"
+
+
+def publish(connection: Connection, channel: str, payload: dict) -> None:
+    """Queue a NOTIFY on ``connection``; delivered when its transaction commits."""
+    if not supports_notify(connection):
+        return
+    connection.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {"channel": channel, "payload": json.dumps(payload, separators=(",", ":"))},
+    )
+
+
+def defer_until_commit(session: Session | None, callback: Callable[[], None]) -> None:
+    """Run ``callback`` once ``session`` commits; dropped if it rolls back."""
+    if session is None:
+        return
+    session.info.setdefault(_AFTER_COMMIT_KEY, []).append(callback)
+
+
+@event.listens_for(Session, "after_commit")
+def _run_after_commit_callbacks(session):
+    for callback in session.info.pop(_AFTER_COMMIT_KEY, []):
+        try:
+            callback()
+        except Exception as e:
+            logger.error(f"After-commit callback failed: {e}")
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_after_commit_callbacks(session, previous_transaction):
+    session.info.pop(_AFTER_COMMIT_KEY, None)
+
+
+class PgListener:
+    """Single LISTEN connection per worker fanning out to registered callbacks."""
+
+    def __init__(self, reconnect_delay: float = 1.0, max_reconnect_delay: float = 30.0):
+        """Initialize listener state."""
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.connected = False
+        self._callbacks: dict[str, list[NotifyCallback]] = {}
+        self._on_connect: list[ConnectCallback] = []
+        self._on_disconnect: list[Callable[[], None]] = []
+        self._task: asyncio.Task | None = None
+
+    def subscribe(
+        self,
+        channel: str,
+        callback: NotifyCallback,
+        on_connect: ConnectCallback | None = None,
+        on_disconnect: Callable[[], None] | None = None,
+    ) -> None:
+        """Register a callback for a channel.
+
+        ``on_connect`` runs after every (re)connection once LISTEN is active, so
+        subscribers can reload state they may have missed while disconnected.
+        """
+        self._callbacks.setdefault(channel, []).append(callback)
+        if on_connect is not None:
+            self._on_connect.append(on_connect)
+        if on_disconnect is not None:
+            self._on_disconnect.append(on_disconnect)
+
+    async def start(self):
+        """Start the background listener task (Postgres only)."""
+        if self._task is not None:
+            return
+        if engine.dialect.name != "postgresql":
+            logger.info("LISTEN/NOTIFY unavailable for %s, listener disabled", engine.dialect.name)
+            return
+        self._task = asyncio.create_task(self._listen_loop())
+
+    async def stop(self):
+        """Stop the background listener task."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._set_disconnected()
+
+    def _conninfo(self) -> str:
+        return engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+
+    def _set_disconnected(self) -> None:
+        if not self.connected:
+            return
+        self.connected = False
+        for callback in self._on_disconnect:
+            callback()
+
+    def _dispatch(self, channel: str, raw_payload: str) -> None:
+        try:
+            payload = json.loads(raw_payload)
+        except ValueError:
+            logger.warning("Ignoring malformed notification on %s", channel)
+            return
+        for callback in self._callbacks.get(channel, []):
+            try:
+                callback(payload)
+            except Exception as e:
+                logger.error(f"Notification handler for {channel} failed: {e}")
+
+    async def _listen_loop(self):
+        delay = self.reconnect_delay
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(
+                    self._conninfo(), autocommit=True
+                ) as conn:
+                    for channel in self._callbacks:
+                        await conn.execute(f'LISTEN "{channel}"')
+                    self.connected = True
+                    delay = self.reconnect_delay
+                    logger.info("Listening for notifications on %s", ", ".join(self._callbacks))
+
+                    for on_connect in self._on_connect:
+                        await on_connect()
+
+                    async for notify in conn.notifies():
+                        self._dispatch(notify.channel, notify.payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Notification listener error: {e}")
+
+            self._set_disconnected()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+
+# Global listener instance
+pg_listener = PgListener()
@@ -0,0 +1,118 @@
+"""Bounded worker pool for bcrypt hashing and verification.
+
+bcrypt with 12 rounds costs roughly a quarter of a second of CPU and releases the
+GIL, so it runs on a small dedicated thread pool instead of the event loop. The
+number of pending jobs is capped: when a burst exceeds the cap, callers get a 503
+with ``Retry-After`` rather than queueing indefinitely behind other logins.
+"""
+
+import asyncio
+import logging
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import TypeVar
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class PasswordWorkPool:
+    """Runs password hashing work off the event loop with a queue-depth limit."""
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 32):
+        """
+        Initialize the pool.
+
+        Args:
+            max_workers: Number of threads doing bcrypt work
+            max_pending: Maximum running + queued jobs before rejecting new ones
+        """
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor: ThreadPoolExecutor | None = None
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.failed = 0
+        self.peak_pending = 0
+        self.total_wait_seconds = 0.0
+        self.total_run_seconds = 0.0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="password"
+            )
+        return self._executor
+
+    def _timed(self, fn: Callable[..., T], queued_at: float, *args) -> T:
+        started = time.perf_counter()
+        self.total_wait_seconds += started - queued_at
+        try:
+            return fn(*args)
+        finally:
+            self.total_run_seconds += time.perf_counter() - started
+
+    async def run(self, fn: Callable[..., T], *args) -> T:
+        """Run ``fn(*args)`` on the pool.
+
+        Raises:
+            HTTPException: 503 if too many password operations are already pending
+        """
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            logger.warning(f"Password pool saturated ({self.pending} pending), rejecting request")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many sign-in attempts in progress. Please retry shortly.",
+                headers={"Retry-After": "1"},
+            )
+
+        self.pending += 1
+        self.peak_pending = max(self.peak_pending, self.pending)
+        loop = asyncio.get_running_loop()
+        try:
+            result = await loop.run_in_executor(
+                self._get_executor(), self._timed, fn, time.perf_counter(), *args
+            )
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.pending -= 1
+        self.completed += 1
+        return result
+
+    def stats(self) -> dict:
+        """Return pool metrics for health/monitoring output."""
+        finished = self.completed + self.failed
+        return {
+            "workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "peak_pending": self.peak_pending,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "avg_wait_ms": round(self.total_wait_seconds / finished * 1000, 2) if finished else 0.0,
+            "avg_run_ms": round(self.total_run_seconds / finished * 1000, 2) if finished else 0.0,
+        }
+
+    def shutdown(self) -> None:
+        """Shut down worker threads; a new executor is created on next use."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Global password pool instance
+password_pool = PasswordWorkPool(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
@@ -0,0 +1,135 @@
+"""Short-lived cache of authenticated principals.
+
+Most endpoints only need the caller's id, name and admin flag, so the
+authentication dependencies resolve a lightweight ``Principal`` snapshot instead
+of loading the ``User`` row on every request. Snapshots are kept in a bounded LRU
+for ``PRINCIPAL_CACHE_TTL_SECONDS``; updates to a user evict the entry in this
+worker on commit and in other workers through a Postgres NOTIFY, so the TTL only
+bounds staleness when the listener is unavailable.
+"""
+
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from uuid import UUID
+
+from sqlalchemy import event
+from sqlalchemy.orm import object_session
+
+from app.core.config import settings
+from app.core.notifications import defer_until_commit, pg_listener, publish
+from app.models import User
+
+logger = logging.getLogger(__name__)
+
+PRINCIPAL_CHANNEL = "letsee_principal_invalidations"
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """Authenticated user snapshot used by request dependencies."""
+
+    id: UUID
+    is_active: bool
+    is_admin: bool
+    full_name: str
+    email: str
+    position_id: UUID | None = None
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        """Build a snapshot from a ``User`` row."""
+        return cls(
+            id=user.id,  # type: ignore[arg-type]
+            is_active=bool(user.is_active),
+            is_admin=bool(user.is_admin),
+            full_name=user.full_name,  # type: ignore[arg-type]
+            email=user.email,  # type: ignore[arg-type]
+            position_id=user.position_id,  # type: ignore[arg-type]
+        )
+
+
+class PrincipalCache:
+    """Bounded LRU of principal snapshots keyed by user id."""
+
+    def __init__(self, max_size: int, ttl: float):
+        """
+        Initialize principal cache.
+
+        Args:
+            max_size: Maximum number of cached principals
+            ttl: Seconds a snapshot may be served before it is reloaded
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, Principal]] = OrderedDict()
+
+    def get(self, user_id: str | UUID) -> Principal | None:
+        """Return a fresh cached principal, or None on miss/expiry."""
+        if self.ttl <= 0:
+            return None
+        key = str(user_id)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, principal = entry
+        if expires <= time.monotonic():
+            self._entries.pop(key, None)
+            return None
+        self._entries.move_to_end(key)
+        return principal
+
+    def put(self, principal: Principal) -> None:
+        """Cache a principal snapshot."""
+        if self.ttl <= 0:
+            return
+        key = str(principal.id)
+        self._entries[key] = (time.monotonic() + self.ttl, principal)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str | UUID) -> None:
+        """Evict a single user."""
+        self._entries.pop(str(user_id), None)
+
+    def clear(self) -> None:
+        """Evict everything."""
+        self._entries.clear()
+
+    def handle_notification(self, payload: dict) -> None:
+        """Evict a user changed by any worker, or everyone on a reset."""
+        if payload.get("reset"):
+            self.clear()
+            return
+        user_id = payload.get("user_id")
+        if user_id:
+            self.invalidate(user_id)
+
+    async def handle_reconnect(self) -> None:
+        """Drop everything after a listener reconnect since evictions may have been missed."""
+        self.clear()
+
+
+# Global principal cache instance
+principal_cache = PrincipalCache(
+    max_size=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+pg_listener.subscribe(
+    PRINCIPAL_CHANNEL,
+    principal_cache.handle_notification,
+    on_connect=principal_cache.handle_reconnect,
+)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_principal(mapper, connection, target):
+    """Evict cached snapshots of a changed user here and in other workers."""
+    user_id = str(target.id)
+    publish(connection, PRINCIPAL_CHANNEL, {"user_id": user_id})
+    principal_cache.invalidate(user_id)
+    defer_until_commit(object_session(target), lambda: principal_cache.invalidate(user_id))
@@ -0,0 +1,164 @@
+"""In-process cache of revoked JWTs.
+
+The cache mirrors the ``revoked_tokens`` table so authenticating a request does
+not need a database round trip. It is loaded when the worker's notification
+listener connects and kept current through Postgres NOTIFY messages emitted
+whenever a ``RevokedToken`` row is inserted. Until the cache is loaded (or while
+the listener is disconnected) callers fall back to querying the table.
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from datetime import UTC, datetime
+from uuid import UUID
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from app.core.notifications import defer_until_commit, pg_listener, publish
+from app.models import RevokedToken
+
+logger = logging.getLogger(__name__)
+
+REVOCATION_CHANNEL = "letsee_token_revocations"
+
+
+def token_digest(token: str) -> str:
+    """Return the cache key for an exact token (avoids keeping raw JWTs in memory)."""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def _is_wildcard(token: str) -> bool:
+    return token == "*" or token.startswith("*:")
+
+
+def _expiry_timestamp(expires_at: datetime) -> float:
+    if expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=UTC)
+    return expires_at.timestamp()
+
+
+def _entry_for(row: RevokedToken) -> dict:
+    """Build the cache/notification payload for a revoked token row."""
+    wildcard = _is_wildcard(str(row.token))
+    return {
+        "key": str(row.token) if wildcard else token_digest(str(row.token)),
+        "wildcard": wildcard,
+        "user_id": str(row.user_id),
+        "token_type": row.token_type,
+        "expires": _expiry_timestamp(row.expires_at),  # type: ignore[arg-type]
+    }
+
+
+class RevocationCache:
+    """Exact-token digests plus per-user wildcard markers, each expiring with its row."""
+
+    def __init__(self):
+        """Initialize an empty, not-yet-authoritative cache."""
+        self.ready = False
+        self._exact: dict[str, float] = {}
+        self._wildcards: dict[tuple[str, str], float] = {}
+        self._last_prune = time.time()
+
+    def add(self, entry: dict) -> None:
+        """Record a revocation produced by ``_entry_for``."""
+        expires = float(entry["expires"])
+        if entry["wildcard"]:
+            key = (str(UUID(entry["user_id"])), entry["token_type"])
+            self._wildcards[key] = max(expires, self._wildcards.get(key, 0.0))
+        else:
+            self._exact[entry["key"]] = expires
+
+    def load(self, db: Session) -> int:
+        """Replace the cache contents with all unexpired rows and mark it ready."""
+        exact: dict[str, float] = {}
+        wildcards: dict[tuple[str, str], float] = {}
+        now = datetime.now(UTC)
+        rows = db.query(RevokedToken).filter(RevokedToken.expires_at > now).all()
+        for row in rows:
+            entry = _entry_for(row)
+            if entry["wildcard"]:
+                key = (str(UUID(entry["user_id"])), entry["token_type"])
+                wildcards[key] = max(entry["expires"], wildcards.get(key, 0.0))
+            else:
+                exact[entry["key"]] = entry["expires"]
+
+        self._exact = exact
+        self._wildcards = wildcards
+        self.ready = True
+        logger.info(f"Revocation cache loaded: {len(exact)} tokens, {len(wildcards)} wildcards")
+        return len(rows)
+
+    def invalidate(self) -> None:
+        """Stop serving from the cache until it is reloaded."""
+        self.ready = False
+
+    def is_revoked(self, token: str, user_id: str | UUID, token_type: str) -> bool:
+        """Check a token against the cache. Only meaningful when ``ready``."""
+        now = time.time()
+        if now - self._last_prune > 60:
+            self._prune(now)
+
+        normalized_user_id = str(UUID(str(user_id)))
+        for key in ((normalized_user_id, token_type), (normalized_user_id, "all")):
+            expires = self._wildcards.get(key)
+            if expires is not None and expires > now:
+                return True
+
+        expires = self._exact.get(token_digest(token))
+        return expires is not None and expires > now
+
+    def _prune(self, now: float) -> None:
+        self._last_prune = now
+        self._exact = {k: v for k, v in self._exact.items() if v > now}
+        self._wildcards = {k: v for k, v in self._wildcards.items() if v > now}
+
+    def handle_notification(self, payload: dict) -> None:
+        """Apply a revocation published by any worker; reload on a reset."""
+        if payload.get("reset"):
+            self.invalidate()
+            asyncio.get_running_loop().create_task(self.reload())
+            return
+        try:
+            self.add(payload)
+        except (KeyError, TypeError, ValueError):
+            logger.warning("Ignoring malformed revocation notification")
+
+    async def reload(self) -> None:
+        """Reload from the database off the event loop (called on listener connect)."""
+        from app.core.database import SessionLocal
+
+        def _load() -> int:
+            db = SessionLocal()
+            try:
+                return self.load(db)
+            finally:
+                db.close()
+
+        loop = asyncio.get_event_loop()
+        try:
+            await loop.run_in_executor(None, _load)
+        except Exception as e:
+            self.invalidate()
+            logger.error(f"Failed to load revocation cache: {e}")
+
+
+# Global revocation cache instance
+revocation_cache = RevocationCache()
+
+pg_listener.subscribe(
+    REVOCATION_CHANNEL,
+    revocation_cache.handle_notification,
+    on_connect=revocation_cache.reload,
+    on_disconnect=revocation_cache.invalidate,
+)
+
+
+@event.listens_for(RevokedToken, "after_insert")
+def _publish_revocation(mapper, connection, target):
+    """Broadcast new revocations and queue them for the local cache on commit."""
+    entry = _entry_for(target)
+    publish(connection, REVOCATION_CHANNEL, entry)
+    defer_until_commit(object_session(target), lambda: revocation_cache.add(entry))
@@ -0,0 +1,125 @@
+"""Caches of schedule-derived data for the roster and analytics endpoints.
+
+Month entries map the dates of one month (``YYYY-MM``) to their shifts as stored
+in ``Schedule.shifts``; range entries hold computed results (e.g. analytics) for
+an inclusive date range. Entries are dropped when a schedule they cover changes:
+locally on commit through the Schedule mapper hooks, and in other workers from
+the schedule change events published on ``EVENTS_CHANNEL``. While the Postgres
+listener is down other workers' changes could be missed, so the cache is
+bypassed until it reconnects.
+"""
+
+import logging
+from collections import OrderedDict
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.orm import object_session
+
+from app.core.database import engine
+from app.core.events import EVENTS_CHANNEL
+from app.core.notifications import defer_until_commit, pg_listener
+from app.models import Schedule
+
+logger = logging.getLogger(__name__)
+
+MonthShifts = dict[str, dict]
+
+
+class RosterCache:
+    """Bounded LRUs of month -> {date: shifts} and date range -> computed result."""
+
+    def __init__(self, max_months: int = 36, max_ranges: int = 64):
+        """Initialize cache state."""
+        self.max_months = max_months
+        self.max_ranges = max_ranges
+        self._months: OrderedDict[str, MonthShifts] = OrderedDict()
+        # (from_date, to_date, *params) -> result; the dates bound what invalidates it
+        self._ranges: OrderedDict[tuple, Any] = OrderedDict()
+        # Bumped on every invalidation so a load that raced with a write is not stored
+        self.generation = 0
+
+    @property
+    def usable(self) -> bool:
+        """False while cross-worker invalidations could be missed."""
+        return engine.dialect.name != "postgresql" or pg_listener.connected
+
+    def get(self, month: str) -> MonthShifts | None:
+        if not self.usable:
+            return None
+        entry = self._months.get(month)
+        if entry is not None:
+            self._months.move_to_end(month)
+        return entry
+
+    def put(self, month: str, days: MonthShifts, generation: int) -> None:
+        """Store a month loaded when ``generation`` was current."""
+        if not self.usable or generation != self.generation:
+            return
+        self._months[month] = days
+        self._months.move_to_end(month)
+        while len(self._months) > self.max_months:
+            self._months.popitem(last=False)
+
+    def get_range(self, key: tuple) -> Any | None:
+        if not self.usable:
+            return None
+        entry = self._ranges.get(key)
+        if entry is not None:
+            self._ranges.move_to_end(key)
+        return entry
+
+    def put_range(self, key: tuple, value: Any, generation: int) -> None:
+        """Store a result for ``key`` (starting with from/to dates) computed at ``generation``."""
+        if not self.usable or generation != self.generation:
+            return
+        self._ranges[key] = value
+        self._ranges.move_to_end(key)
+        while len(self._ranges) > self.max_ranges:
+            self._ranges.popitem(last=False)
+
+    def invalidate_date(self, date: str | None) -> None:
+        if date:
+            self.generation += 1
+            self._months.pop(date[:7], None)
+            for key in [key for key in self._ranges if key[0] <= date <= key[1]]:
+                del self._ranges[key]
+
+    def clear(self) -> None:
+        self.generation += 1
+        self._months.clear()
+        self._ranges.clear()
+
+    def handle_notification(self, payload: dict) -> None:
+        """Drop the month of a schedule changed by any worker, or everything on a resync."""
+        if payload.get("entity") == "schedule":
+            self.invalidate_date(payload.get("date"))
+        elif payload.get("entity") == "resync":
+            self.clear()
+
+    async def handle_reconnect(self) -> None:
+        self.clear()
+
+
+# Global roster cache instance
+roster_cache = RosterCache()
+
+pg_listener.subscribe(
+    EVENTS_CHANNEL,
+    roster_cache.handle_notification,
+    on_connect=roster_cache.handle_reconnect,
+    on_disconnect=roster_cache.clear,
+)
+
+
+def invalidate_roster_date(session, schedule_date: str) -> None:
+    """Drop the month of ``schedule_date`` now and again once ``session`` commits."""
+    roster_cache.invalidate_date(schedule_date)
+    defer_until_commit(session, lambda: roster_cache.invalidate_date(schedule_date))
+
+
+@event.listens_for(Schedule, "after_insert")
+@event.listens_for(Schedule, "after_update")
+@event.listens_for(Schedule, "after_delete")
+def _invalidate_roster_month(mapper, connection, target):
+    invalidate_roster_date(object_session(target), target.date)
@@ -0,0 +1,237 @@
+"""Offline normalization of legacy schedule rows.
+
+Older schedules may store staff names instead of user IDs, miss shift keys or
+contain duplicates. Rows written through the API are already in the current
+format (``Schedule.normalized_version == SCHEDULE_FORMAT_VERSION``); everything
+else is rewritten by this job in batches, each committed on its own, so an
+interrupted run simply resumes with the rows that are still below the current
+version. Rows whose names cannot be resolved are left untouched and reported.
+
+Until a row is normalized it is served as stored, so after upgrading the
+scheduler queues a ``normalize_schedules`` job (see ``app.core.jobs``) shortly
+after startup, and again every hour while rows below the current version
+remain. Operators can queue one right away with ``POST /api/schedules/normalize``
+(admin) and follow it with ``GET /api/schedules/normalize/status``, or run it in
+the foreground:
+
+    python -m app.core.schedule_normalization --batch-size 200
+"""
+
+import argparse
+import logging
+from datetime import UTC, datetime
+from uuid import UUID
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.models import Schedule, User
+
+logger = logging.getLogger(__name__)
+
+# Bump when the stored shifts format changes; rows below it are re-normalized
+SCHEDULE_FORMAT_VERSION = 1
+
+VALID_SHIFTS = {"A", "M", "B", "C"}
+SHIFT_ORDER = ("A", "M", "B", "C")
+
+
+def normalize_person_name(value: str | None) -> str:
+    return " ".join((value or "").split()).casefold()
+
+
+def build_schedule_user_maps(db: Session) -> tuple[dict[str, str], dict[str, str]]:
+    users = db.scalars(
+        select(User).order_by(User.deleted_at.is_not(None), User.created_at, User.id)
+    )
+
+    exact_name_map: dict[str, str] = {}
+    normalized_name_map: dict[str, str] = {}
+    for user in users:
+        name = (user.full_name or "").strip()
+        if not name:
+            continue
+        user_id = str(user.id)
+        exact_name_map.setdefault(name, user_id)
+        normalized_name_map.setdefault(normalize_person_name(name), user_id)
+
+    return exact_name_map, normalized_name_map
+
+
+def resolve_schedule_entry(
+    entry: str,
+    exact_name_map: dict[str, str],
+    normalized_name_map: dict[str, str],
+) -> str | None:
+    try:
+        return str(UUID(entry))
+    except (ValueError, TypeError):
+        pass
+
+    return exact_name_map.get(entry) or normalized_name_map.get(normalize_person_name(entry))
+
+
+def normalize_schedule_shifts(
+    shifts: dict | None,
+    exact_name_map: dict[str, str],
+    normalized_name_map: dict[str, str],
+) -> tuple[dict[str, list[str]], bool, list[str]]:
+    raw_shifts = shifts if isinstance(shifts, dict) else {}
+    normalized_shifts: dict[str, list[str]] = {}
+    changed = not isinstance(shifts, dict)
+    unresolved_entries: list[str] = []
+
+    if set(raw_shifts.keys()) != VALID_SHIFTS:
+        changed = True
+
+    for shift in SHIFT_ORDER:
+        raw_entries = raw_shifts.get(shift, [])
+        if not isinstance(raw_entries, list):
+            raw_entries = []
+            changed = True
+
+        normalized_entries: list[str] = []
+        seen_entries: set[str] = set()
+
+        for raw_entry in raw_entries:
+            value = str(raw_entry or "").strip()
+            if not value:
+                changed = True
+                continue
+
+            resolved_value = resolve_schedule_entry(value, exact_name_map, normalized_name_map)
+            if resolved_value is None:
+                unresolved_entries.append(value)
+                resolved_value = value
+            elif resolved_value != value:
+                changed = True
+
+            if resolved_value in seen_entries:
+                changed = True
+                continue
+
+            seen_entries.add(resolved_value)
+            normalized_entries.append(resolved_value)
+
+        normalized_shifts[shift] = normalized_entries
+
+    return normalized_shifts, changed, unresolved_entries
+
+
+def count_pending_schedules(db: Session) -> int:
+    """Rows still below ``SCHEDULE_FORMAT_VERSION``."""
+    return db.scalar(
+        select(func.count()).where(Schedule.normalized_version < SCHEDULE_FORMAT_VERSION)
+    )
+
+
+class ScheduleNormalizer:
+    """Batched, resumable rewrite of schedules below ``SCHEDULE_FORMAT_VERSION``."""
+
+    def __init__(self, batch_size: int = 200, session_factory=SessionLocal):
+        """Initialize job settings."""
+        self.batch_size = batch_size
+        self.session_factory = session_factory
+
+    def run(self, batch_size: int | None = None, progress: dict | None = None) -> dict:
+        """Normalize all pending rows (blocking). Returns the final progress report.
+
+        ``progress`` is updated in place, so a job can report it while this runs.
+        """
+        batch_size = batch_size or self.batch_size
+        progress = progress if progress is not None else {}
+        progress.update(
+            {
+                "status": "running",
+                "total": 0,
+                "processed": 0,
+                "updated": 0,
+                "unresolved": [],
+                "started_at": datetime.now(UTC).isoformat(),
+                "finished_at": None,
+                "error": None,
+            }
+        )
+        db = self.session_factory()
+        try:
+            progress["total"] = count_pending_schedules(db)
+            # Name lookups are built once per run, not once per row
+            exact_name_map, normalized_name_map = build_schedule_user_maps(db)
+
+            last_date = ""
+            while True:
+                batch = list(
+                    db.scalars(
+                        select(Schedule)
+                        .where(
+                            Schedule.normalized_version < SCHEDULE_FORMAT_VERSION,
+                            Schedule.date > last_date,
+                        )
+                        .order_by(Schedule.date)
+                        .limit(batch_size)
+                    )
+                )
+                if not batch:
+                    break
+
+                for schedule in batch:
+                    normalized_shifts, changed, unresolved_entries = normalize_schedule_shifts(
+                        schedule.shifts, exact_name_map, normalized_name_map
+                    )
+                    if unresolved_entries:
+                        progress["unresolved"].append(
+                            {"date": schedule.date, "entries": unresolved_entries}
+                        )
+                    else:
+                        if changed:
+                            schedule.shifts = normalized_shifts
+                            progress["updated"] += 1
+                        schedule.normalized_version = SCHEDULE_FORMAT_VERSION
+                    progress["processed"] += 1
+
+                last_date = batch[-1].date
+                db.commit()
+                logger.info(
+                    "Schedule normalization: %s/%s rows processed",
+                    progress["processed"],
+                    progress["total"],
+                )
+
+            progress["status"] = "completed"
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Schedule normalization failed: {e}")
+            progress["status"] = "failed"
+            progress["error"] = str(e)
+        finally:
+            db.close()
+            progress["finished_at"] = datetime.now(UTC).isoformat()
+
+        return progress
+
+
+# Global normalization job instance
+schedule_normalizer = ScheduleNormalizer()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Normalize legacy schedule rows")
+    parser.add_argument("--batch-size", type=int, default=200, help="Rows per transaction")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    result = schedule_normalizer.run(batch_size=args.batch_size)
+    logger.info(
+        "Schedule normalization %s: %s processed, %s updated, %s unresolved",
+        result["status"],
+        result["processed"],
+        result["updated"],
+        len(result["unresolved"]),
+    )
+    for row in result["unresolved"]:
+        logger.info("  %s: could not resolve %s", row["date"], ", ".join(row["entries"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,121 @@
-"""Background task scheduler for automatic backups and token cleanup."""
+"""Background task scheduler for backups, schedule normalization and token cleanup.
+
+Every worker starts the scheduler, but only the leader runs the periodic tasks.
+Leadership is a Postgres session advisory lock held on a dedicated connection:
+the leader renews its lease every ``SCHEDULER_LEASE_SECONDS`` by checking that
+the lock is still held and recording the renewal in ``scheduler_state``; the
+other workers retry acquiring the lock on the same interval. When the leader
+dies its connection closes and the lock is released, so another worker takes
+over within one lease period. A leader that stops renewing while its connection
+stays open (hung process) is terminated after ``SCHEDULER_LEASE_TIMEOUT_SECONDS``.
+
+Task run times are stored in ``scheduler_state`` as well, so a new leader keeps
+the existing schedule and ``GET /api/backups/scheduler`` can report it from any
+worker.
+"""
 
 import asyncio
 import logging
-from datetime import UTC, datetime
+import os
+import socket
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
 
-from app.core.backup import backup_manager
+from sqlalchemy import Connection, text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.jobs import enqueue_scheduled_job
+from app.core.schedule_normalization import count_pending_schedules
+from app.models import RevokedToken, SchedulerState
 
 logger = logging.getLogger(__name__)
 
+# Arbitrary application-wide key for the scheduler leader advisory lock
+LEADER_LOCK_KEY = 7_301_002
+
+# scheduler_state row holding the leader lease
+LEADER_STATE = "leader"
+
+
+@dataclass(frozen=True)
+class ScheduledTask:
+    """A periodic task; ``run`` gets a session and returns a short summary."""
+
+    name: str
+    interval_seconds: int
+    first_delay_seconds: int
+    run: Callable[[Session], str]
+
+
+def _queue_backup(db: Session) -> str:
+    job = enqueue_scheduled_job(db, "backup", {"backup_type": "auto", "incremental": True}, 3000)
+    return f"Queued backup job {job.id}" if job else "Skipped: a backup was queued recently"
+
+
+def _queue_backup_cleanup(db: Session) -> str:
+    job = enqueue_scheduled_job(db, "cleanup", {}, 82800)
+    return f"Queued cleanup job {job.id}" if job else "Skipped: a cleanup was queued recently"
+
+
+def _queue_schedule_normalization(db: Session) -> str:
+    pending = count_pending_schedules(db)
+    if not pending:
+        return "No schedules to normalize"
+    job = enqueue_scheduled_job(db, "normalize_schedules", {}, 3000)
+    if job is None:
+        return "Skipped: a normalization was queued recently"
+    return f"Queued normalization job {job.id} for {pending} schedules"
+
+
+def _cleanup_revoked_tokens(db: Session) -> str:
+    # Delete tokens that have expired
+    deleted = db.query(RevokedToken).filter(RevokedToken.expires_at < datetime.now(UTC)).delete()
+    db.commit()
+    return f"{deleted} expired tokens deleted"
+
+
+SCHEDULED_TASKS = (
+    # Hourly (incremental) backups, first one 5 minutes after startup
+    ScheduledTask("backup", 3600, 300, _queue_backup),
+    ScheduledTask("backup_cleanup", 86400, 600, _queue_backup_cleanup),
+    # Legacy schedules are served as stored until normalized: start soon after upgrades
+    ScheduledTask("schedule_normalization", 3600, 60, _queue_schedule_normalization),
+    # Access tokens expire in 30 minutes; purge expired revocations every 6 hours
+    ScheduledTask("token_cleanup", 21600, 3600, _cleanup_revoked_tokens),
+)
+
+
+def _aware(value: datetime | None) -> datetime | None:
+    """SQLite returns naive datetimes; treat them as UTC."""
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=UTC)
+    return value
+
+
+def _state(db: Session, name: str) -> SchedulerState:
+    state = db.get(SchedulerState, name)
+    if state is None:
+        state = SchedulerState(name=name)
+        db.add(state)
+    return state
+
 
 class BackupScheduler:
-    """Manages automated backup scheduling."""
+    """Elects a leader among the workers and runs the periodic tasks there."""
 
-    def __init__(self):
+    def __init__(self, session_factory=SessionLocal):
         """Initialize scheduler."""
+        self.session_factory = session_factory
+        self.tasks = {task.name: task for task in SCHEDULED_TASKS}
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
         self.is_running = False
-        self.backup_task: asyncio.Task | None = None
-        self.cleanup_task: asyncio.Task | None = None
-        self.token_cleanup_task: asyncio.Task | None = None
+        self.is_leader = False
+        self.leader_task: asyncio.Task | None = None
+        self._task_loops: dict[str, asyncio.Task] = {}
+        self._lock_connection: Connection | None = None
 
     async def start(self):
         """Start the backup scheduler."""
@@ -26,121 +124,181 @@ class BackupScheduler:
             return
 
         self.is_running = True
-        logger.info("Starting backup scheduler")
-
-        # Create backup tasks
-        self.backup_task = asyncio.create_task(self._backup_loop())
-        self.cleanup_task = asyncio.create_task(self._cleanup_loop())
-        self.token_cleanup_task = asyncio.create_task(self._token_cleanup_loop())
+        logger.info(f"Starting backup scheduler in worker {self.worker_id}")
+        self.leader_task = asyncio.create_task(self._leader_loop())
 
     async def stop(self):
-        """Stop the backup scheduler."""
+        """Stop the backup scheduler and give up leadership."""
         if not self.is_running:
             return
 
         self.is_running = False
         logger.info("Stopping backup scheduler")
 
-        if self.backup_task:
-            self.backup_task.cancel()
-        if self.cleanup_task:
-            self.cleanup_task.cancel()
-        if self.token_cleanup_task:
-            self.token_cleanup_task.cancel()
-
-        try:
-            if self.backup_task:
-                await self.backup_task
-            if self.cleanup_task:
-                await self.cleanup_task
-            if self.token_cleanup_task:
-                await self.token_cleanup_task
-        except asyncio.CancelledError:
-            pass
-
-    async def _backup_loop(self):
-        """Continuously create backups at scheduled intervals."""
-        # Wait 5 minutes before first backup
-        await asyncio.sleep(300)
-
-        while self.is_running:
-            try:
-                timestamp = datetime.now(UTC).strftime("%Y-%m-%d %H:%M:%S UTC")
-                logger.info(f"Starting scheduled backup at {timestamp}")
-
-                # Run backup in thread pool to avoid blocking
-                loop = asyncio.get_event_loop()
-                result = await loop.run_in_executor(None, backup_manager.create_backup, "auto")
-
-                if result:
-                    logger.info(f"Scheduled backup completed: {result}")
-                else:
-                    logger.error("Scheduled backup failed")
-
-            except Exception as e:
-                logger.error(f"Error in backup loop: {e}")
-
-            # Wait 1 hour before next backup
+        if self.leader_task:
+            self.leader_task.cancel()
             try:
-                await asyncio.sleep(3600)
+                await self.leader_task
             except asyncio.CancelledError:
-                break
-
-    async def _cleanup_loop(self):
-        """Periodically clean up old backups."""
-        # Wait 10 minutes before first cleanup
-        await asyncio.sleep(600)
-
+                pass
+        await self._stop_task_loops()
+        self.is_leader = False
+        await asyncio.get_running_loop().run_in_executor(None, self._release_lock)
+
+    async def _leader_loop(self):
+        """Acquire or renew leadership every lease period; start/stop the tasks on change."""
+        loop = asyncio.get_running_loop()
         while self.is_running:
             try:
-                logger.info("Running backup cleanup")
-
-                # Run cleanup in thread pool
-                loop = asyncio.get_event_loop()
-                deleted = await loop.run_in_executor(None, backup_manager.cleanup_old_backups)
-
-                logger.info(f"Cleanup completed: {deleted} backups deleted")
-
+                leader = await loop.run_in_executor(None, self.hold_leadership)
             except Exception as e:
-                logger.error(f"Error in cleanup loop: {e}")
-
-            # Run cleanup every 24 hours
+                logger.error(f"Error renewing scheduler leadership: {e}")
+                leader = False
+
+            if leader and not self.is_leader:
+                logger.info(f"Worker {self.worker_id} is now the scheduler leader")
+                self.is_leader = True
+                self._task_loops = {
+                    name: asyncio.create_task(self._task_loop(name)) for name in self.tasks
+                }
+            elif not leader and self.is_leader:
+                logger.warning(f"Worker {self.worker_id} lost scheduler leadership")
+                self.is_leader = False
+                await self._stop_task_loops()
+
+            await asyncio.sleep(settings.SCHEDULER_LEASE_SECONDS)
+
+    async def _stop_task_loops(self):
+        tasks = list(self._task_loops.values())
+        self._task_loops = {}
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _task_loop(self, name: str):
+        """Run ``name`` at its next scheduled time, repeatedly, while leader."""
+        loop = asyncio.get_running_loop()
+        while True:
             try:
-                await asyncio.sleep(86400)
+                next_run = await loop.run_in_executor(None, self.next_run_at, name)
+                delay = (next_run - datetime.now(UTC)).total_seconds()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                await loop.run_in_executor(None, self.run_task, name)
             except asyncio.CancelledError:
-                break
-
-    async def _token_cleanup_loop(self):
-        """Periodically clean up expired revoked tokens."""
-        # Wait 1 hour before first cleanup
-        await asyncio.sleep(3600)
+                raise
+            except Exception as e:
+                logger.error(f"Error in scheduled task {name}: {e}")
+                await asyncio.sleep(settings.SCHEDULER_LEASE_SECONDS)
 
-        while self.is_running:
-            try:
-                from app.core.database import SessionLocal
-                from app.models import RevokedToken
-
-                db = SessionLocal()
-                try:
-                    # Delete tokens that have expired
-                    deleted = (
-                        db.query(RevokedToken)
-                        .filter(RevokedToken.expires_at < datetime.now(UTC))
-                        .delete()
-                    )
-                    db.commit()
-                    logger.info(f"Token cleanup completed: {deleted} expired tokens deleted")
-                finally:
-                    db.close()
+    def hold_leadership(self) -> bool:
+        """Acquire or renew the leader lock (blocking). Returns whether this worker leads."""
+        bind = self.session_factory.kw["bind"]
+        if bind.dialect.name != "postgresql":
+            # No advisory locks (e.g. SQLite): a single process is always the leader
+            self._renew_lease(None)
+            return True
 
-            except Exception as e:
-                logger.error(f"Error in token cleanup loop: {e}")
+        try:
+            if self._lock_connection is None:
+                connection = bind.connect().execution_options(isolation_level="AUTOCOMMIT")
+                acquired = connection.scalar(
+                    text("SELECT pg_try_advisory_lock(:key)"), {"key": LEADER_LOCK_KEY}
+                )
+                if not acquired:
+                    connection.close()
+                    self._fail_over_stale_leader(bind)
+                    return False
+                self._lock_connection = connection
+
+            # Lease renewal: the lock connection is alive and still holds the lock
+            backend_pid, held = self._lock_connection.execute(
+                text(
+                    "SELECT pg_backend_pid(), EXISTS (SELECT 1 FROM pg_locks"
+                    " WHERE locktype = 'advisory' AND pid = pg_backend_pid()"
+                    " AND objid = :key AND granted)"
+                ),
+                {"key": LEADER_LOCK_KEY},
+            ).one()
+            if not held:
+                self._release_lock()
+                return False
+            self._renew_lease(backend_pid)
+            return True
+        except Exception:
+            self._release_lock()
+            raise
+
+    def _renew_lease(self, backend_pid: int | None) -> None:
+        with self.session_factory() as db:
+            lease = _state(db, LEADER_STATE)
+            lease.holder = self.worker_id
+            lease.backend_pid = backend_pid
+            lease.renewed_at = datetime.now(UTC)
+            db.commit()
+
+    def _fail_over_stale_leader(self, bind) -> None:
+        """Terminate the lock connection of a leader that stopped renewing its lease."""
+        with self.session_factory() as db:
+            lease = db.get(SchedulerState, LEADER_STATE)
+            if lease is None or lease.backend_pid is None or lease.renewed_at is None:
+                return
+            timeout = timedelta(seconds=settings.SCHEDULER_LEASE_TIMEOUT_SECONDS)
+            if _aware(lease.renewed_at) > datetime.now(UTC) - timeout:
+                return
+            holder, backend_pid = lease.holder, lease.backend_pid
+        logger.warning(
+            f"Scheduler leader {holder} has not renewed its lease; terminating its connection"
+        )
+        with bind.connect() as connection:
+            connection.execute(text("SELECT pg_terminate_backend(:pid)"), {"pid": backend_pid})
+
+    def _release_lock(self) -> None:
+        connection, self._lock_connection = self._lock_connection, None
+        if connection is None:
+            return
+        try:
+            connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": LEADER_LOCK_KEY})
+            connection.close()
+        except Exception:
+            # Discard the connection so the server session (and the lock) ends
+            connection.invalidate()
+
+    def next_run_at(self, name: str) -> datetime:
+        """When ``name`` is due; first runs are delayed after a fresh deployment."""
+        with self.session_factory() as db:
+            state = _state(db, name)
+            if state.next_run_at is None:
+                delay = timedelta(seconds=self.tasks[name].first_delay_seconds)
+                state.next_run_at = datetime.now(UTC) + delay
+                db.commit()
+            return _aware(state.next_run_at)
+
+    def run_task(self, name: str) -> None:
+        """Run ``name`` now (blocking) and record the outcome and next run time."""
+        task = self.tasks[name]
+        started_at = datetime.now(UTC)
+        logger.info(f"Running scheduled task {name}")
+        with self.session_factory() as db:
+            state = _state(db, name)
+            state.holder = self.worker_id
+            state.last_started_at = started_at
+            db.commit()
 
-            # Run cleanup every 6 hours (access tokens expire in 30 min)
             try:
-                await asyncio.sleep(21600)  # 6 hours
-            except asyncio.CancelledError:
-                break
+                message, status = task.run(db), "completed"
+                logger.info(f"Scheduled task {name} completed: {message}")
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Scheduled task {name} failed: {e}")
+                message, status = str(e), "failed"
+
+            state = _state(db, name)
+            state.last_finished_at = datetime.now(UTC)
+            state.last_status = status
+            state.last_message = message
+            state.next_run_at = started_at + timedelta(seconds=task.interval_seconds)
+            db.commit()
 
 
 # Global scheduler instance
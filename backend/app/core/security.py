@@ -5,10 +5,14 @@ import bcrypt
 from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
 from app.core.database import get_db
+from app.core.password_pool import password_pool
+from app.core.principals import Principal, principal_cache
+from app.core.revocation import revocation_cache
 from app.models import RevokedToken, User
 
 # JWT
@@ -33,6 +37,16 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return bcrypt.checkpw(plain_password.encode("utf-8"), hashed_password.encode("utf-8"))
 
 
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password on the password worker pool (use from async handlers)."""
+    return await password_pool.run(get_password_hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the password worker pool (use from async handlers)."""
+    return await password_pool.run(verify_password, plain_password, hashed_password)
+
+
 def create_access_token(subject: str, expires_delta: timedelta | None = None) -> str:
     """Create a JWT access token."""
     if expires_delta:
@@ -53,8 +67,8 @@ def create_refresh_token(subject: str) -> str:
     return encoded_jwt  # type: ignore[no-any-return]
 
 
-def is_token_revoked(
-    db: Session,
+async def is_token_revoked(
+    db: AsyncSession,
     token: str,
     user_id: str | UUID,
     token_type: str = "access",
@@ -65,13 +79,19 @@ def is_token_revoked(
     1. Specific token revocation (exact token match)
     2. Wildcard revocation for specific token type (e.g., all refresh tokens)
     3. Wildcard revocation for all token types (logout all)
+
+    Served from the in-process revocation cache once it has been loaded,
+    otherwise falls back to querying the revoked_tokens table.
     """
+    if revocation_cache.ready:
+        return revocation_cache.is_revoked(token, user_id, token_type)
+
     normalized_user_id = UUID(str(user_id))
     wildcard_token = build_wildcard_token(normalized_user_id, token_type)
     wildcard_all_token = build_wildcard_token(normalized_user_id, "all")
-    revoked = (
-        db.query(RevokedToken)
-        .filter(
+    revoked = await db.scalar(
+        select(RevokedToken.id)
+        .where(
             (RevokedToken.token == token)
             | (
                 ((RevokedToken.token == wildcard_token) | (RevokedToken.token == wildcard_all_token))
@@ -84,13 +104,13 @@ def is_token_revoked(
                 & ((RevokedToken.token_type == token_type) | (RevokedToken.token_type == "all"))
             )
         )
-        .first()
+        .limit(1)
     )
     return revoked is not None
 
 
-def _get_user_from_token(token: str, db: Session) -> User:
-    """Decode a JWT token, validate it, and return the current user record."""
+async def _get_user_id_from_token(token: str, db: AsyncSession) -> str:
+    """Decode a JWT token, ensure it has not been revoked, and return its subject."""
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         user_id = payload.get("sub")
@@ -109,14 +129,17 @@ def _get_user_from_token(token: str, db: Session) -> User:
         )
 
     # Check if token has been revoked (after decoding to get user_id)
-    if is_token_revoked(db, token, user_id, token_type):
+    if await is_token_revoked(db, token, user_id, token_type):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token has been revoked",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    user = db.query(User).filter(User.id == UUID(str(user_id))).first()  # type: ignore[arg-type]
+    return str(user_id)
+
+
+def _ensure_active(user: User | Principal | None) -> None:
     if not user or not user.is_active:  # type: ignore[truthy-bool]
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -124,29 +147,70 @@ def _get_user_from_token(token: str, db: Session) -> User:
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    return user
+
+async def _get_user_from_token(token: str, db: AsyncSession) -> User:
+    """Decode a JWT token, validate it, and return the current user record."""
+    user_id = await _get_user_id_from_token(token, db)
+    user = await db.get(User, UUID(user_id))
+    _ensure_active(user)
+    principal_cache.put(Principal.from_user(user))  # type: ignore[arg-type]
+    return user  # type: ignore[return-value]
+
+
+async def _get_principal_from_token(token: str, db: AsyncSession) -> Principal:
+    """Decode a JWT token, validate it, and return a (possibly cached) principal."""
+    user_id = await _get_user_id_from_token(token, db)
+    principal = principal_cache.get(user_id)
+    if principal is None:
+        user = await db.get(User, UUID(user_id))
+        _ensure_active(user)
+        principal = Principal.from_user(user)  # type: ignore[arg-type]
+        principal_cache.put(principal)
+    _ensure_active(principal)
+    return principal
+
+
+async def revalidate_token(token: str, db: AsyncSession) -> Principal:
+    """Re-check a token held by a long-lived connection such as an event stream.
+
+    Raises the usual 401 once the token has expired or been revoked, or its user
+    was deactivated or deleted.
+    """
+    return await _get_principal_from_token(token, db)
 
 
 async def get_current_user_record(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ) -> User:
-    """Get current authenticated user record from JWT token."""
-    return _get_user_from_token(credentials.credentials, db)
+    """Get current authenticated user record from JWT token.
+
+    Only use this when the handler needs the ORM row (e.g. to modify it);
+    otherwise depend on ``get_current_principal``.
+    """
+    return await _get_user_from_token(credentials.credentials, db)
 
 
-async def get_optional_current_user_record(
+async def get_current_principal(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_db),
+) -> Principal:
+    """Get the current authenticated principal, served from cache when possible."""
+    return await _get_principal_from_token(credentials.credentials, db)
+
+
+async def get_optional_current_principal(
     credentials: HTTPAuthorizationCredentials | None = Depends(optional_security),
-    db: Session = Depends(get_db),
-) -> User | None:
-    """Get current user when a bearer token is present, otherwise return None."""
+    db: AsyncSession = Depends(get_db),
+) -> Principal | None:
+    """Get current principal when a bearer token is present, otherwise return None."""
     if credentials is None:
         return None
-    return _get_user_from_token(credentials.credentials, db)
+    return await _get_principal_from_token(credentials.credentials, db)
 
 
 async def get_current_user(
-    current_user: User = Depends(get_current_user_record),
+    current_user: Principal = Depends(get_current_principal),
 ) -> str:
     """Get current authenticated user id from JWT token."""
     return str(current_user.id)
@@ -154,17 +218,17 @@ async def get_current_user(
 
 async def get_current_user_from_query_token(
     token: str = Query(..., description="JWT access token for EventSource"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ) -> User:
     """Authenticate SSE clients that pass the bearer token as a query parameter."""
-    return _get_user_from_token(token, db)
+    return await _get_user_from_token(token, db)
 
 
 async def require_admin(
-    current_user: User = Depends(get_current_user_record),
-) -> User:
+    current_user: Principal = Depends(get_current_principal),
+) -> Principal:
     """Require the current authenticated user to be an admin."""
-    if not current_user.is_admin:  # type: ignore[truthy-bool]
+    if not current_user.is_admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Admin access required",
@@ -0,0 +1,143 @@
+"""Preview thumbnails for attachments.
+
+After an upload a WebP thumbnail is rendered in the background and stored next
+to the original under ``thumbnails/<file key>.webp``. Raster images are scaled
+with Pillow; PDFs get a preview of their first page when ``pdftoppm``
+(poppler-utils) is installed. Other files (e.g. SVG) have no thumbnail and the
+client falls back to an icon.
+
+Files that cannot have a thumbnail, images above ``THUMBNAIL_MAX_PIXELS``, and
+files whose rendering failed get an empty marker object at the thumbnail key so
+later requests answer 404 without downloading the original again. PDFs are not marked while ``pdftoppm`` is
+missing, so installing it later makes their previews appear.
+"""
+
+import io
+import logging
+import shutil
+import subprocess
+import threading
+
+from PIL import Image, ImageOps
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_PREFIX = "thumbnails/"
+THUMBNAIL_CONTENT_TYPE = "image/webp"
+
+# Rendering is CPU-bound; cap how many run at once per worker
+_render_slots = threading.BoundedSemaphore(2)
+
+
+def thumbnail_key(file_key: str) -> str:
+    return f"{THUMBNAIL_PREFIX}{file_key}.webp"
+
+
+def has_thumbnail(content_type: str) -> bool:
+    """Whether files of ``content_type`` get a thumbnail."""
+    if content_type == "application/pdf":
+        return shutil.which("pdftoppm") is not None
+    return content_type.startswith("image/") and content_type != "image/svg+xml"
+
+
+def _encode(image: Image.Image) -> bytes:
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail((settings.THUMBNAIL_MAX_SIZE, settings.THUMBNAIL_MAX_SIZE))
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+    output = io.BytesIO()
+    image.save(output, format="WEBP", quality=settings.THUMBNAIL_QUALITY, method=4)
+    return output.getvalue()
+
+
+def _render_pdf_page(content: bytes) -> Image.Image | None:
+    pdftoppm = shutil.which("pdftoppm")
+    if pdftoppm is None:
+        return None
+    result = subprocess.run(
+        [
+            pdftoppm,
+            "-f",
+            "1",
+            "-l",
+            "1",
+            "-scale-to",
+            str(settings.THUMBNAIL_MAX_SIZE * 2),
+            "-png",
+            "-",
+        ],
+        input=content,
+        capture_output=True,
+        timeout=30,
+    )
+    if result.returncode != 0 or not result.stdout:
+        logger.warning(f"pdftoppm failed: {result.stderr.decode(errors='replace').strip()}")
+        return None
+    return Image.open(io.BytesIO(result.stdout))
+
+
+def render_thumbnail(content: bytes, content_type: str) -> bytes | None:
+    """WebP thumbnail of ``content``, or None when the type has no preview."""
+    if not has_thumbnail(content_type):
+        return None
+    with _render_slots:
+        if content_type == "application/pdf":
+            image = _render_pdf_page(content)
+            return _encode(image) if image is not None else None
+        image = Image.open(io.BytesIO(content))
+        # Let JPEG decode at a reduced scale instead of full resolution
+        image.draft("RGB", (settings.THUMBNAIL_MAX_SIZE, settings.THUMBNAIL_MAX_SIZE))
+        # Nothing is decoded yet: refuse sizes that would take too much memory,
+        # e.g. a small PNG declaring huge dimensions
+        width, height = image.size
+        if width * height > settings.THUMBNAIL_MAX_PIXELS:
+            logger.warning(f"Image too large for a thumbnail: {width}x{height}")
+            return None
+        return _encode(image)
+
+
+def _store(client, bucket_name: str, file_key: str, thumbnail: bytes) -> None:
+    client.put_object(
+        Bucket=bucket_name,
+        Key=thumbnail_key(file_key),
+        Body=thumbnail,
+        ContentType=THUMBNAIL_CONTENT_TYPE,
+    )
+
+
+def generate_thumbnail(client, bucket_name: str, file_key: str) -> bytes | None:
+    """Render and store the thumbnail of ``file_key`` (blocking).
+
+    The content type is checked with a HEAD request first, so originals without a
+    preview are never downloaded. Returns the thumbnail, ``b""`` when the file has
+    no preview (the miss is stored as an empty marker), or None on storage errors.
+    """
+    try:
+        content_type = client.head_object(Bucket=bucket_name, Key=file_key).get("ContentType", "")
+        if not has_thumbnail(content_type):
+            if content_type == "application/pdf":
+                return None
+            _store(client, bucket_name, file_key, b"")
+            return b""
+
+        source = client.get_object(Bucket=bucket_name, Key=file_key)
+        try:
+            content = source["Body"].read()
+        finally:
+            source["Body"].close()
+        try:
+            thumbnail = render_thumbnail(content, content_type)
+        except Exception as e:
+            logger.warning(f"Failed to render thumbnail for {file_key}: {e}")
+            thumbnail = None
+        if thumbnail is None:
+            _store(client, bucket_name, file_key, b"")
+            return b""
+        _store(client, bucket_name, file_key, thumbnail)
+        logger.info(f"Stored thumbnail for {file_key} ({len(thumbnail)} bytes)")
+        return thumbnail
+    except Exception as e:
+        logger.warning(f"Failed to create thumbnail for {file_key}: {e}")
+        return None
@@ -6,14 +6,19 @@ from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy import text
 
 from app.core.config import settings
-from app.core.database import engine
+from app.core.database import async_engine
+from app.core.events import event_broadcaster
+from app.core.jobs import job_runner
 from app.core.logging_config import get_logger, setup_logging
+from app.core.notifications import pg_listener
+from app.core.password_pool import password_pool
 from app.core.rate_limit import api_rate_limiter
 from app.core.request_logging import RequestLoggingMiddleware
 from app.core.scheduler import backup_scheduler
 from app.routers import (
     auth,
     backups,
+    events,
     files,
     handovers,
     schedules,
@@ -44,11 +49,17 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting Letsee Backend...")
     api_rate_limiter.start_cleanup()
+    await pg_listener.start()
+    await job_runner.start()
     await backup_scheduler.start()
     yield
     # Shutdown
     logger.info("Shutting down Letsee Backend...")
     await backup_scheduler.stop()
+    await job_runner.stop()
+    await pg_listener.stop()
+    password_pool.shutdown()
+    await async_engine.dispose()
 
 
 # Create FastAPI app
@@ -71,6 +82,7 @@ app.add_middleware(
     allow_credentials=settings.CORS_ALLOW_CREDENTIALS,
     allow_methods=settings.CORS_ALLOW_METHODS,
     allow_headers=settings.CORS_ALLOW_HEADERS,
+    expose_headers=settings.CORS_EXPOSE_HEADERS,
 )
 
 
@@ -103,14 +115,15 @@ app.include_router(handovers.router)
 app.include_router(settings_router.router)
 app.include_router(files.router)
 app.include_router(backups.router)
+app.include_router(events.router)
 
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
     try:
-        with engine.connect() as conn:
-            conn.execute(text("SELECT 1"))
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
     except Exception as exc:
         logger.error("Database health check failed: %s", exc)
         return {"status": "degraded", "service": "letsee-backend", "db": "unhealthy"}
@@ -119,6 +132,8 @@ async def health_check():
         "service": "letsee-backend",
         "db": "healthy",
         "backups": "enabled",
+        "password_pool": password_pool.stats(),
+        "event_streams": event_broadcaster.subscriber_count,
     }
 
 
@@ -1,13 +1,35 @@
 import uuid
 from datetime import datetime, UTC
 
-from sqlalchemy import JSON, Boolean, Column, DateTime, ForeignKey, Index, String, Text
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy import (
+    JSON,
+    Boolean,
+    Column,
+    Computed,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    and_,
+    delete,
+    event,
+    insert,
+    inspect,
+    or_,
+)
+from sqlalchemy.dialects.postgresql import TSVECTOR, UUID
+from sqlalchemy.orm import deferred, relationship
 
 from app.core.database import Base
 
 
+def utc_now() -> datetime:
+    """Column default: evaluated per row, not once at import."""
+    return datetime.now(UTC)
+
+
 class Position(Base):
     """Staff position / role (e.g. Manager, Supervisor, Receptionist)."""
 
@@ -15,7 +37,7 @@ class Position(Base):
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String(100), unique=True, nullable=False, index=True)
-    created_at = Column(DateTime(timezone=True), default=datetime.now(UTC), nullable=False)
+    created_at = Column(DateTime(timezone=True), default=utc_now, nullable=False)
 
     users = relationship("User", back_populates="position")
 
@@ -38,11 +60,11 @@ class User(Base):
     is_active = Column(Boolean, default=True, nullable=False)
     is_admin = Column(Boolean, default=False, nullable=False)
     is_verified = Column(Boolean, default=False, nullable=False)
-    created_at = Column(DateTime(timezone=True), default=datetime.now(UTC), nullable=False)
+    created_at = Column(DateTime(timezone=True), default=utc_now, nullable=False)
     updated_at = Column(
         DateTime(timezone=True),
-        default=datetime.now(UTC),
-        onupdate=datetime.now(UTC),
+        default=utc_now,
+        onupdate=utc_now,
         nullable=False,
     )
     deleted_at = Column(DateTime(timezone=True), nullable=True, index=True)  # Soft delete
@@ -66,17 +88,138 @@ class Schedule(Base):
     )  # {A: [user_ids], M: [user_ids], B: [user_ids], C: [user_ids]}
     edited_by = Column(String(255), nullable=True)  # Who last edited this schedule
     edited_at = Column(DateTime(timezone=True), nullable=True)  # When last edited
-    created_at = Column(DateTime(timezone=True), default=datetime.now(UTC), nullable=False)
+    # Shifts format version; rows below SCHEDULE_FORMAT_VERSION await normalization
+    normalized_version = Column(Integer, nullable=False, default=0, server_default="0")
+    created_at = Column(DateTime(timezone=True), default=utc_now, nullable=False)
     updated_at = Column(
         DateTime(timezone=True),
-        default=datetime.now(UTC),
-        onupdate=datetime.now(UTC),
+        default=utc_now,
+        onupdate=utc_now,
         nullable=False,
     )
 
     __table_args__ = (Index("idx_schedule_date", "date"),)
 
 
+class ScheduleAssignment(Base):
+    """One user on one shift of a schedule day.
+
+    Indexed projection of ``Schedule.shifts`` (which stays the source of truth for
+    the API) kept in sync by the Schedule mapper hooks below. ``user_id`` has no
+    foreign key: users are only soft-deleted and legacy JSON may hold stale ids.
+    """
+
+    __tablename__ = "schedule_assignments"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    schedule_id = Column(
+        UUID(as_uuid=True), ForeignKey("schedules.id", ondelete="CASCADE"), nullable=False
+    )
+    schedule_date = Column(String(10), nullable=False)  # YYYY-MM-DD, copied from schedule
+    shift = Column(String(1), nullable=False)  # A, M, B, C
+    user_id = Column(UUID(as_uuid=True), nullable=False)
+    slot = Column(Integer, nullable=False, default=0)  # Order within the shift
+
+    __table_args__ = (
+        # "Which dates is this user on"
+        Index("idx_schedule_assignment_user_date", "user_id", "schedule_date"),
+        # "Who is on shift X on date D"
+        Index("idx_schedule_assignment_date_shift", "schedule_date", "shift"),
+        Index("idx_schedule_assignment_schedule", "schedule_id"),
+    )
+
+
+class ScheduleTemplate(Base):
+    """Named repeating rota: ``days[i]`` holds the shifts for day i of the cycle."""
+
+    __tablename__ = "schedule_templates"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    name = Column(String(100), unique=True, nullable=False)
+    cycle_days = Column(Integer, nullable=False)  # 7 for a weekly pattern
+    days = Column(JSON, nullable=False, default=list)  # [{A: [user_ids], M: [...], ...}, ...]
+    edited_by = Column(String(255), nullable=True)
+    created_at = Column(DateTime(timezone=True), default=utc_now, nullable=False)
+    updated_at = Column(
+        DateTime(timezone=True),
+        default=utc_now,
+        onupdate=utc_now,
+        nullable=False,
+    )
+
+
+def schedule_assignment_rows(schedule_id, schedule_date: str, shifts: dict | None) -> list[dict]:
+    """Rows for ``schedule_assignments`` from a shifts JSON payload.
+
+    Entries that are not user ids (unresolved legacy names) are skipped.
+    """
+    rows = []
+    seen: set[uuid.UUID] = set()
+    raw_shifts = shifts if isinstance(shifts, dict) else {}
+    for shift, entries in raw_shifts.items():
+        if not isinstance(entries, list):
+            continue
+        for slot, entry in enumerate(entries):
+            try:
+                user_id = uuid.UUID(str(entry))
+            except ValueError:
+                continue
+            if user_id in seen:
+                continue
+            seen.add(user_id)
+            rows.append(
+                {
+                    "id": uuid.uuid4(),
+                    "schedule_id": schedule_id,
+                    "schedule_date": schedule_date,
+                    "shift": shift,
+                    "user_id": user_id,
+                    "slot": slot,
+                }
+            )
+    return rows
+
+
+def replace_schedule_assignments(connection, schedule_id, schedule_date, shifts) -> None:
+    """Rewrite the assignment rows of one schedule on ``connection``."""
+    table = ScheduleAssignment.__table__
+    connection.execute(delete(table).where(table.c.schedule_id == schedule_id))
+    rows = schedule_assignment_rows(schedule_id, schedule_date, shifts)
+    if rows:
+        connection.execute(insert(table), rows)
+
+
+@event.listens_for(Schedule, "after_insert")
+def _insert_schedule_assignments(_mapper, connection, target: Schedule) -> None:
+    replace_schedule_assignments(connection, target.id, target.date, target.shifts)
+
+
+@event.listens_for(Schedule, "after_update")
+def _update_schedule_assignments(_mapper, connection, target: Schedule) -> None:
+    state = inspect(target)
+    if state.attrs.shifts.history.has_changes() or state.attrs.date.history.has_changes():
+        replace_schedule_assignments(connection, target.id, target.date, target.shifts)
+
+
+@event.listens_for(Schedule, "after_delete")
+def _delete_schedule_assignments(_mapper, connection, target: Schedule) -> None:
+    # Also covered by ON DELETE CASCADE where foreign keys are enforced
+    table = ScheduleAssignment.__table__
+    connection.execute(delete(table).where(table.c.schedule_id == target.id))
+
+
+# Weighted full-text document for handover search: room/guest rank highest, then
+# category, then the note body. Regconfigs are cast explicitly so the expression is
+# immutable (required for a generated column).
+HANDOVER_SEARCH_EXPRESSION = (
+    "setweight(to_tsvector('simple'::regconfig, coalesce(room, '')), 'A') || "
+    "setweight(to_tsvector('simple'::regconfig, coalesce(guest_name, '')), 'A') || "
+    "setweight(to_tsvector('simple'::regconfig, coalesce(category, '')), 'B') || "
+    "setweight(to_tsvector('english'::regconfig, coalesce(text, '')), 'C') || "
+    "setweight(to_tsvector('english'::regconfig, coalesce(promise_text, '')), 'C')"
+)
+
+
 class Handover(Base):
     """Shift handover note."""
 
@@ -98,24 +241,73 @@ class Handover(Base):
     shift = Column(String(1), nullable=True)  # A, M, B, C
     due_date = Column(String(10), nullable=True)  # YYYY-MM-DD
     due_time = Column(String(5), nullable=True)  # HH:MM
+    # due_date + due_time (00:00 when no time) as local wall-clock time; kept in sync
+    # by _sync_handover_due_at so open items can be ordered from an index
+    due_at = Column(DateTime(timezone=False), nullable=True)
     edited_at = Column(DateTime(timezone=True), nullable=True)
     edited_by = Column(String(255), nullable=True)
-    created_at = Column(DateTime(timezone=True), default=datetime.now(UTC), nullable=False)
+    created_at = Column(DateTime(timezone=True), default=utc_now, nullable=False)
     updated_at = Column(
         DateTime(timezone=True),
-        default=datetime.now(UTC),
-        onupdate=datetime.now(UTC),
+        default=utc_now,
+        onupdate=utc_now,
         nullable=False,
     )
     deleted_at = Column(DateTime(timezone=True), nullable=True, index=True)
+    # Generated by Postgres; deferred so regular loads do not fetch it
+    search_vector = deferred(
+        Column(TSVECTOR, Computed(HANDOVER_SEARCH_EXPRESSION, persisted=True), nullable=True)
+    )
 
     __table_args__ = (
         Index("idx_handover_date", "date"),
         Index("idx_handover_date_created", "date", "created_at"),
         Index("idx_handover_deleted", "deleted_at"),
+        # Keyset pagination over live notes, newest first (optionally per date)
+        Index(
+            "idx_handover_active_timestamp",
+            "timestamp",
+            "id",
+            postgresql_where=deleted_at.is_(None),
+        ),
+        Index(
+            "idx_handover_active_date_timestamp",
+            "date",
+            "timestamp",
+            "id",
+            postgresql_where=deleted_at.is_(None),
+        ),
+        Index("idx_handover_search", "search_vector", postgresql_using="gin"),
+        # Open follow-ups / promises ordered by due time (GET /api/handovers/open)
+        Index(
+            "idx_handover_open_due",
+            "due_at",
+            "id",
+            postgresql_where=and_(
+                deleted_at.is_(None),
+                completed.is_(False),
+                or_(followup.is_(True), promised.is_(True)),
+            ),
+        ),
     )
 
 
+def handover_due_at(due_date: str | None, due_time: str | None) -> datetime | None:
+    """Combine the string due_date/due_time fields; None if missing or malformed."""
+    if not due_date:
+        return None
+    try:
+        return datetime.strptime(f"{due_date} {due_time or '00:00'}", "%Y-%m-%d %H:%M")
+    except ValueError:
+        return None
+
+
+@event.listens_for(Handover, "before_insert")
+@event.listens_for(Handover, "before_update")
+def _sync_handover_due_at(_mapper, _connection, target: Handover) -> None:
+    target.due_at = handover_due_at(target.due_date, target.due_time)
+
+
 class Setting(Base):
     """Application settings."""
 
@@ -124,11 +316,11 @@ class Setting(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     key = Column(String(255), unique=True, nullable=False, index=True)
     value = Column(Text, nullable=False)
-    created_at = Column(DateTime(timezone=True), default=datetime.now(UTC), nullable=False)
+    created_at = Column(DateTime(timezone=True), default=utc_now, nullable=False)
     updated_at = Column(
         DateTime(timezone=True),
-        default=datetime.now(UTC),
-        onupdate=datetime.now(UTC),
+        default=utc_now,
+        onupdate=utc_now,
         nullable=False,
     )
 
@@ -142,10 +334,57 @@ class RevokedToken(Base):
     token = Column(String(500), unique=True, nullable=False, index=True)
     token_type = Column(String(10), nullable=False)  # 'access' or 'refresh'
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
-    revoked_at = Column(DateTime(timezone=True), default=datetime.now(UTC), nullable=False)
+    revoked_at = Column(DateTime(timezone=True), default=utc_now, nullable=False)
     expires_at = Column(DateTime(timezone=True), nullable=False)  # When token would expire
 
     __table_args__ = (
         Index("idx_revoked_token_user", "user_id", "token_type"),
         Index("idx_revoked_token", "token"),
-    )
\ No newline at end of file
+    )
+
+
+class Job(Base):
+    """Background job (backup, restore, cleanup, ...) executed by the job runner."""
+
+    __tablename__ = "jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    kind = Column(String(20), nullable=False)  # backup, restore, cleanup, normalize_schedules
+    # queued, running, completed or failed
+    status = Column(String(20), nullable=False, default="queued")
+    params = Column(JSON, nullable=False, default=dict)
+    progress = Column(JSON, nullable=False, default=dict)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    created_by = Column(String(255), nullable=True)  # None for scheduled jobs
+    created_at = Column(DateTime(timezone=True), default=utc_now, nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)  # Refreshed while running
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # Runner: oldest queued job; status pages: recent jobs of a kind
+        Index("idx_job_status_created", "status", "created_at"),
+        Index("idx_job_kind_created", "kind", "created_at"),
+    )
+
+
+class SchedulerState(Base):
+    """Shared state of the periodic scheduler, one row per task plus the leader lease.
+
+    The ``leader`` row records which worker holds the scheduler advisory lock and
+    when it last renewed it; task rows record their last and next runs so a new
+    leader continues the schedule instead of restarting it.
+    """
+
+    __tablename__ = "scheduler_state"
+
+    name = Column(String(50), primary_key=True)  # Task name, or "leader"
+    holder = Column(String(255), nullable=True)  # Worker (host:pid) that last wrote the row
+    backend_pid = Column(Integer, nullable=True)  # Leader's lock connection (Postgres pid)
+    renewed_at = Column(DateTime(timezone=True), nullable=True)
+    last_started_at = Column(DateTime(timezone=True), nullable=True)
+    last_finished_at = Column(DateTime(timezone=True), nullable=True)
+    last_status = Column(String(20), nullable=True)  # completed or failed
+    last_message = Column(Text, nullable=True)
+    next_run_at = Column(DateTime(timezone=True), nullable=True)
@@ -4,25 +4,28 @@ from uuid import UUID
 from fastapi import APIRouter, Body, Depends, HTTPException, Request, status
 from fastapi.security import HTTPAuthorizationCredentials
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
 from app.core.database import get_db
+from app.core.principals import Principal
 from app.core.rate_limit import auth_rate_limiter
 from app.core.security import (
     build_wildcard_token,
     create_access_token,
     create_refresh_token,
+    get_current_principal,
     get_current_user,
     get_current_user_record,
-    get_optional_current_user_record,
-    get_password_hash,
+    get_optional_current_principal,
+    get_password_hash_async,
     is_token_revoked,
     security,
-    verify_password,
+    verify_password_async,
 )
 from app.models import RevokedToken, User
-from app.routers.users import _user_to_response
+from app.routers.users import _load_user_with_position, _user_to_response
 from app.schemas import AdminPasswordReset, RefreshToken, Token, TokenPair, UserCreate, UserLogin, UserPasswordUpdate, UserResponse
 
 router = APIRouter(prefix="/api/auth", tags=["auth"])
@@ -33,8 +36,8 @@ DEFAULT_USER_COLOR = "#3498db"
 async def register(
     user_create: UserCreate,
     request: Request,
-    db: Session = Depends(get_db),
-    current_user: User | None = Depends(get_optional_current_user_record),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal | None = Depends(get_optional_current_principal),
 ):
     """Create a user account.
 
@@ -45,7 +48,7 @@ async def register(
     # Apply per-route rate limiting to prevent mass signups
     await auth_rate_limiter.check_rate_limit(request)
 
-    user_count = db.query(User).count()
+    user_count = await db.scalar(select(func.count()).select_from(User))
     bootstrap_admin = user_count == 0
 
     if not bootstrap_admin:
@@ -54,14 +57,14 @@ async def register(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Registration is disabled. Ask an administrator to create your account.",
             )
-        if not current_user.is_admin:  # type: ignore[truthy-bool]
+        if not current_user.is_admin:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Only admins can create new user accounts",
             )
 
     # Check if user already exists
-    existing_user = db.query(User).filter(User.email == user_create.email).first()
+    existing_user = await db.scalar(select(User).where(User.email == user_create.email))
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered"
@@ -73,7 +76,7 @@ async def register(
     # Create user (merged User/Person model)
     new_user = User(
         email=user_create.email,
-        hashed_password=get_password_hash(user_create.password),
+        hashed_password=await get_password_hash_async(user_create.password),
         full_name=display_name,
         color=user_create.color or DEFAULT_USER_COLOR,
         theme=getattr(user_create, "theme", "light") or "light",
@@ -82,16 +85,10 @@ async def register(
         position_id=getattr(user_create, "position_id", None),
     )
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
 
     # Reload with position for full response (includes position name)
-    user = (
-        db.query(User)
-        .options(joinedload(User.position))
-        .filter(User.id == new_user.id)
-        .first()
-    )
+    user = await _load_user_with_position(db, new_user.id)
     # Use the same serialization logic (lightweight here)
     pos_name = user.position.name if user.position else None
     return {
@@ -110,13 +107,13 @@ async def register(
 
 
 @router.post("/login", response_model=Token)
-async def login(user_login: UserLogin, request: Request, db: Session = Depends(get_db)):
+async def login(user_login: UserLogin, request: Request, db: AsyncSession = Depends(get_db)):
     """Authenticate and return JWT tokens."""
     # Apply per-route rate limiting to protect against brute force
     await auth_rate_limiter.check_rate_limit(request)
-    user: User | None = db.query(User).filter(User.email == user_login.email).first()
+    user: User | None = await db.scalar(select(User).where(User.email == user_login.email))
 
-    if user is None or not verify_password(str(user_login.password), str(user.hashed_password)):  # type: ignore[arg-type]
+    if user is None or not await verify_password_async(str(user_login.password), str(user.hashed_password)):  # type: ignore[arg-type]
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid email or password"
         )
@@ -129,16 +126,18 @@ async def login(user_login: UserLogin, request: Request, db: Session = Depends(g
     # Revoke all existing refresh tokens for this user (single session enforcement)
     # This ensures only one active session per user
     # First, delete existing wildcard refresh revocations to avoid duplicates
-    db.query(RevokedToken).filter(
-        RevokedToken.user_id == user.id,
-        RevokedToken.token.in_(
-            [
-                "*",
-                build_wildcard_token(user.id, "refresh"),
-            ]
-        ),
-        RevokedToken.token_type == "refresh",
-    ).delete()
+    await db.execute(
+        delete(RevokedToken).where(
+            RevokedToken.user_id == user.id,
+            RevokedToken.token.in_(
+                [
+                    "*",
+                    build_wildcard_token(user.id, "refresh"),
+                ]
+            ),
+            RevokedToken.token_type == "refresh",
+        )
+    )
 
     # Now add new wildcard revocation
     revoked_refresh = RevokedToken(
@@ -149,7 +148,7 @@ async def login(user_login: UserLogin, request: Request, db: Session = Depends(g
         expires_at=datetime.now(UTC) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
     )
     db.add(revoked_refresh)
-    db.commit()
+    await db.commit()
 
     access_token = create_access_token(subject=str(user.id))
     refresh_token = create_refresh_token(subject=str(user.id))
@@ -163,17 +162,12 @@ async def login(user_login: UserLogin, request: Request, db: Session = Depends(g
 
 @router.get("/me", response_model=UserResponse)
 async def get_me(
-    current_user: User = Depends(get_current_user_record),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_db),
 ):
     """Get current user info."""
     # Reload with joinedload so we can properly serialize position name (same as other user endpoints)
-    user = (
-        db.query(User)
-        .options(joinedload(User.position))
-        .filter(User.id == current_user.id)
-        .first()
-    )
+    user = await _load_user_with_position(db, current_user.id)
     if not user:
         # Should never happen for a valid token
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
@@ -185,21 +179,15 @@ async def get_me(
 async def update_my_theme(
     theme: str = Body(..., embed=True),
     current_user: User = Depends(get_current_user_record),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """Update current user's theme preference (no admin required)."""
     if theme not in ("light", "dark"):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="theme must be 'light' or 'dark'")
     current_user.theme = theme
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
     # reload with position for consistent response
-    user = (
-        db.query(User)
-        .options(joinedload(User.position))
-        .filter(User.id == current_user.id)
-        .first()
-    )
+    user = await _load_user_with_position(db, current_user.id)
     return _user_to_response(user)
 
 
@@ -207,10 +195,12 @@ async def update_my_theme(
 async def change_own_password(
     password_update: UserPasswordUpdate,
     current_user: User = Depends(get_current_user_record),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """Change the current user's own password (requires knowing current password)."""
-    if not verify_password(password_update.current_password, current_user.hashed_password):
+    if not await verify_password_async(
+        password_update.current_password, current_user.hashed_password
+    ):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Current password is incorrect",
@@ -222,8 +212,8 @@ async def change_own_password(
             detail="New password cannot be the same as your current password",
         )
 
-    current_user.hashed_password = get_password_hash(password_update.new_password)
-    db.commit()
+    current_user.hashed_password = await get_password_hash_async(password_update.new_password)
+    await db.commit()
     return {"detail": "Password changed successfully"}
 
 
@@ -231,7 +221,7 @@ async def change_own_password(
 async def logout(
     current_user_id: str = Depends(get_current_user),
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """Logout and revoke both access and refresh tokens."""
     access_token = credentials.credentials
@@ -253,7 +243,7 @@ async def logout(
         )
 
     # Revoke the access token (make idempotent to avoid duplicate key errors)
-    db.query(RevokedToken).filter(RevokedToken.token == access_token).delete()
+    await db.execute(delete(RevokedToken).where(RevokedToken.token == access_token))
     revoked_access = RevokedToken(
         token=access_token,
         token_type="access",
@@ -267,11 +257,13 @@ async def logout(
     # This prevents using refresh token to get new access token after logout
     # Use delete-first to avoid UniqueViolation on the wildcard token
     wildcard_refresh = build_wildcard_token(current_user_id, "refresh")
-    db.query(RevokedToken).filter(
-        RevokedToken.user_id == UUID(current_user_id),
-        RevokedToken.token == wildcard_refresh,
-        RevokedToken.token_type == "refresh",
-    ).delete()
+    await db.execute(
+        delete(RevokedToken).where(
+            RevokedToken.user_id == UUID(current_user_id),
+            RevokedToken.token == wildcard_refresh,
+            RevokedToken.token_type == "refresh",
+        )
+    )
     revoked_refresh = RevokedToken(
         token=wildcard_refresh,
         token_type="refresh",
@@ -281,7 +273,7 @@ async def logout(
     )
     db.add(revoked_refresh)
 
-    db.commit()
+    await db.commit()
 
     return {"detail": "Logged out successfully"}
 
@@ -289,12 +281,12 @@ async def logout(
 @router.post("/logout/all")
 async def logout_all_sessions(
     current_user_id: str = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """Logout all sessions for current user (revoke all tokens)."""
     # Revoke all tokens for this user using wildcard (idempotent)
     wildcard_all = build_wildcard_token(current_user_id, "all")
-    db.query(RevokedToken).filter(RevokedToken.token == wildcard_all).delete()
+    await db.execute(delete(RevokedToken).where(RevokedToken.token == wildcard_all))
     revoked = RevokedToken(
         token=wildcard_all,
         token_type="all",
@@ -303,7 +295,7 @@ async def logout_all_sessions(
         expires_at=datetime.now(UTC) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
     )
     db.add(revoked)
-    db.commit()
+    await db.commit()
 
     return {"detail": "All sessions logged out successfully"}
 
@@ -311,7 +303,7 @@ async def logout_all_sessions(
 @router.post("/refresh", response_model=TokenPair)
 async def refresh_token(
     refresh_request: RefreshToken,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """Refresh access token using a valid refresh token."""
     refresh_token_str = refresh_request.refresh_token
@@ -345,7 +337,7 @@ async def refresh_token(
         )
 
     # Check if refresh token has been revoked
-    if is_token_revoked(db, refresh_token_str, user_id, "refresh"):
+    if await is_token_revoked(db, refresh_token_str, user_id, "refresh"):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token has been revoked",
@@ -353,7 +345,7 @@ async def refresh_token(
         )
 
     # Check if user still exists and is active
-    user = db.query(User).filter(User.id == UUID(user_id)).first()  # type: ignore[arg-type]
+    user = await db.get(User, UUID(user_id))  # type: ignore[arg-type]
     if not user or not user.is_active:  # type: ignore[truthy-bool]
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -378,7 +370,7 @@ async def refresh_token(
     except JWTError:
         old_expires_at = datetime.now(UTC) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
 
-    db.query(RevokedToken).filter(RevokedToken.token == refresh_token_str).delete()
+    await db.execute(delete(RevokedToken).where(RevokedToken.token == refresh_token_str))
     revoked = RevokedToken(
         token=refresh_token_str,
         token_type="refresh",
@@ -387,7 +379,7 @@ async def refresh_token(
         expires_at=old_expires_at,
     )
     db.add(revoked)
-    db.commit()
+    await db.commit()
 
     return {
         "access_token": new_access_token,
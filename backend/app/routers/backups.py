@@ -1,11 +1,26 @@
 """Backup management routes."""
 
 import os
+from datetime import UTC, datetime, timedelta
+from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.backup import backup_manager
+from app.core.config import settings
+from app.core.database import get_db
+from app.core.jobs import enqueue_job
+from app.core.scheduler import LEADER_STATE, backup_scheduler
 from app.core.security import require_admin
+from app.models import Job, SchedulerState
+from app.schemas import (
+    JobResponse,
+    SchedulerLeaderStatus,
+    SchedulerStatusResponse,
+    SchedulerTaskStatus,
+)
 
 router = APIRouter(prefix="/api/backups", tags=["backups"])
 
@@ -29,33 +44,52 @@ async def list_backups(
     return {"backups": backups, "total": len(backups)}
 
 
-@router.post("/create")
+def _job_accepted(job: Job, message: str) -> dict:
+    return {"success": True, "message": message, "job": JobResponse.model_validate(job)}
+
+
+@router.post("/create", status_code=status.HTTP_202_ACCEPTED)
 async def create_backup(
     backup_type: str = "manual",
+    incremental: bool = False,
     current_user=Depends(require_admin),
+    db: AsyncSession = Depends(get_db),
 ):
-    """Create a manual backup (admin only)."""
-    filename = backup_manager.create_backup(backup_type=backup_type)
-
-    if not filename:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to create backup",
-        )
-
-    return {
-        "success": True,
-        "backup_filename": filename,
-        "message": "Backup created successfully",
-    }
+    """Queue a manual backup (admin only).
+
+    With ``incremental`` only the rows changed since the newest backup are
+    exported. Poll ``GET /api/backups/jobs/{id}`` for progress and the backup
+    filename.
+    """
+    job = await enqueue_job(
+        db,
+        "backup",
+        {"backup_type": backup_type, "incremental": incremental},
+        created_by=current_user.email,
+    )
+    return _job_accepted(job, "Backup queued")
 
 
-@router.post("/restore/{backup_filename}")
+@router.post("/restore/{backup_filename}", status_code=status.HTTP_202_ACCEPTED)
 async def restore_backup(
     backup_filename: str,
+    dry_run: bool = False,
     current_user=Depends(require_admin),
+    db: AsyncSession = Depends(get_db),
 ):
-    """Restore database from backup (admin only)."""
+    """Queue a restore of the database from a backup (admin only).
+
+    The restore runs as a background job; poll ``GET /api/backups/jobs/{id}`` (or
+    ``GET /api/backups/restore`` for the latest restore) for progress. With
+    ``dry_run`` the backup is restored into a temporary scratch database to verify
+    it, and live data is left untouched.
+
+    A live restore drops and recreates every table in the backup, so all users,
+    handovers, schedules, settings and revoked tokens are replaced, and
+    ``alembic_version`` goes back to the backup's schema revision (run
+    ``alembic upgrade head`` afterwards when restoring an older backup). The jobs
+    and scheduler state tables are kept as they are.
+    """
     # Prevent path traversal attacks by using only the basename
     safe_filename = os.path.basename(backup_filename)
 
@@ -73,28 +107,117 @@ async def restore_backup(
             detail="Invalid backup filename",
         )
 
-    success = backup_manager.restore_backup(safe_filename)
+    job = await enqueue_job(
+        db,
+        "restore",
+        {"filename": safe_filename, "dry_run": dry_run},
+        created_by=current_user.email,
+    )
+    return _job_accepted(job, f"Restore of '{safe_filename}' queued")
 
-    if not success:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to restore backup",
-        )
 
-    return {
-        "success": True,
-        "message": f"Backup '{safe_filename}' restored successfully",
-    }
+@router.get("/restore")
+async def get_restore_status(
+    current_user=Depends(require_admin),
+    db: AsyncSession = Depends(get_db),
+):
+    """The latest restore job (admin only)."""
+    job = await db.scalar(
+        select(Job).where(Job.kind == "restore").order_by(Job.created_at.desc()).limit(1)
+    )
+    if job is None:
+        return {"status": "idle"}
+    return JobResponse.model_validate(job)
 
 
-@router.post("/cleanup")
+@router.post("/cleanup", status_code=status.HTTP_202_ACCEPTED)
 async def cleanup_backups(
     keep_daily: int = 7,
     keep_hourly: int = 24,
     current_user=Depends(require_admin),
+    db: AsyncSession = Depends(get_db),
+):
+    """Queue deletion of old backups to save storage (admin only).
+
+    ``keep_daily`` is the number of automatic full backups kept, each with the
+    chain of increments built on it; ``keep_hourly`` is the number of most recent
+    increments kept restorable. Increments of older chains are deleted.
+    """
+    job = await enqueue_job(
+        db,
+        "cleanup",
+        {"keep_daily": keep_daily, "keep_hourly": keep_hourly},
+        created_by=current_user.email,
+    )
+    return _job_accepted(job, "Backup cleanup queued")
+
+
+@router.get("/jobs", response_model=list[JobResponse])
+async def list_jobs(
+    kind: str | None = None,
+    limit: int = Query(20, ge=1, le=100),
+    current_user=Depends(require_admin),
+    db: AsyncSession = Depends(get_db),
+):
+    """Recent background jobs, newest first (admin only)."""
+    query = select(Job).order_by(Job.created_at.desc()).limit(limit)
+    if kind:
+        query = query.where(Job.kind == kind)
+    return (await db.scalars(query)).all()
+
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(
+    job_id: UUID,
+    current_user=Depends(require_admin),
+    db: AsyncSession = Depends(get_db),
 ):
-    """Delete old backups to save storage (admin only)."""
-    deleted_count = backup_manager.cleanup_old_backups(
-        keep_daily=keep_daily, keep_hourly=keep_hourly
+    """Status, progress and result of a job (admin only)."""
+    job = await db.get(Job, job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
+
+
+@router.get("/scheduler", response_model=SchedulerStatusResponse)
+async def get_scheduler_status(
+    current_user=Depends(require_admin),
+    db: AsyncSession = Depends(get_db),
+):
+    """Current scheduler leader and the last/next run of each periodic task (admin only)."""
+    states = {state.name: state for state in await db.scalars(select(SchedulerState))}
+
+    leader = None
+    lease = states.get(LEADER_STATE)
+    if lease is not None and lease.renewed_at is not None:
+        renewed_at = lease.renewed_at
+        if renewed_at.tzinfo is None:
+            renewed_at = renewed_at.replace(tzinfo=UTC)
+        timeout = timedelta(seconds=settings.SCHEDULER_LEASE_TIMEOUT_SECONDS)
+        leader = SchedulerLeaderStatus(
+            worker=lease.holder,
+            renewed_at=renewed_at,
+            active=renewed_at > datetime.now(UTC) - timeout,
+        )
+
+    tasks = []
+    for name, task in backup_scheduler.tasks.items():
+        state = states.get(name)
+        tasks.append(
+            SchedulerTaskStatus(
+                name=name,
+                interval_seconds=task.interval_seconds,
+                last_started_at=state.last_started_at if state else None,
+                last_finished_at=state.last_finished_at if state else None,
+                last_status=state.last_status if state else None,
+                last_message=state.last_message if state else None,
+                next_run_at=state.next_run_at if state else None,
+            )
+        )
+
+    return SchedulerStatusResponse(
+        worker=backup_scheduler.worker_id,
+        is_leader=backup_scheduler.is_leader,
+        leader=leader,
+        tasks=tasks,
     )
-    return {"success": True, "deleted_count": deleted_count}
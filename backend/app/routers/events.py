@@ -0,0 +1,111 @@
+import asyncio
+import json
+import logging
+import time
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from jose import jwt
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import get_db
+from app.core.events import EventSubscription, event_broadcaster
+from app.core.security import get_current_user_from_query_token, revalidate_token
+from app.models import User
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/events", tags=["events"])
+
+
+def _format_event(payload: dict) -> str:
+    return f"event: {payload['entity']}\ndata: {json.dumps(payload, separators=(',', ':'))}\n\n"
+
+
+async def _still_authorized(subscription: EventSubscription, db: AsyncSession) -> bool:
+    """Whether the stream's token is still unexpired, unrevoked and its user active."""
+    try:
+        await revalidate_token(subscription.token, db)  # type: ignore[arg-type]
+        return True
+    except HTTPException:
+        return False
+    except Exception:
+        # Fail closed: the client reconnects and is authenticated from scratch
+        logger.exception("Could not re-validate event stream for user %s", subscription.user_id)
+        return False
+    finally:
+        await db.close()
+
+
+async def _event_stream(request: Request, subscription: EventSubscription, db: AsyncSession):
+    try:
+        # Reconnect delay hint for EventSource
+        yield "retry: 5000\n\n"
+        next_check = time.monotonic() + settings.SSE_HEARTBEAT_SECONDS
+        while not await request.is_disconnected():
+            timeout = settings.SSE_HEARTBEAT_SECONDS
+            if subscription.expires_at is not None:
+                # Wake up when the token expires rather than up to a heartbeat later
+                timeout = max(0, min(timeout, subscription.expires_at - time.time()))
+            try:
+                payload = await asyncio.wait_for(subscription.queue.get(), timeout=timeout)
+            except TimeoutError:
+                payload = None
+            # Checked on a clock rather than on idle timeouts so that a busy stream
+            # cannot postpone it; ending the stream makes the client re-authenticate
+            expired = subscription.expires_at is not None and time.time() >= subscription.expires_at
+            if expired or time.monotonic() >= next_check:
+                if expired or not await _still_authorized(subscription, db):
+                    break
+                next_check = time.monotonic() + settings.SSE_HEARTBEAT_SECONDS
+            if payload is None:
+                # Comment line keeps proxies from closing an idle connection
+                yield ": heartbeat\n\n"
+                continue
+            yield _format_event(payload)
+            if subscription.lagging and subscription.queue.empty():
+                # Client has caught up with the resync marker; resume normal delivery
+                subscription.lagging = False
+    finally:
+        event_broadcaster.unsubscribe(subscription)
+
+
+@router.get("/stream")
+async def stream_events(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user_from_query_token),
+):
+    """Stream handover, schedule and user change events (text/event-stream).
+
+    Each event is named after its entity (``handover``, ``schedule``, ``user``) and
+    carries ``{entity, action, id, date?}``; clients re-fetch what changed. A
+    ``resync`` event means events were dropped and the client should reload.
+
+    The token is re-checked every heartbeat interval; the stream ends once it has
+    expired or been revoked, or the user was deactivated, so the client has to
+    reconnect with a fresh token.
+    """
+    # The stream is long-lived: give the connection used for authentication back to
+    # the pool instead of holding it until the client disconnects. The session is
+    # reopened briefly for each re-check.
+    await db.close()
+
+    token = request.query_params["token"]
+    expires_at = jwt.get_unverified_claims(token).get("exp")
+    subscription = event_broadcaster.subscribe(
+        str(current_user.id), token=token, expires_at=expires_at
+    )
+    if subscription is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many event stream connections",
+            headers={"Retry-After": "30"},
+        )
+
+    return StreamingResponse(
+        _event_stream(request, subscription, db),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,6 +1,13 @@
+import asyncio
+import hashlib
 import logging
 import os
+import time
 import uuid
+from collections import OrderedDict
+from datetime import datetime
+from email.utils import format_datetime, parsedate_to_datetime
+from functools import partial
 
 import boto3
 
@@ -9,12 +16,29 @@ try:
 except ImportError:
     import python_magic_bin as magic  # type: ignore[import-not-found]  # python-magic-bin for Windows
 
-from fastapi import APIRouter, Depends, File, HTTPException, Request, UploadFile, status
-from fastapi.responses import StreamingResponse
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    File,
+    HTTPException,
+    Request,
+    Response,
+    UploadFile,
+    status,
+)
+from fastapi.responses import RedirectResponse, StreamingResponse
 
 from app.core.config import settings
+from app.core.etag import etag_matches
 from app.core.rate_limit import upload_rate_limiter
 from app.core.security import get_current_user
+from app.core.thumbnails import (
+    THUMBNAIL_CONTENT_TYPE,
+    generate_thumbnail,
+    has_thumbnail,
+    thumbnail_key,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +46,8 @@ router = APIRouter(prefix="/api/files", tags=["files"])
 
 # Initialize Minio client (lazy initialization)
 s3_client = None
+# Client signing URLs for browsers, bound to MINIO_PUBLIC_URL (signing needs no network)
+signing_client = None
 
 # Allowed file extensions (images and PDFs only)
 ALLOWED_EXTENSIONS = {
@@ -55,6 +81,12 @@ ALLOWED_MIME_TYPES = {
 # Max file size configured via settings (default 10MB)
 MAX_FILE_SIZE = settings.MAX_FILE_SIZE
 
+# Uploads are read and sent in parts of this size (S3 minimum for multipart parts),
+# which bounds the memory held per upload
+UPLOAD_PART_SIZE = 5 * 1024 * 1024
+# Enough of the file for libmagic to identify images and PDFs
+MIME_SNIFF_BYTES = 8192
+
 
 def validate_file_type(filename: str) -> bool:
     """Validate file extension against allowed types."""
@@ -126,6 +158,75 @@ def get_s3_client():
     return s3_client
 
 
+def get_signing_client():
+    """Client for presigned URLs handed to browsers."""
+    global signing_client
+    if not settings.MINIO_PUBLIC_URL:
+        return get_s3_client()
+    if signing_client is None:
+        signing_client = boto3.client(
+            "s3",
+            endpoint_url=settings.MINIO_PUBLIC_URL,
+            aws_access_key_id=settings.MINIO_ACCESS_KEY,
+            aws_secret_access_key=settings.MINIO_SECRET_KEY,
+            region_name="us-east-1",
+        )
+    return signing_client
+
+
+class PresignedUrlCache:
+    """Presigned GET URLs by file key, reused until half their lifetime has passed."""
+
+    def __init__(self, max_entries: int = 4096):
+        """Initialize cache state."""
+        self.max_entries = max_entries
+        self._urls: OrderedDict[str, tuple[str, float]] = OrderedDict()
+
+    def get(self, file_key: str) -> str | None:
+        entry = self._urls.get(file_key)
+        if entry is None:
+            return None
+        url, refresh_at = entry
+        if time.monotonic() >= refresh_at:
+            del self._urls[file_key]
+            return None
+        self._urls.move_to_end(file_key)
+        return url
+
+    def put(self, file_key: str, url: str, ttl: int) -> None:
+        self._urls[file_key] = (url, time.monotonic() + ttl / 2)
+        self._urls.move_to_end(file_key)
+        while len(self._urls) > self.max_entries:
+            self._urls.popitem(last=False)
+
+    def discard(self, file_key: str) -> None:
+        self._urls.pop(file_key, None)
+
+    def clear(self) -> None:
+        self._urls.clear()
+
+
+presigned_url_cache = PresignedUrlCache()
+
+
+def presigned_download_url(file_key: str) -> str:
+    """Short-lived GET URL for ``file_key``, signed at most once per half TTL."""
+    url = presigned_url_cache.get(file_key)
+    if url is None:
+        ttl = settings.PRESIGNED_URL_TTL_SECONDS
+        url = get_signing_client().generate_presigned_url(
+            "get_object",
+            Params={
+                "Bucket": get_bucket_name(),
+                "Key": file_key,
+                "ResponseContentDisposition": f"attachment; filename={file_key.split('/')[-1]}",
+            },
+            ExpiresIn=ttl,
+        )
+        presigned_url_cache.put(file_key, url, ttl)
+    return url
+
+
 def ensure_bucket_exists():
     """Create bucket if it doesn't exist."""
     global s3_client
@@ -156,9 +257,88 @@ def ensure_bucket_exists():
             return False
 
 
+class FileTooLargeError(Exception):
+    """Upload exceeded MAX_FILE_SIZE while streaming."""
+
+
+def _file_too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"File too large. Maximum size is {MAX_FILE_SIZE / 1024 / 1024}MB",
+    )
+
+
+async def _read_part(file: UploadFile, buffer: bytes, size: int) -> bytes:
+    """Extend ``buffer`` to ``size`` bytes (less only at end of file)."""
+    chunks = [buffer]
+    remaining = size - len(buffer)
+    while remaining > 0:
+        chunk = await file.read(min(remaining, 1024 * 1024))
+        if not chunk:
+            break
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
+
+
+async def stream_to_storage(
+    client, bucket_name: str, file_key: str, file: UploadFile, head: bytes, **put_args
+) -> int:
+    """Copy ``file`` (whose first bytes are ``head``) to storage; returns its size.
+
+    Files that fit in one part are sent with a single ``put_object``; larger ones use
+    an S3 multipart upload, one part in memory at a time. All storage calls run in
+    the thread pool. Raises FileTooLargeError (after aborting the multipart upload)
+    as soon as more than MAX_FILE_SIZE bytes have been read.
+    """
+    loop = asyncio.get_running_loop()
+
+    def call(method, **kwargs):
+        return loop.run_in_executor(
+            None, partial(method, Bucket=bucket_name, Key=file_key, **kwargs)
+        )
+
+    part = await _read_part(file, head, UPLOAD_PART_SIZE)
+    total = len(part)
+    if total > MAX_FILE_SIZE:
+        raise FileTooLargeError
+    if total < UPLOAD_PART_SIZE:
+        await call(client.put_object, Body=part, **put_args)
+        return total
+
+    upload_id = (await call(client.create_multipart_upload, **put_args))["UploadId"]
+    parts = []
+    try:
+        while part:
+            response = await call(
+                client.upload_part,
+                UploadId=upload_id,
+                PartNumber=len(parts) + 1,
+                Body=part,
+            )
+            parts.append({"PartNumber": len(parts) + 1, "ETag": response["ETag"]})
+            part = await _read_part(file, b"", UPLOAD_PART_SIZE)
+            total += len(part)
+            if total > MAX_FILE_SIZE:
+                raise FileTooLargeError
+        await call(
+            client.complete_multipart_upload,
+            UploadId=upload_id,
+            MultipartUpload={"Parts": parts},
+        )
+    except BaseException:
+        try:
+            await call(client.abort_multipart_upload, UploadId=upload_id)
+        except Exception as e:
+            logger.error(f"Failed to abort multipart upload {file_key}: {e}")
+        raise
+    return total
+
+
 @router.post("/upload")
 async def upload_file(
     request: Request,
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     current_user: str = Depends(get_current_user),
 ):
@@ -166,6 +346,10 @@ async def upload_file(
     Upload a file to Minio and return the file key for later access.
     Requires authentication. Only images and PDFs allowed.
     Validates both file extension and MIME type (magic bytes) for security.
+
+    The file is streamed to storage in parts: the MIME type is sniffed from its
+    first bytes and the size limit is enforced while reading, so at most one part
+    is held in memory per upload. A thumbnail is rendered after the response.
     """
     # Apply upload-specific rate limiting
     await upload_rate_limiter.check_rate_limit(request)
@@ -177,6 +361,10 @@ async def upload_file(
             detail="File type not allowed. Only images and PDFs are accepted.",
         )
 
+    # Size known from the parsed form; the streaming check below still applies
+    if file.size is not None and file.size > MAX_FILE_SIZE:
+        raise _file_too_large()
+
     bucket_name = get_bucket_name()
     try:
         client = get_s3_client()
@@ -186,60 +374,61 @@ async def upload_file(
             detail=f"File storage service not available: {str(e)}",
         )
 
+    # Validate MIME type using magic byte detection on the first bytes only
+    head = await file.read(MIME_SNIFF_BYTES)
+    is_valid_mime, detected_mime = validate_mime_type(head, file.filename)  # type: ignore[arg-type]
+    if not is_valid_mime:
+        logger.warning(
+            f"MIME type mismatch: {file.filename} claimed {file.content_type}, "
+            f"but detected {detected_mime}"
+        )
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="File content does not match file type. Only images and PDFs are accepted.",
+        )
+
     try:
-        if not ensure_bucket_exists():
+        loop = asyncio.get_running_loop()
+        if not await loop.run_in_executor(None, ensure_bucket_exists):
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to initialize storage",
             )
 
-        # Read file content and check size
-        content = await file.read()
-        if len(content) > MAX_FILE_SIZE:
-            raise HTTPException(
-                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                detail=f"File too large. Maximum size is {MAX_FILE_SIZE / 1024 / 1024}MB",
-            )
-
-        # Validate MIME type using magic byte detection
-        is_valid_mime, detected_mime = validate_mime_type(content, file.filename)  # type: ignore[arg-type]
-        if not is_valid_mime:
-            logger.warning(
-                f"MIME type mismatch: {file.filename} claimed {file.content_type}, "
-                f"but detected {detected_mime}"
-            )
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="File content does not match file type. Only images and PDFs are accepted.",
-            )
-
         # Generate unique file key with original extension
         # file.filename is guaranteed to be non-None at this point (FastAPI validation)
         file_extension = os.path.splitext(file.filename)[1].lower()  # type: ignore[arg-type]
         file_key = f"attachments/{uuid.uuid4()}{file_extension}"
 
-        logger.info(
-            f"Uploading file: {file.filename} ({len(content)} bytes, {detected_mime}) to key: {file_key}"
-        )
+        logger.info(f"Uploading file: {file.filename} ({detected_mime}) to key: {file_key}")
 
         # Upload to Minio with detected MIME type
-        client.put_object(
-            Bucket=bucket_name,
-            Key=file_key,
-            Body=content,
+        size = await stream_to_storage(
+            client,
+            bucket_name,
+            file_key,
+            file,
+            head,
             ContentType=detected_mime,
             Metadata={"filename": file.filename},
         )
 
-        logger.info(f"Successfully uploaded file: {file_key}")
+        logger.info(f"Successfully uploaded file: {file_key} ({size} bytes)")
+        if has_thumbnail(detected_mime):
+            # Runs in the thread pool after the response has been sent
+            background_tasks.add_task(generate_thumbnail, client, bucket_name, file_key)
 
         return {
             "success": True,
             "file_key": file_key,
             "filename": file.filename,
-            "size": len(content),
+            "size": size,
             "content_type": detected_mime,
         }
+    except FileTooLargeError:
+        raise _file_too_large()
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to upload file {file.filename}: {str(e)}")
         raise HTTPException(
@@ -248,15 +437,109 @@ async def upload_file(
         )
 
 
+def _storage_error_code(error: Exception) -> str | None:
+    """S3 error code of a boto3 ClientError (None for other exceptions)."""
+    response = getattr(error, "response", None)
+    return response.get("Error", {}).get("Code") if isinstance(response, dict) else None
+
+
+def _parse_range(header: str | None) -> str | None:
+    """Return a single ``bytes=`` range to forward to storage, or None to send the whole file.
+
+    Multiple ranges are answered with the full body, which RFC 9110 allows.
+    """
+    if not header:
+        return None
+    unit, _, spec = header.strip().partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, dash, last = spec.strip().partition("-")
+    if not dash or not (first.isdigit() or (not first and last.isdigit())):
+        return None
+    if last and not last.isdigit():
+        return None
+    if first and last and int(last) < int(first):
+        return None
+    return f"bytes={spec.strip()}"
+
+
+def _parse_http_date(value: str | None) -> datetime | None:
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+
+async def _unsatisfied_range_headers(client, bucket_name: str, file_key: str, error) -> dict:
+    """``Content-Range: bytes */<size>`` for a 416, so clients can retry with a valid range."""
+    size = error.response.get("Error", {}).get("ActualObjectSize")
+    if size is None:
+        try:
+            head = await asyncio.get_running_loop().run_in_executor(
+                None, partial(client.head_object, Bucket=bucket_name, Key=file_key)
+            )
+            size = head.get("ContentLength")
+        except Exception as e:
+            logger.warning(f"Failed to read size of {file_key}: {e}")
+    return {"Content-Range": f"bytes */{size}"} if size is not None else {}
+
+
+async def _iter_body(body, chunk_size: int = 1024 * 1024):
+    """Read a storage response body in the thread pool, closing it when done."""
+    loop = asyncio.get_running_loop()
+    try:
+        while chunk := await loop.run_in_executor(None, body.read, chunk_size):
+            yield chunk
+    finally:
+        body.close()
+
+
+def _object_headers(obj: dict) -> dict[str, str]:
+    headers = {"Accept-Ranges": "bytes", "Cache-Control": "private, no-cache"}
+    if obj.get("ETag"):
+        headers["ETag"] = obj["ETag"]
+    if obj.get("LastModified"):
+        headers["Last-Modified"] = format_datetime(obj["LastModified"], usegmt=True)
+    return headers
+
+
 @router.get("/download/{file_key:path}")
-async def download_file(file_key: str, current_user: str = Depends(get_current_user)):
+async def download_file(
+    file_key: str, request: Request, current_user: str = Depends(get_current_user)
+):
     """
     Download a file from MinIO with streaming support.
     Requires authentication. Validates file path for security.
+
+    With ``FILES_DOWNLOAD_REDIRECT`` enabled the response is a 307 to a presigned
+    MinIO URL, so the bytes bypass the API workers. Otherwise the file is proxied:
+
+    Honours a single-range ``Range`` header (206) with ``If-Range``, and
+    ``If-None-Match`` / ``If-Modified-Since`` (304). Metadata and body come from
+    one ``get_object`` call (two only when ``If-Range`` no longer matches) and
+    the body is read in the thread pool.
     """
     # Validate file path to prevent directory traversal
     validate_file_path(file_key)
 
+    if settings.FILES_DOWNLOAD_REDIRECT:
+        try:
+            url = presigned_download_url(file_key)
+        except Exception as e:
+            logger.error(f"Failed to presign download of {file_key}: {str(e)}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"File storage service not available: {str(e)}",
+            )
+        # MinIO answers ranges, conditionals and missing keys itself
+        return RedirectResponse(
+            url,
+            status_code=status.HTTP_307_TEMPORARY_REDIRECT,
+            headers={"Cache-Control": "no-store"},
+        )
+
     bucket_name = get_bucket_name()
     try:
         client = get_s3_client()
@@ -266,35 +549,133 @@ async def download_file(file_key: str, current_user: str = Depends(get_current_u
             detail=f"File storage service not available: {str(e)}",
         )
 
+    params: dict = {"Bucket": bucket_name, "Key": file_key}
+    byte_range = _parse_range(request.headers.get("range"))
+    if byte_range:
+        params["Range"] = byte_range
+        if_range = request.headers.get("if-range")
+        if if_range:
+            # Only strong ETags are valid validators for If-Range
+            if if_range.startswith('"'):
+                params["IfMatch"] = if_range
+            else:
+                del params["Range"]
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        params["IfNoneMatch"] = if_none_match
+    elif if_modified_since := _parse_http_date(request.headers.get("if-modified-since")):
+        params["IfModifiedSince"] = if_modified_since
+
+    loop = asyncio.get_running_loop()
     try:
-        # Verify file exists and get metadata
-        response = client.head_object(Bucket=bucket_name, Key=file_key)
-        content_length = response.get("ContentLength", 0)
-        content_type = response.get("ContentType", "application/octet-stream")
-
-        # Get file object
-        file_obj = client.get_object(Bucket=bucket_name, Key=file_key)
-
-        filename = file_key.split("/")[-1]
-
-        return StreamingResponse(
-            file_obj["Body"].iter_chunks(chunk_size=1024 * 1024),
-            media_type=content_type,
-            headers={
-                "Content-Disposition": f"attachment; filename={filename}",
-                "Content-Length": str(content_length),
-                "Accept-Ranges": "bytes",
-            },
-        )
-    except client.exceptions.NoSuchKey:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+        try:
+            obj = await loop.run_in_executor(None, partial(client.get_object, **params))
+        except Exception as e:
+            if _storage_error_code(e) not in ("PreconditionFailed", "412"):
+                raise
+            # If-Range did not match: the file changed, send all of it
+            params.pop("Range")
+            params.pop("IfMatch")
+            obj = await loop.run_in_executor(None, partial(client.get_object, **params))
     except Exception as e:
+        error_code = _storage_error_code(e)
+        if error_code in ("NoSuchKey", "404"):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+        if error_code in ("NotModified", "304"):
+            headers = {"Cache-Control": "private, no-cache"}
+            response_headers = e.response.get("ResponseMetadata", {}).get("HTTPHeaders", {})  # type: ignore[attr-defined]
+            etag = response_headers.get("etag")
+            if not etag and if_none_match and "," not in if_none_match:
+                etag = if_none_match
+            if etag:
+                headers["ETag"] = etag
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        if error_code == "InvalidRange":
+            return Response(
+                status_code=status.HTTP_416_RANGE_NOT_SATISFIABLE,
+                headers=await _unsatisfied_range_headers(client, bucket_name, file_key, e),
+            )
         logger.error(f"Failed to download file {file_key}: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to download file: {str(e)}",
         )
 
+    filename = file_key.split("/")[-1]
+    headers = _object_headers(obj)
+    headers["Content-Disposition"] = f"attachment; filename={filename}"
+    headers["Content-Length"] = str(obj.get("ContentLength", 0))
+    status_code = status.HTTP_200_OK
+    if obj.get("ContentRange"):
+        headers["Content-Range"] = obj["ContentRange"]
+        status_code = status.HTTP_206_PARTIAL_CONTENT
+
+    return StreamingResponse(
+        _iter_body(obj["Body"]),
+        status_code=status_code,
+        media_type=obj.get("ContentType", "application/octet-stream"),
+        headers=headers,
+    )
+
+
+@router.get("/thumb/{file_key:path}")
+async def get_thumbnail(
+    file_key: str, request: Request, current_user: str = Depends(get_current_user)
+):
+    """
+    WebP thumbnail of an uploaded image or PDF.
+    Requires authentication. Validates file path for security.
+
+    Thumbnails are normally created after upload; one that is missing (e.g. for
+    files uploaded before thumbnails existed) is rendered on first request.
+    Files without a preview are remembered with an empty marker object, so
+    repeated requests answer 404 without fetching the original. File keys are
+    never reused, so responses may be cached for a year (misses for a day).
+    """
+    validate_file_path(file_key)
+
+    bucket_name = get_bucket_name()
+    try:
+        client = get_s3_client()
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"File storage service not available: {str(e)}",
+        )
+
+    loop = asyncio.get_running_loop()
+    try:
+        obj = await loop.run_in_executor(
+            None, partial(client.get_object, Bucket=bucket_name, Key=thumbnail_key(file_key))
+        )
+        try:
+            content = await loop.run_in_executor(None, obj["Body"].read)
+        finally:
+            obj["Body"].close()
+    except Exception as e:
+        if _storage_error_code(e) not in ("NoSuchKey", "404"):
+            logger.error(f"Failed to load thumbnail of {file_key}: {str(e)}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to load thumbnail: {str(e)}",
+            )
+        content = await loop.run_in_executor(
+            None, generate_thumbnail, client, bucket_name, file_key
+        )
+    if not content:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No thumbnail for this file",
+            # Only a stored miss is final; others (e.g. storage errors) are retried
+            headers={"Cache-Control": "private, max-age=86400"} if content == b"" else None,
+        )
+
+    etag = f'"{hashlib.md5(content, usedforsecurity=False).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=31536000, immutable"}
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=content, media_type=THUMBNAIL_CONTENT_TYPE, headers=headers)
+
 
 @router.delete("/delete/{file_key:path}")
 async def delete_file(file_key: str, current_user: str = Depends(get_current_user)):
@@ -316,6 +697,11 @@ async def delete_file(file_key: str, current_user: str = Depends(get_current_use
 
     try:
         client.delete_object(Bucket=bucket_name, Key=file_key)
+        presigned_url_cache.discard(file_key)
+        try:
+            client.delete_object(Bucket=bucket_name, Key=thumbnail_key(file_key))
+        except Exception as e:
+            logger.warning(f"Failed to delete thumbnail of {file_key}: {e}")
         return {"success": True, "message": "File deleted successfully"}
     except Exception as e:
         raise HTTPException(
@@ -1,36 +1,254 @@
+import base64
 from datetime import UTC, datetime
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import and_, func, literal, literal_column, or_, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
+from app.core.etag import collection_etag, etag_matches, not_modified, set_etag
 from app.core.security import get_current_user
 from app.models import Handover
-from app.schemas import HandoverCreate, HandoverResponse, HandoverUpdate
+from app.schemas import (
+    HandoverCreate,
+    HandoverResponse,
+    HandoverSearchHit,
+    HandoverSearchPage,
+    HandoverUpdate,
+)
 
 router = APIRouter(prefix="/api/handovers", tags=["handovers"])
 
 
+# Columns that may be requested through ``fields=`` (id and timestamp are always included
+# since the pagination cursor is built from them)
+PROJECTABLE_FIELDS = set(HandoverResponse.model_fields)
+MAX_PAGE_SIZE = 500
+MAX_SEARCH_PAGE_SIZE = 100
+# Columns matched by the substring fallback used when the database is not Postgres
+SEARCH_FALLBACK_COLUMNS = ("text", "guest_name", "room", "category", "promise_text")
+
+
+def _encode_cursor(timestamp: datetime, handover_id: UUID) -> str:
+    """Build an opaque keyset cursor from the last row of a page."""
+    raw = f"{timestamp.isoformat()}|{handover_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    """Parse a cursor produced by ``_encode_cursor``."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+        timestamp_value, id_value = raw.split("|", 1)
+        return datetime.fromisoformat(timestamp_value), UUID(id_value)
+    except (ValueError, UnicodeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def _parse_fields(fields: str | None) -> list[str] | None:
+    """Validate a comma-separated ``fields`` projection."""
+    if fields is None:
+        return None
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = sorted(set(requested) - PROJECTABLE_FIELDS)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown handover fields: {', '.join(unknown)}",
+        )
+    return ["id", "timestamp"] + [name for name in requested if name not in ("id", "timestamp")]
+
+
 @router.get("", response_model=list[HandoverResponse])
 async def list_handovers(
+    request: Request,
+    response: Response,
     date: str | None = Query(None),
-    db: Session = Depends(get_db),
+    limit: int | None = Query(
+        None, ge=1, le=MAX_PAGE_SIZE, description="Page size (omit for all notes)"
+    ),
+    cursor: str | None = Query(None, description="X-Next-Cursor value from the previous page"),
+    fields: str | None = Query(
+        None, description="Comma-separated fields to return, e.g. id,date,category,room"
+    ),
+    db: AsyncSession = Depends(get_db),
     current_user: str = Depends(get_current_user),
 ):
-    """Get handover notes. Optionally filter by date (YYYY-MM-DD). Excludes soft-deleted notes."""
-    query = db.query(Handover).filter(Handover.deleted_at.is_(None))
+    """Get handover notes, newest first. Excludes soft-deleted notes.
 
+    Optionally filter by date (YYYY-MM-DD). With ``limit`` the result is paginated on
+    (timestamp, id); when more notes exist the ``X-Next-Cursor`` response header holds
+    the cursor for the next page. ``fields`` restricts the returned columns so large
+    ones (``text``, ``attachments``) are not loaded. Responses carry an ETag; a
+    matching ``If-None-Match`` gets 304 without loading any notes.
+    """
+    columns = _parse_fields(fields)
+    filters = [Handover.deleted_at.is_(None)]
     if date:
-        query = query.filter(Handover.date == date)
+        filters.append(Handover.date == date)
+
+    version = (
+        await db.execute(select(func.count(), func.max(Handover.updated_at)).where(*filters))
+    ).one()
+    etag = collection_etag(request, "handovers", *version)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    if columns is None:
+        query = select(Handover)
+    else:
+        query = select(*(getattr(Handover, name) for name in columns))
+    query = query.where(*filters)
+
+    if cursor:
+        cursor_timestamp, cursor_id = _decode_cursor(cursor)
+        query = query.where(tuple_(Handover.timestamp, Handover.id) < (cursor_timestamp, cursor_id))
+
+    query = query.order_by(Handover.timestamp.desc(), Handover.id.desc())
+    if limit is not None:
+        query = query.limit(limit + 1)
+
+    if columns is None:
+        rows = list(await db.scalars(query))
+        keys = [(row.timestamp, row.id) for row in rows]
+    else:
+        rows = [dict(row) for row in (await db.execute(query)).mappings()]
+        keys = [(row["timestamp"], row["id"]) for row in rows]
+
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor(*keys[limit - 1])
+
+    if columns is not None:
+        # Partial rows do not satisfy HandoverResponse, so bypass response_model
+        projected = JSONResponse(content=jsonable_encoder(rows))
+        set_etag(projected, etag)
+        if next_cursor:
+            projected.headers["X-Next-Cursor"] = next_cursor
+        return projected
+
+    set_etag(response, etag)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return rows
+
+
+def _search_conditions(db: AsyncSession, q: str):
+    """Return (match condition, rank expression) for a search string.
+
+    On Postgres this uses the generated ``search_vector`` column (GIN indexed), matching
+    either the stemmed English or the plain ``simple`` parse of the query so room numbers
+    and guest names match verbatim. Other databases fall back to an unranked
+    case-insensitive substring match on every term.
+    """
+    if db.bind.dialect.name == "postgresql":
+        english = func.websearch_to_tsquery(literal_column("'english'::regconfig"), q)
+        simple = func.websearch_to_tsquery(literal_column("'simple'::regconfig"), q)
+        tsquery = english.op("||")(simple)
+        return (
+            Handover.search_vector.op("@@")(tsquery),
+            func.ts_rank_cd(Handover.search_vector, tsquery),
+        )
+
+    term_conditions = []
+    for term in q.split():
+        # Match % and _ in the query literally
+        pattern = "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        term_conditions.append(
+            or_(
+                *(
+                    getattr(Handover, name).ilike(pattern, escape="\\")
+                    for name in SEARCH_FALLBACK_COLUMNS
+                )
+            )
+        )
+    return and_(*term_conditions), literal(0.0)
+
+
+@router.get("/open", response_model=list[HandoverResponse])
+async def list_open_handovers(
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db),
+    current_user: str = Depends(get_current_user),
+):
+    """Get open follow-ups and promises (not completed, not deleted), soonest due first.
+
+    Notes without a due date come last. The filter matches the ``idx_handover_open_due``
+    partial index exactly, so this is a single ordered index scan.
+    """
+    query = (
+        select(Handover)
+        .where(
+            Handover.deleted_at.is_(None),
+            Handover.completed.is_(False),
+            or_(Handover.followup.is_(True), Handover.promised.is_(True)),
+        )
+        .order_by(Handover.due_at.asc().nulls_last(), Handover.id.asc())
+    )
+    if limit is not None:
+        query = query.limit(limit)
+    return list(await db.scalars(query))
+
+
+@router.get("/search", response_model=HandoverSearchPage)
+async def search_handovers(
+    q: str = Query(..., min_length=1, max_length=200, description="Search text"),
+    date_from: str | None = Query(None, pattern=r"^\d{4}-\d{2}-\d{2}$"),
+    date_to: str | None = Query(None, pattern=r"^\d{4}-\d{2}-\d{2}$"),
+    category: list[str] | None = Query(None, description="Repeat to match several categories"),
+    limit: int = Query(20, ge=1, le=MAX_SEARCH_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_db),
+    current_user: str = Depends(get_current_user),
+):
+    """Full-text search over note text, guest name, room, category and promise text.
+
+    Results are ordered by relevance, then newest first. Soft-deleted notes are
+    excluded. ``next_offset`` is set when another page is available.
+    """
+    if not q.strip():
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Empty search query")
+
+    match, rank = _search_conditions(db, q.strip())
+    query = select(Handover, rank.label("rank")).where(Handover.deleted_at.is_(None), match)
+
+    if date_from:
+        query = query.where(Handover.date >= date_from)
+    if date_to:
+        query = query.where(Handover.date <= date_to)
+    if category:
+        query = query.where(Handover.category.in_(category))
+
+    query = (
+        query.order_by(literal_column("rank").desc(), Handover.timestamp.desc(), Handover.id.desc())
+        .offset(offset)
+        .limit(limit + 1)
+    )
+    rows = (await db.execute(query)).all()
+
+    next_offset = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_offset = offset + limit
 
-    return query.order_by(Handover.timestamp.desc()).all()
+    items = [
+        HandoverSearchHit(
+            **HandoverResponse.model_validate(handover).model_dump(), rank=float(row_rank or 0)
+        )
+        for handover, row_rank in rows
+    ]
+    return HandoverSearchPage(items=items, limit=limit, offset=offset, next_offset=next_offset)
 
 
 @router.post("", response_model=HandoverResponse, status_code=status.HTTP_201_CREATED)
 async def create_handover(
     handover_create: HandoverCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: str = Depends(get_current_user),
 ):
     """Create a new handover note."""
@@ -54,19 +272,19 @@ async def create_handover(
         due_time=handover_create.due_time,
     )
     db.add(new_handover)
-    db.commit()
-    db.refresh(new_handover)
+    await db.commit()
+    await db.refresh(new_handover)
     return new_handover
 
 
 @router.get("/{handover_id}", response_model=HandoverResponse)
 async def get_handover(
     handover_id: UUID,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: str = Depends(get_current_user),
 ):
     """Get a handover note by ID."""
-    handover = db.query(Handover).filter(Handover.id == handover_id).first()
+    handover = await db.get(Handover, handover_id)
     if not handover:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Handover note not found")
     return handover
@@ -76,11 +294,11 @@ async def get_handover(
 async def update_handover(
     handover_id: UUID,
     handover_update: HandoverUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: str = Depends(get_current_user),
 ):
     """Update a handover note."""
-    handover = db.query(Handover).filter(Handover.id == handover_id).first()
+    handover = await db.get(Handover, handover_id)
     if not handover:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Handover note not found")
 
@@ -109,19 +327,19 @@ async def update_handover(
 
     handover.edited_at = datetime.now(UTC)
 
-    db.commit()
-    db.refresh(handover)
+    await db.commit()
+    await db.refresh(handover)
     return handover
 
 
 @router.delete("/{handover_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_handover(
     handover_id: UUID,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: str = Depends(get_current_user),
 ):
     """Soft delete a handover note."""
-    handover = db.query(Handover).filter(Handover.id == handover_id).first()
+    handover = await db.get(Handover, handover_id)
     if not handover:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Handover note not found")
 
@@ -130,4 +348,4 @@ async def delete_handover(
         return
 
     handover.deleted_at = datetime.now(UTC)
-    db.commit()
+    await db.commit()
@@ -1,18 +1,57 @@
-from datetime import UTC, datetime
+from datetime import UTC, datetime, timedelta
+from datetime import date as date_type
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import Date, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.core.database import get_db
-from app.core.security import get_current_user, get_current_user_record, require_admin
-from app.models import Schedule, User
-from app.schemas import ScheduleCreate, ScheduleResponse, ScheduleUpdate
+from app.core.etag import collection_etag, etag_matches, not_modified, set_etag
+from app.core.events import emit_event
+from app.core.jobs import active_job, enqueue_job
+from app.core.principals import Principal
+from app.core.roster_cache import invalidate_roster_date, roster_cache
+from app.core.schedule_normalization import (
+    SCHEDULE_FORMAT_VERSION,
+    SHIFT_ORDER,
+    VALID_SHIFTS,
+)
+from app.core.security import get_current_principal, get_current_user, require_admin
+from app.models import (
+    Job,
+    Schedule,
+    ScheduleAssignment,
+    ScheduleTemplate,
+    User,
+    replace_schedule_assignments,
+)
+from app.schemas import (
+    JobResponse,
+    ScheduleAnalyticsResponse,
+    ScheduleAnalyticsUser,
+    ScheduleBulkResponse,
+    ScheduleBulkResult,
+    ScheduleBulkUpsert,
+    ScheduleCreate,
+    ScheduleGenerateRequest,
+    ScheduleResponse,
+    ScheduleRestViolation,
+    ScheduleRosterResponse,
+    ScheduleTemplateCreate,
+    ScheduleTemplateResponse,
+    ScheduleTemplateUpdate,
+    ScheduleUnderstaffedShift,
+    ScheduleUpdate,
+    ShiftAssignmentError,
+)
 
 router = APIRouter(prefix="/api/schedules", tags=["schedules"])
 
-VALID_SHIFTS = {"A", "M", "B", "C"}
-SHIFT_ORDER = ("A", "M", "B", "C")
+MAX_ROSTER_DAYS = 366
 
 
 def _validate_schedule_date(date_value: str | None) -> str | None:
@@ -37,234 +76,185 @@ def _validate_schedule_date(date_value: str | None) -> str | None:
     return date_value
 
 
-def _normalize_person_name(value: str | None) -> str:
-    return " ".join((value or "").split()).casefold()
-
-
-def _build_schedule_user_maps(db: Session) -> tuple[dict[str, str], dict[str, str]]:
-    users = (
-        db.query(User)
-        .order_by(User.deleted_at.is_not(None), User.created_at, User.id)
-        .all()
-    )
-
-    exact_name_map: dict[str, str] = {}
-    normalized_name_map: dict[str, str] = {}
-    for user in users:
-        name = (user.full_name or "").strip()
-        if not name:
-            continue
-        user_id = str(user.id)
-        exact_name_map.setdefault(name, user_id)
-        normalized_name_map.setdefault(_normalize_person_name(name), user_id)
-
-    return exact_name_map, normalized_name_map
-
-
-def _resolve_schedule_entry(
-    entry: str,
-    exact_name_map: dict[str, str],
-    normalized_name_map: dict[str, str],
-) -> str | None:
-    try:
-        return str(UUID(entry))
-    except (ValueError, TypeError):
-        pass
-
-    return exact_name_map.get(entry) or normalized_name_map.get(_normalize_person_name(entry))
-
-
-def _normalize_schedule_shifts(
-    shifts: dict | None,
-    exact_name_map: dict[str, str],
-    normalized_name_map: dict[str, str],
-) -> tuple[dict[str, list[str]], bool, list[str]]:
-    raw_shifts = shifts if isinstance(shifts, dict) else {}
-    normalized_shifts: dict[str, list[str]] = {}
-    changed = not isinstance(shifts, dict)
-    unresolved_entries: list[str] = []
-
-    if set(raw_shifts.keys()) != VALID_SHIFTS:
-        changed = True
-
-    for shift in SHIFT_ORDER:
-        raw_entries = raw_shifts.get(shift, [])
-        if not isinstance(raw_entries, list):
-            raw_entries = []
-            changed = True
-
-        normalized_entries: list[str] = []
-        seen_entries: set[str] = set()
-
-        for raw_entry in raw_entries:
-            value = str(raw_entry or "").strip()
-            if not value:
-                changed = True
-                continue
-
-            resolved_value = _resolve_schedule_entry(value, exact_name_map, normalized_name_map)
-            if resolved_value is None:
-                unresolved_entries.append(value)
-                resolved_value = value
-            elif resolved_value != value:
-                changed = True
-
-            if resolved_value in seen_entries:
-                changed = True
-                continue
-
-            seen_entries.add(resolved_value)
-            normalized_entries.append(resolved_value)
-
-        normalized_shifts[shift] = normalized_entries
-
-    return normalized_shifts, changed, unresolved_entries
-
-
-def _auto_migrate_schedule_rows(schedules: list[Schedule], db: Session) -> None:
-    if not schedules:
-        return
-
-    exact_name_map, normalized_name_map = _build_schedule_user_maps(db)
-    updated = False
-
-    for schedule in schedules:
-        normalized_shifts, changed, unresolved_entries = _normalize_schedule_shifts(
-            schedule.shifts,
-            exact_name_map,
-            normalized_name_map,
-        )
-        if changed and not unresolved_entries:
-            schedule.shifts = normalized_shifts
-            updated = True
-
-    if updated:
-        db.commit()
-        for schedule in schedules:
-            db.refresh(schedule)
-
-
 @router.get("", response_model=list[ScheduleResponse])
 async def list_schedules(
+    request: Request,
+    response: Response,
     date: str | None = Query(None),
     from_date: str | None = Query(None, description="Start date YYYY-MM-DD (inclusive)"),
     to_date: str | None = Query(None, description="End date YYYY-MM-DD (inclusive)"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: str = Depends(get_current_user),
 ):
-    """Get schedules. Optionally filter by single date or a date range."""
+    """Get schedules. Optionally filter by single date or a date range.
+
+    Responses carry an ETag; a matching ``If-None-Match`` gets 304.
+    """
     date = _validate_schedule_date(date)
     from_date = _validate_schedule_date(from_date)
     to_date = _validate_schedule_date(to_date)
 
-    query = db.query(Schedule)
+    filters = []
     if date:
-        query = query.filter(Schedule.date == date)
+        filters.append(Schedule.date == date)
     if from_date:
-        query = query.filter(Schedule.date >= from_date)
+        filters.append(Schedule.date >= from_date)
     if to_date:
-        query = query.filter(Schedule.date <= to_date)
-
-    schedules = query.order_by(Schedule.date.desc()).all()
-    _auto_migrate_schedule_rows(schedules, db)
+        filters.append(Schedule.date <= to_date)
+
+    version = (
+        await db.execute(select(func.count(), func.max(Schedule.updated_at)).where(*filters))
+    ).one()
+    etag = collection_etag(request, "schedules", *version)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    query = select(Schedule).where(*filters)
+    schedules = list(await db.scalars(query.order_by(Schedule.date.desc())))
+    set_etag(response, etag)
     return schedules
 
 
-def _validate_shifts(shifts: dict, db: Session) -> None:
-    """Validate shift assignments:
-    1. Only valid shift keys (A, M, B, C)
-    2. All user IDs exist and are active
-    3. No duplicate users within a shift
-    4. No duplicate users across shifts
-    """
-    # Validate shift keys
-    for shift_key in shifts:
-        if shift_key not in VALID_SHIFTS:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Invalid shift key: {shift_key}. Must be one of {VALID_SHIFTS}",
-            )
+def _shift_structure_errors(shifts: dict) -> tuple[list[ShiftAssignmentError], list[str]]:
+    """Check shift keys, list types and duplicate users without touching the database.
 
-    # Collect all user IDs and check for duplicates
+    Returns (errors, all assigned user IDs).
+    """
+    errors = []
     all_user_ids = []
+    first_shift: dict[str, str] = {}
     for shift_key, user_ids in shifts.items():
-        if not isinstance(user_ids, list):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Shift {shift_key} must be a list of user IDs",
+        if shift_key not in VALID_SHIFTS:
+            errors.append(
+                ShiftAssignmentError(
+                    shift=shift_key,
+                    code="invalid_shift",
+                    message=f"Invalid shift key: {shift_key}. Must be one of {VALID_SHIFTS}",
+                )
             )
-
-        # Check for duplicates within shift
-        if len(user_ids) != len(set(user_ids)):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Duplicate user IDs in shift {shift_key}",
+            continue
+        if not isinstance(user_ids, list):
+            errors.append(
+                ShiftAssignmentError(
+                    shift=shift_key,
+                    code="invalid_list",
+                    message=f"Shift {shift_key} must be a list of user IDs",
+                )
             )
+            continue
+        for user_id in user_ids:
+            if user_id not in first_shift:
+                first_shift[user_id] = shift_key
+                all_user_ids.append(user_id)
+            elif first_shift[user_id] == shift_key:
+                errors.append(
+                    ShiftAssignmentError(
+                        shift=shift_key,
+                        user_id=user_id,
+                        code="duplicate_in_shift",
+                        message=f"Duplicate user IDs in shift {shift_key}",
+                    )
+                )
+            else:
+                errors.append(
+                    ShiftAssignmentError(
+                        shift=shift_key,
+                        user_id=user_id,
+                        code="duplicate_across_shifts",
+                        message=f"User {user_id} is already assigned to shift "
+                        f"{first_shift[user_id]} on the same day",
+                    )
+                )
+    return errors, all_user_ids
 
-        all_user_ids.extend(user_ids)
-
-    # Check for duplicates across shifts
-    if len(all_user_ids) != len(set(all_user_ids)):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="User assigned to multiple shifts on the same day",
-        )
 
-    # Validate all user IDs exist and are active
-    if all_user_ids:
-        # Convert string UUIDs to UUID objects
-        try:
-            uuid_ids = [UUID(uid) for uid in all_user_ids]
-        except (ValueError, TypeError) as e:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Invalid user ID format: {e}",
-            )
+async def _batch_shift_errors(
+    shifts_by_key: dict[str, dict], db: AsyncSession
+) -> dict[str, list[ShiftAssignmentError]]:
+    """Validate many shift payloads (keyed by date or template day) at once.
 
-        existing_users = (
-            db.query(User)
-            .filter(
-                User.id.in_(uuid_ids),
-                User.deleted_at.is_(None),
-                User.is_active.is_(True),
-            )
-            .all()
+    Structural checks run in memory and every referenced user, across all payloads,
+    is loaded in one query whatever its state. Returns {key: [errors]} for invalid
+    payloads only, listing every invalid assignment rather than the first.
+    """
+    errors: dict[str, list[ShiftAssignmentError]] = {}
+    parsed_ids: dict[str, UUID | None] = {}
+    for key, shifts in shifts_by_key.items():
+        structure_errors, user_ids = _shift_structure_errors(shifts)
+        if structure_errors:
+            errors[key] = structure_errors
+        for user_id in user_ids:
+            try:
+                parsed_ids[user_id] = UUID(user_id)
+            except (ValueError, TypeError):
+                parsed_ids[user_id] = None
+
+    lookup_ids = {user_uuid for user_uuid in parsed_ids.values() if user_uuid is not None}
+    users = {}
+    if lookup_ids:
+        rows = await db.execute(
+            select(User.id, User.deleted_at, User.is_active).where(User.id.in_(lookup_ids))
         )
+        users = {row.id: row for row in rows}
 
-        existing_ids = {str(u.id) for u in existing_users}
-        for uid in all_user_ids:
-            if uid not in existing_ids:
-                # Check if user exists but is deleted
-                deleted_user = (
-                    db.query(User)
-                    .filter(
-                        User.id == UUID(uid),
-                        User.deleted_at.is_not(None),
-                    )
-                    .first()
-                )
-                if deleted_user:
-                    raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        detail=f"User {uid} is no longer active (deleted)",
+    for key, shifts in shifts_by_key.items():
+        seen: set[str] = set()
+        for shift_key, user_ids in shifts.items():
+            if shift_key not in VALID_SHIFTS or not isinstance(user_ids, list):
+                continue
+            for user_id in user_ids:
+                if user_id in seen:
+                    continue
+                seen.add(user_id)
+                user_uuid = parsed_ids[user_id]
+                user = users.get(user_uuid)
+                if user_uuid is None:
+                    code, message = "invalid_user_id", f"Invalid user ID format: {user_id}"
+                elif user is None:
+                    code, message = "user_not_found", f"User {user_id} not found"
+                elif user.deleted_at is not None:
+                    code, message = "user_deleted", f"User {user_id} is no longer active (deleted)"
+                elif not user.is_active:
+                    code, message = "user_inactive", f"User {user_id} is inactive"
+                else:
+                    continue
+                errors.setdefault(key, []).append(
+                    ShiftAssignmentError(
+                        shift=shift_key, user_id=user_id, code=code, message=message
                     )
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"User {uid} not found",
                 )
+    return errors
+
+
+async def _validate_shifts(shifts: dict, db: AsyncSession) -> None:
+    """Validate shift assignments with a single user query.
+
+    1. Only valid shift keys (A, M, B, C)
+    2. All user IDs exist and are active
+    3. No duplicate users within a shift
+    4. No duplicate users across shifts
+
+    Raises 400 whose detail lists every invalid assignment.
+    """
+    errors = (await _batch_shift_errors({"": shifts}, db)).get("")
+    if errors:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=[error.model_dump() for error in errors],
+        )
 
 
 @router.post("", response_model=ScheduleResponse, status_code=status.HTTP_201_CREATED)
 async def create_schedule(
     schedule_create: ScheduleCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_admin),
 ):
     """Create a new schedule for a date."""
     _validate_schedule_date(schedule_create.date)
 
     # Check if schedule already exists for this date
-    existing = db.query(Schedule).filter(Schedule.date == schedule_create.date).first()
+    existing = await db.scalar(select(Schedule).where(Schedule.date == schedule_create.date))
     if existing:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -273,40 +263,158 @@ async def create_schedule(
 
     # Validate shifts
     shifts_data = schedule_create.shifts.model_dump()
-    _validate_shifts(shifts_data, db)
+    await _validate_shifts(shifts_data, db)
 
     new_schedule = Schedule(
         date=schedule_create.date,
         shifts=shifts_data,
         edited_by=current_user.full_name or current_user.email,
         edited_at=datetime.now(UTC),
+        normalized_version=SCHEDULE_FORMAT_VERSION,
     )
     db.add(new_schedule)
-    db.commit()
-    db.refresh(new_schedule)
+    await db.commit()
+    await db.refresh(new_schedule)
     return new_schedule
 
 
+def _upsert_schedule_rows(session: Session, rows: list[dict], created_dates: set[str]) -> dict:
+    """INSERT ... ON CONFLICT (date) DO UPDATE all rows; returns {date: id}.
+
+    Core statements skip the Schedule mapper hooks, so assignments, change events and
+    the roster cache are maintained here.
+    """
+    connection = session.connection()
+    dialect_insert = sqlite.insert if connection.dialect.name == "sqlite" else postgresql.insert
+    statement = dialect_insert(Schedule.__table__).values(rows)
+    statement = statement.on_conflict_do_update(
+        index_elements=[Schedule.date],
+        set_={
+            "shifts": statement.excluded.shifts,
+            "edited_by": statement.excluded.edited_by,
+            "edited_at": statement.excluded.edited_at,
+            "normalized_version": statement.excluded.normalized_version,
+            "updated_at": statement.excluded.updated_at,
+        },
+    ).returning(Schedule.id, Schedule.date)
+    ids = {
+        schedule_date: schedule_id for schedule_id, schedule_date in connection.execute(statement)
+    }
+
+    for row in rows:
+        schedule_date = row["date"]
+        replace_schedule_assignments(connection, ids[schedule_date], schedule_date, row["shifts"])
+        action = "created" if schedule_date in created_dates else "updated"
+        emit_event(
+            session,
+            connection,
+            {
+                "entity": "schedule",
+                "action": action,
+                "id": str(ids[schedule_date]),
+                "date": schedule_date,
+            },
+        )
+        invalidate_roster_date(session, schedule_date)
+    return ids
+
+
+async def _write_schedule_batch(
+    db: AsyncSession, shifts_by_date: dict[str, dict], editor: str
+) -> list[ScheduleBulkResult]:
+    """Upsert validated days in one transaction; returns per-date results."""
+    existing_dates = set(
+        await db.scalars(select(Schedule.date).where(Schedule.date.in_(list(shifts_by_date))))
+    )
+    now = datetime.now(UTC)
+    rows = [
+        {
+            "date": schedule_date,
+            "shifts": shifts,
+            "edited_by": editor,
+            "edited_at": now,
+            "normalized_version": SCHEDULE_FORMAT_VERSION,
+            "updated_at": now,
+        }
+        for schedule_date, shifts in sorted(shifts_by_date.items())
+    ]
+    created_dates = set(shifts_by_date) - existing_dates
+    ids = await db.run_sync(_upsert_schedule_rows, rows, created_dates) if rows else {}
+    await db.commit()
+
+    return [
+        ScheduleBulkResult(
+            date=schedule_date,
+            status="created" if schedule_date in created_dates else "updated",
+            id=ids[schedule_date],
+        )
+        for schedule_date in sorted(shifts_by_date)
+    ]
+
+
+@router.put("/bulk", response_model=ScheduleBulkResponse)
+async def bulk_upsert_schedules(
+    payload: ScheduleBulkUpsert,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_admin),
+):
+    """Create or replace many days at once (e.g. a whole month's roster).
+
+    All days are validated first, with every referenced user checked in a single
+    query. If any day is invalid nothing is written and the response is 400 with the
+    per-date errors; otherwise all days are upserted in one transaction.
+    """
+    shifts_by_date: dict[str, dict] = {}
+    errors: dict[str, list] = {}
+    for item in payload.schedules:
+        _validate_schedule_date(item.date)
+        if item.date in shifts_by_date:
+            errors[item.date] = [
+                ShiftAssignmentError(code="duplicate_date", message="Date appears more than once")
+            ]
+            continue
+        shifts_by_date[item.date] = item.shifts.model_dump()
+
+    for schedule_date, date_errors in (await _batch_shift_errors(shifts_by_date, db)).items():
+        errors.setdefault(schedule_date, []).extend(date_errors)
+    if errors:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=[
+                ScheduleBulkResult(
+                    date=schedule_date, status="error", errors=errors[schedule_date]
+                ).model_dump()
+                for schedule_date in sorted(errors)
+            ],
+        )
+
+    results = await _write_schedule_batch(
+        db, shifts_by_date, current_user.full_name or current_user.email
+    )
+    return ScheduleBulkResponse(results=results)
+
+
 @router.put("/{date}", response_model=ScheduleResponse)
 async def upsert_schedule(
     date: str,
     schedule_update: ScheduleUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_admin),
 ):
     """Create or update a schedule by date (YYYY-MM-DD)."""
     date = _validate_schedule_date(date)
-    schedule = db.query(Schedule).filter(Schedule.date == date).first()
+    schedule = await db.scalar(select(Schedule).where(Schedule.date == date))
 
     if schedule_update.shifts is not None:
         # Validate shifts before saving
         shifts_data = schedule_update.shifts.model_dump()
-        _validate_shifts(shifts_data, db)
+        await _validate_shifts(shifts_data, db)
 
     if schedule:
         # Update existing
         if schedule_update.shifts is not None:
             schedule.shifts = shifts_data
+            schedule.normalized_version = SCHEDULE_FORMAT_VERSION
         # Update audit fields
         schedule.edited_by = current_user.full_name or current_user.email
         schedule.edited_at = datetime.now(UTC)
@@ -322,57 +430,537 @@ async def upsert_schedule(
             shifts=shifts_data,
             edited_by=current_user.full_name or current_user.email,
             edited_at=datetime.now(UTC),
+            normalized_version=SCHEDULE_FORMAT_VERSION,
         )
         db.add(schedule)
 
-    db.commit()
-    db.refresh(schedule)
+    await db.commit()
+    await db.refresh(schedule)
     return schedule
 
 
+def _validate_schedule_range(from_date: str, to_date: str) -> tuple[str, str]:
+    """Validate an inclusive date range of at most ``MAX_ROSTER_DAYS`` days."""
+    from_date = _validate_schedule_date(from_date)
+    to_date = _validate_schedule_date(to_date)
+    span = date_type.fromisoformat(to_date) - date_type.fromisoformat(from_date)
+    if span.days < 0 or span.days >= MAX_ROSTER_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Range must be between 1 and {MAX_ROSTER_DAYS} days",
+        )
+    return from_date, to_date
+
+
+def _months_between(from_date: str, to_date: str) -> list[str]:
+    """YYYY-MM keys of every month touched by the inclusive date range."""
+    year, month = int(from_date[:4]), int(from_date[5:7])
+    months = []
+    while f"{year:04d}-{month:02d}" <= to_date[:7]:
+        months.append(f"{year:04d}-{month:02d}")
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+@router.get("/roster", response_model=ScheduleRosterResponse)
+async def get_schedule_roster(
+    from_date: str = Query(..., alias="from", description="Start date YYYY-MM-DD (inclusive)"),
+    to_date: str = Query(..., alias="to", description="End date YYYY-MM-DD (inclusive)"),
+    db: AsyncSession = Depends(get_db),
+    current_user: str = Depends(get_current_user),
+):
+    """Compact roster for a date range (e.g. a month view).
+
+    ``users`` lists each assigned user ID once; ``days`` maps each scheduled date to
+    one array per shift (in ``shifts`` order) of indexes into ``users``. Months are
+    cached and loaded together in a single query when missing.
+    """
+    from_date, to_date = _validate_schedule_range(from_date, to_date)
+
+    months = _months_between(from_date, to_date)
+    month_days = {month: roster_cache.get(month) for month in months}
+    missing = [month for month, days in month_days.items() if days is None]
+    if missing:
+        generation = roster_cache.generation
+        loaded: dict[str, dict] = {month: {} for month in missing}
+        rows = await db.execute(
+            select(Schedule.date, Schedule.shifts).where(
+                Schedule.date >= f"{missing[0]}-01", Schedule.date <= f"{missing[-1]}-31"
+            )
+        )
+        for schedule_date, shifts in rows:
+            if schedule_date[:7] in loaded:
+                loaded[schedule_date[:7]][schedule_date] = shifts
+        for month, days in loaded.items():
+            roster_cache.put(month, days, generation)
+            month_days[month] = days
+
+    users: list[str] = []
+    user_index: dict[str, int] = {}
+    days: dict[str, list[list[int]]] = {}
+    for month in months:
+        for schedule_date, shifts in sorted(month_days[month].items()):
+            if not from_date <= schedule_date <= to_date:
+                continue
+            shifts = shifts if isinstance(shifts, dict) else {}
+            day = []
+            for shift in SHIFT_ORDER:
+                indexes = []
+                for entry in shifts.get(shift) or []:
+                    entry = str(entry)
+                    if entry not in user_index:
+                        user_index[entry] = len(users)
+                        users.append(entry)
+                    indexes.append(user_index[entry])
+                day.append(indexes)
+            days[schedule_date] = day
+
+    return ScheduleRosterResponse(
+        from_date=from_date,
+        to_date=to_date,
+        shifts=list(SHIFT_ORDER),
+        users=users,
+        days=days,
+    )
+
+
+def _iso_week(schedule_date: str) -> str:
+    year, week, _ = date_type.fromisoformat(schedule_date).isocalendar()
+    return f"{year:04d}-W{week:02d}"
+
+
+@router.get("/analytics", response_model=ScheduleAnalyticsResponse)
+async def get_schedule_analytics(
+    from_date: str = Query(..., alias="from", description="Start date YYYY-MM-DD (inclusive)"),
+    to_date: str = Query(..., alias="to", description="End date YYYY-MM-DD (inclusive)"),
+    min_staff: int = Query(1, ge=1, le=50, description="Required staff per shift"),
+    shift: list[str] | None = Query(None, description="Shifts checked for understaffing"),
+    db: AsyncSession = Depends(get_db),
+    current_user: str = Depends(get_current_user),
+):
+    """Coverage report for a date range, computed from ``schedule_assignments``.
+
+    - ``users``: shifts and hours per user, in total and per ISO week
+      (``SCHEDULE_SHIFT_HOURS`` per shift)
+    - ``understaffed``: shifts of scheduled days with fewer than ``min_staff`` people
+    - ``rest_violations``: a C (night) shift followed by an A shift the next day
+
+    Results are cached per range and parameters until a schedule in the range changes.
+    """
+    from_date, to_date = _validate_schedule_range(from_date, to_date)
+    checked_shifts = tuple(
+        shift_key for shift_key in SHIFT_ORDER if shift_key in (shift or SHIFT_ORDER)
+    )
+    invalid_shifts = set(shift or ()) - VALID_SHIFTS
+    if invalid_shifts:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid shift key: {sorted(invalid_shifts)[0]}. Must be one of {VALID_SHIFTS}",
+        )
+
+    # Names are joined in per request so a renamed user is never served from the cache
+    cache_key = (from_date, to_date, "analytics", min_staff, checked_shifts)
+    result = roster_cache.get_range(cache_key)
+    if result is None:
+        generation = roster_cache.generation
+        result = await _compute_schedule_analytics(
+            db, from_date, to_date, min_staff, checked_shifts
+        )
+        roster_cache.put_range(cache_key, result, generation)
+
+    user_ids = {user.user_id for user in result.users}
+    name_rows = await db.execute(select(User.id, User.full_name).where(User.id.in_(user_ids)))
+    # Result exposes keys(), so dict(name_rows) would treat it as a mapping
+    names = {user_id: full_name for user_id, full_name in name_rows}  # noqa: C416
+    users = [
+        user.model_copy(update={"full_name": names.get(user.user_id)}) for user in result.users
+    ]
+    users.sort(key=lambda user: (-user.total, user.full_name or "", str(user.user_id)))
+    return result.model_copy(
+        update={
+            "users": users,
+            "rest_violations": [
+                violation.model_copy(update={"full_name": names.get(violation.user_id)})
+                for violation in result.rest_violations
+            ],
+        }
+    )
+
+
+async def _compute_schedule_analytics(
+    db: AsyncSession,
+    from_date: str,
+    to_date: str,
+    min_staff: int,
+    checked_shifts: tuple[str, ...],
+) -> ScheduleAnalyticsResponse:
+    """Analytics for a range, aggregated in SQL; user names are left unset."""
+    in_range = ScheduleAssignment.schedule_date.between(from_date, to_date)
+    shift_counts: dict[UUID, dict[str, int]] = {}
+    for user_id, shift_key, count in await db.execute(
+        select(ScheduleAssignment.user_id, ScheduleAssignment.shift, func.count())
+        .where(in_range)
+        .group_by(ScheduleAssignment.user_id, ScheduleAssignment.shift)
+    ):
+        shift_counts.setdefault(user_id, dict.fromkeys(SHIFT_ORDER, 0))[shift_key] = count
+
+    week_counts: dict[UUID, dict[str, int]] = {}
+    if db.bind.dialect.name == "postgresql":
+        iso_week = func.to_char(
+            func.cast(ScheduleAssignment.schedule_date, Date), 'IYYY-"W"IW'
+        ).label("week")
+        week_rows = await db.execute(
+            select(ScheduleAssignment.user_id, iso_week, func.count())
+            .where(in_range)
+            .group_by(ScheduleAssignment.user_id, iso_week)
+        )
+    else:
+        # No ISO week function elsewhere: count per day in SQL, fold days into weeks here
+        week_rows = (
+            (user_id, _iso_week(schedule_date), count)
+            for user_id, schedule_date, count in await db.execute(
+                select(ScheduleAssignment.user_id, ScheduleAssignment.schedule_date, func.count())
+                .where(in_range)
+                .group_by(ScheduleAssignment.user_id, ScheduleAssignment.schedule_date)
+            )
+        )
+    for user_id, week, count in week_rows:
+        weeks = week_counts.setdefault(user_id, {})
+        weeks[week] = weeks.get(week, 0) + count
+
+    staffed = {
+        (schedule_date, shift_key): count
+        for schedule_date, shift_key, count in await db.execute(
+            select(ScheduleAssignment.schedule_date, ScheduleAssignment.shift, func.count())
+            .where(in_range)
+            .group_by(ScheduleAssignment.schedule_date, ScheduleAssignment.shift)
+        )
+    }
+    scheduled_dates = list(
+        await db.scalars(
+            select(Schedule.date)
+            .where(Schedule.date.between(from_date, to_date))
+            .order_by(Schedule.date)
+        )
+    )
+
+    # Only night and morning shifts matter for rest checks
+    nights: set[tuple[UUID, str]] = set()
+    mornings: set[tuple[UUID, str]] = set()
+    for user_id, schedule_date, shift_key in await db.execute(
+        select(
+            ScheduleAssignment.user_id,
+            ScheduleAssignment.schedule_date,
+            ScheduleAssignment.shift,
+        ).where(in_range, ScheduleAssignment.shift.in_(("A", "C")))
+    ):
+        if shift_key == "C":
+            nights.add((user_id, schedule_date))
+        elif shift_key == "A":
+            mornings.add((user_id, schedule_date))
+
+    hours_per_shift = settings.SCHEDULE_SHIFT_HOURS
+    users = [
+        ScheduleAnalyticsUser(
+            user_id=user_id,
+            shifts=counts,
+            total=sum(counts.values()),
+            hours=sum(counts.values()) * hours_per_shift,
+            weeks={
+                week: count * hours_per_shift
+                for week, count in sorted(week_counts.get(user_id, {}).items())
+            },
+        )
+        for user_id, counts in shift_counts.items()
+    ]
+
+    understaffed = [
+        ScheduleUnderstaffedShift(
+            date=schedule_date,
+            shift=shift_key,
+            staffed=staffed.get((schedule_date, shift_key), 0),
+            required=min_staff,
+        )
+        for schedule_date in scheduled_dates
+        for shift_key in checked_shifts
+        if staffed.get((schedule_date, shift_key), 0) < min_staff
+    ]
+
+    rest_violations = []
+    for user_id, night_date in sorted(nights, key=lambda item: (item[1], str(item[0]))):
+        morning_date = (date_type.fromisoformat(night_date) + timedelta(days=1)).isoformat()
+        if (user_id, morning_date) in mornings:
+            rest_violations.append(
+                ScheduleRestViolation(
+                    user_id=user_id, night_date=night_date, morning_date=morning_date
+                )
+            )
+
+    return ScheduleAnalyticsResponse(
+        from_date=from_date,
+        to_date=to_date,
+        min_staff=min_staff,
+        users=users,
+        understaffed=understaffed,
+        rest_violations=rest_violations,
+    )
+
+
+@router.post("/normalize", status_code=status.HTTP_202_ACCEPTED, response_model=JobResponse)
+async def start_schedule_normalization(
+    batch_size: int = Query(200, ge=1, le=5000),
+    current_user: Principal = Depends(require_admin),
+    db: AsyncSession = Depends(get_db),
+):
+    """Queue normalization of legacy schedule rows (admin only).
+
+    The scheduler also queues it after upgrades; this starts it right away.
+    """
+    if await active_job(db, "normalize_schedules") is not None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Schedule normalization is already queued or running",
+        )
+    return await enqueue_job(
+        db, "normalize_schedules", {"batch_size": batch_size}, created_by=current_user.email
+    )
+
+
+@router.get("/normalize/status")
+async def get_schedule_normalization_status(
+    current_user: Principal = Depends(require_admin),
+    db: AsyncSession = Depends(get_db),
+):
+    """The latest schedule normalization job (admin only)."""
+    job = await db.scalar(
+        select(Job)
+        .where(Job.kind == "normalize_schedules")
+        .order_by(Job.created_at.desc())
+        .limit(1)
+    )
+    if job is None:
+        return {"status": "idle"}
+    return JobResponse.model_validate(job)
+
+
+@router.get("/on-shift", response_model=list[UUID])
+async def list_users_on_shift(
+    date: str = Query(..., description="Date YYYY-MM-DD"),
+    shift: str = Query(..., description="Shift key (A, M, B, C)"),
+    db: AsyncSession = Depends(get_db),
+    current_user: str = Depends(get_current_user),
+):
+    """IDs of the users assigned to ``shift`` on ``date``, in roster order."""
+    date = _validate_schedule_date(date)
+    if shift not in VALID_SHIFTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid shift key: {shift}. Must be one of {VALID_SHIFTS}",
+        )
+    return list(
+        await db.scalars(
+            select(ScheduleAssignment.user_id)
+            .where(ScheduleAssignment.schedule_date == date, ScheduleAssignment.shift == shift)
+            .order_by(ScheduleAssignment.slot)
+        )
+    )
+
+
+async def _validate_template_days(days: list[dict], db: AsyncSession) -> None:
+    """Raise 400 listing every invalid assignment in a template's cycle days."""
+    errors = await _batch_shift_errors({str(index): day for index, day in enumerate(days)}, db)
+    if errors:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=[
+                {"day": int(index), "errors": [error.model_dump() for error in day_errors]}
+                for index, day_errors in sorted(errors.items(), key=lambda item: int(item[0]))
+            ],
+        )
+
+
+async def _get_template_or_404(template_id: UUID, db: AsyncSession) -> ScheduleTemplate:
+    template = await db.get(ScheduleTemplate, template_id)
+    if not template:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Template not found")
+    return template
+
+
+@router.get("/templates", response_model=list[ScheduleTemplateResponse])
+async def list_schedule_templates(
+    db: AsyncSession = Depends(get_db),
+    current_user: str = Depends(get_current_user),
+):
+    """List schedule templates."""
+    return list(await db.scalars(select(ScheduleTemplate).order_by(ScheduleTemplate.name)))
+
+
+@router.post(
+    "/templates", response_model=ScheduleTemplateResponse, status_code=status.HTTP_201_CREATED
+)
+async def create_schedule_template(
+    template_create: ScheduleTemplateCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_admin),
+):
+    """Create a rotation template; ``days`` is one shift assignment per cycle day."""
+    if await db.scalar(
+        select(ScheduleTemplate.id).where(ScheduleTemplate.name == template_create.name)
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Template '{template_create.name}' already exists",
+        )
+    days = [day.model_dump() for day in template_create.days]
+    await _validate_template_days(days, db)
+
+    template = ScheduleTemplate(
+        name=template_create.name,
+        cycle_days=len(days),
+        days=days,
+        edited_by=current_user.full_name or current_user.email,
+    )
+    db.add(template)
+    await db.commit()
+    await db.refresh(template)
+    return template
+
+
+@router.put("/templates/{template_id}", response_model=ScheduleTemplateResponse)
+async def update_schedule_template(
+    template_id: UUID,
+    template_update: ScheduleTemplateUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_admin),
+):
+    """Rename a template or replace its cycle days."""
+    template = await _get_template_or_404(template_id, db)
+
+    if template_update.name is not None and template_update.name != template.name:
+        if await db.scalar(
+            select(ScheduleTemplate.id).where(ScheduleTemplate.name == template_update.name)
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Template '{template_update.name}' already exists",
+            )
+        template.name = template_update.name
+    if template_update.days is not None:
+        days = [day.model_dump() for day in template_update.days]
+        await _validate_template_days(days, db)
+        template.days = days
+        template.cycle_days = len(days)
+    template.edited_by = current_user.full_name or current_user.email
+
+    await db.commit()
+    await db.refresh(template)
+    return template
+
+
+@router.delete("/templates/{template_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_schedule_template(
+    template_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_admin),
+):
+    """Delete a template. Schedules generated from it are kept."""
+    template = await _get_template_or_404(template_id, db)
+    await db.delete(template)
+    await db.commit()
+    return None
+
+
+@router.post("/templates/{template_id}/generate", response_model=ScheduleBulkResponse)
+async def generate_schedules_from_template(
+    template_id: UUID,
+    request: ScheduleGenerateRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_admin),
+):
+    """Materialise a template over a date range in one transaction.
+
+    Day ``d`` gets template day ``(d - anchor_date) mod cycle_days``. Every user in
+    the template is re-checked against the current active users first; if any is no
+    longer valid nothing is written.
+    """
+    template = await _get_template_or_404(template_id, db)
+    from_date, to_date = map(
+        date_type.fromisoformat, _validate_schedule_range(request.from_date, request.to_date)
+    )
+    anchor = date_type.fromisoformat(
+        _validate_schedule_date(request.anchor_date) if request.anchor_date else request.from_date
+    )
+    span = (to_date - from_date).days
+
+    await _validate_template_days(template.days, db)
+
+    dates = [(from_date + timedelta(days=offset)) for offset in range(span + 1)]
+    skipped: set[str] = set()
+    if not request.overwrite:
+        skipped = set(
+            await db.scalars(
+                select(Schedule.date).where(
+                    Schedule.date >= from_date.isoformat(), Schedule.date <= to_date.isoformat()
+                )
+            )
+        )
+    shifts_by_date = {
+        day.isoformat(): template.days[(day - anchor).days % template.cycle_days]
+        for day in dates
+        if day.isoformat() not in skipped
+    }
+
+    results = await _write_schedule_batch(
+        db, shifts_by_date, current_user.full_name or current_user.email
+    )
+    results.extend(
+        ScheduleBulkResult(date=schedule_date, status="skipped") for schedule_date in skipped
+    )
+    return ScheduleBulkResponse(results=sorted(results, key=lambda result: result.date))
+
+
 @router.get("/{schedule_id}", response_model=ScheduleResponse)
 async def get_schedule(
     schedule_id: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user_record),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal),
 ):
     """Get a schedule by ID or date."""
     # Try UUID first
     try:
         uuid_id = UUID(schedule_id)
-        schedule = db.query(Schedule).filter(Schedule.id == uuid_id).first()
+        schedule = await db.get(Schedule, uuid_id)
     except ValueError:
         # Fallback to date string
         schedule_date = _validate_schedule_date(schedule_id)
-        schedule = db.query(Schedule).filter(Schedule.date == schedule_date).first()
+        schedule = await db.scalar(select(Schedule).where(Schedule.date == schedule_date))
 
     if not schedule:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Schedule not found")
 
-    _auto_migrate_schedule_rows([schedule], db)
     return schedule
 
 
 @router.delete("/{schedule_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_schedule(
     schedule_id: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_admin),
 ):
     """Delete a schedule by ID or date."""
     # Try UUID first
     try:
         uuid_id = UUID(schedule_id)
-        schedule = db.query(Schedule).filter(Schedule.id == uuid_id).first()
+        schedule = await db.get(Schedule, uuid_id)
     except ValueError:
         # Fallback to date string
         schedule_date = _validate_schedule_date(schedule_id)
-        schedule = db.query(Schedule).filter(Schedule.date == schedule_date).first()
+        schedule = await db.scalar(select(Schedule).where(Schedule.date == schedule_date))
 
     if not schedule:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Schedule not found")
 
     schedule_date = schedule.date
     schedule_id = schedule.id
-    db.delete(schedule)
-    db.commit()
+    await db.delete(schedule)
+    await db.commit()
@@ -1,7 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
+from app.core.etag import collection_etag, etag_matches, not_modified, set_etag
 from app.core.security import get_current_user
 from app.models import Setting
 from app.schemas import SettingCreate, SettingResponse, SettingUpdate
@@ -11,20 +13,30 @@ router = APIRouter(prefix="/api/settings", tags=["settings"])
 
 @router.get("", response_model=list[SettingResponse])
 async def list_settings(
-    db: Session = Depends(get_db), current_user: str = Depends(get_current_user)
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    current_user: str = Depends(get_current_user),
 ):
-    """Get all settings."""
-    return db.query(Setting).all()
+    """Get all settings. Responses carry an ETag; a matching ``If-None-Match`` gets 304."""
+    version = (await db.execute(select(func.count(), func.max(Setting.updated_at)))).one()
+    etag = collection_etag(request, "settings", *version)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    set_etag(response, etag)
+    result = await db.scalars(select(Setting))
+    return result.all()
 
 
 @router.get("/{key}", response_model=SettingResponse)
 async def get_setting(
     key: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: str = Depends(get_current_user),
 ):
     """Get a setting by key. Auto-creates with default value if not found."""
-    setting = db.query(Setting).filter(Setting.key == key).first()
+    setting = await db.scalar(select(Setting).where(Setting.key == key))
     if not setting:
         # Auto-create setting with default value for common keys
         defaults = {
@@ -34,8 +46,8 @@ async def get_setting(
         if key in defaults:
             setting = Setting(key=key, value=defaults[key])
             db.add(setting)
-            db.commit()
-            db.refresh(setting)
+            await db.commit()
+            await db.refresh(setting)
             return setting
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail=f"Setting '{key}' not found"
@@ -46,12 +58,12 @@ async def get_setting(
 @router.post("", response_model=SettingResponse, status_code=status.HTTP_201_CREATED)
 async def create_setting(
     setting_create: SettingCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: str = Depends(get_current_user),
 ):
     """Create a new setting."""
     # Check if setting already exists
-    existing = db.query(Setting).filter(Setting.key == setting_create.key).first()
+    existing = await db.scalar(select(Setting).where(Setting.key == setting_create.key))
     if existing:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -60,8 +72,8 @@ async def create_setting(
 
     new_setting = Setting(key=setting_create.key, value=setting_create.value)
     db.add(new_setting)
-    db.commit()
-    db.refresh(new_setting)
+    await db.commit()
+    await db.refresh(new_setting)
     return new_setting
 
 
@@ -69,34 +81,34 @@ async def create_setting(
 async def update_setting(
     key: str,
     setting_update: SettingUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: str = Depends(get_current_user),
 ):
     """Update a setting by key."""
-    setting = db.query(Setting).filter(Setting.key == key).first()
+    setting = await db.scalar(select(Setting).where(Setting.key == key))
     if not setting:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail=f"Setting '{key}' not found"
         )
 
     setting.value = setting_update.value
-    db.commit()
-    db.refresh(setting)
+    await db.commit()
+    await db.refresh(setting)
     return setting
 
 
 @router.delete("/{key}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_setting(
     key: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: str = Depends(get_current_user),
 ):
     """Delete a setting by key."""
-    setting = db.query(Setting).filter(Setting.key == key).first()
+    setting = await db.scalar(select(Setting).where(Setting.key == key))
     if not setting:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail=f"Setting '{key}' not found"
         )
 
-    db.delete(setting)
-    db.commit()
+    await db.delete(setting)
+    await db.commit()
@@ -1,12 +1,20 @@
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import func
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 
 from app.core.database import get_db
-from app.core.security import get_current_user, get_password_hash, require_admin, verify_password
-from app.models import Position, Schedule, User
+from app.core.etag import collection_etag, etag_matches, not_modified, set_etag
+from app.core.principals import Principal
+from app.core.security import (
+    get_current_user,
+    get_password_hash_async,
+    require_admin,
+    verify_password_async,
+)
+from app.models import Position, ScheduleAssignment, User
 from app.schemas import (
     AdminPasswordReset,
     PositionCreate,
@@ -20,13 +28,14 @@ router = APIRouter(prefix="/api/users", tags=["users"])
 DEFAULT_USER_COLOR = "#3498db"
 
 
-def _schedule_contains_user(schedule: Schedule, user_id: str) -> bool:
-    """Return true when a schedule JSON payload references a user ID."""
-    shifts = schedule.shifts if isinstance(schedule.shifts, dict) else {}
-    for entries in shifts.values():
-        if isinstance(entries, list) and user_id in {str(entry) for entry in entries}:
-            return True
-    return False
+async def _load_user_with_position(db: AsyncSession, user_id: UUID) -> User | None:
+    """Reload a user with its position eagerly loaded (required for serialization)."""
+    return await db.scalar(
+        select(User)
+        .options(joinedload(User.position))
+        .where(User.id == user_id)
+        .execution_options(populate_existing=True)
+    )
 
 
 def _user_to_response(user: User) -> dict:
@@ -49,16 +58,35 @@ def _user_to_response(user: User) -> dict:
 
 @router.get("", response_model=list[UserResponse])
 async def list_users(
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
     current_user: str = Depends(get_current_user),
 ):
-    """Get all active users (staff members)."""
-    users = (
-        db.query(User)
+    """Get all active users (staff members).
+
+    Responses carry an ETag; a matching ``If-None-Match`` gets 304.
+    """
+    # Position names are part of the response, so positions count towards the version
+    user_version = select(func.count(), func.max(User.updated_at)).where(
+        User.deleted_at.is_(None)
+    )
+    position_version = select(func.count(), func.max(Position.created_at))
+    etag = collection_etag(
+        request,
+        "users",
+        *(await db.execute(user_version)).one(),
+        *(await db.execute(position_version)).one(),
+    )
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    set_etag(response, etag)
+    users = await db.scalars(
+        select(User)
         .options(joinedload(User.position))
-        .filter(User.deleted_at.is_(None))
+        .where(User.deleted_at.is_(None))
         .order_by(User.full_name)
-        .all()
     )
     return [_user_to_response(u) for u in users]
 
@@ -66,12 +94,12 @@ async def list_users(
 @router.post("", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def create_user(
     user_create: UserCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_admin),
 ):
     """Create a new user (staff member) - admin only."""
     # Check if email already exists
-    existing_user = db.query(User).filter(User.email == user_create.email).first()
+    existing_user = await db.scalar(select(User).where(User.email == user_create.email))
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -83,7 +111,7 @@ async def create_user(
 
     new_user = User(
         email=user_create.email,
-        hashed_password=get_password_hash(user_create.password),
+        hashed_password=await get_password_hash_async(user_create.password),
         full_name=display_name,
         color=user_create.color or DEFAULT_USER_COLOR,
         theme=user_create.theme or "light",
@@ -92,15 +120,9 @@ async def create_user(
         position_id=user_create.position_id,
     )
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
     # reload with position for response
-    user = (
-        db.query(User)
-        .options(joinedload(User.position))
-        .filter(User.id == new_user.id)
-        .first()
-    )
+    user = await _load_user_with_position(db, new_user.id)
     return _user_to_response(user)
 
 
@@ -109,52 +131,54 @@ async def create_user(
 
 @router.get("/positions", response_model=list[PositionResponse])
 async def list_positions(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: str = Depends(get_current_user),
 ):
     """List all available staff positions (any logged in user)."""
-    positions = db.query(Position).order_by(Position.name).all()
-    return positions
+    positions = await db.scalars(select(Position).order_by(Position.name))
+    return positions.all()
 
 
 @router.post("/positions", response_model=PositionResponse, status_code=status.HTTP_201_CREATED)
 async def create_position(
     position_create: PositionCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_admin),
 ):
     """Create a new staff position (admin only)."""
     name = position_create.name.strip()
     if not name:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Position name is required")
 
-    existing = db.query(Position).filter(Position.name.ilike(name)).first()
+    existing = await db.scalar(select(Position).where(Position.name.ilike(name)))
     if existing:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Position already exists")
 
     new_pos = Position(name=name)
     db.add(new_pos)
-    db.commit()
-    db.refresh(new_pos)
+    await db.commit()
+    await db.refresh(new_pos)
     return new_pos
 
 
 @router.delete("/positions/{pos_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_position(
     pos_id: UUID,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_admin),
 ):
     """Delete a position (admin). Any users using it will have it cleared."""
-    pos = db.query(Position).filter(Position.id == pos_id).first()
+    pos = await db.get(Position, pos_id)
     if not pos:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Position not found")
 
-    # Clear references
-    db.query(User).filter(User.position_id == pos_id).update({"position_id": None})
+    # Clear references through the ORM so the User update hooks evict cached
+    # principals and publish change events for every affected user
+    for user in await db.scalars(select(User).where(User.position_id == pos_id)):
+        user.position_id = None  # type: ignore[assignment]
 
-    db.delete(pos)
-    db.commit()
+    await db.delete(pos)
+    await db.commit()
     return None
 
 
@@ -164,30 +188,46 @@ async def delete_position(
 @router.get("/{user_id}", response_model=UserResponse)
 async def get_user(
     user_id: UUID,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     """Get a user by ID."""
-    user = (
-        db.query(User)
+    user = await db.scalar(
+        select(User)
         .options(joinedload(User.position))
-        .filter(User.id == user_id, User.deleted_at.is_(None))
-        .first()
+        .where(User.id == user_id, User.deleted_at.is_(None))
     )
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     return _user_to_response(user)
 
 
+@router.get("/{user_id}/schedule-dates", response_model=list[str])
+async def list_user_schedule_dates(
+    user_id: UUID,
+    from_date: str | None = Query(None, pattern=r"^\d{4}-\d{2}-\d{2}$"),
+    to_date: str | None = Query(None, pattern=r"^\d{4}-\d{2}-\d{2}$"),
+    db: AsyncSession = Depends(get_db),
+    current_user: str = Depends(get_current_user),
+):
+    """Dates (YYYY-MM-DD, ascending) on which a user is assigned to any shift."""
+    query = select(ScheduleAssignment.schedule_date).where(ScheduleAssignment.user_id == user_id)
+    if from_date:
+        query = query.where(ScheduleAssignment.schedule_date >= from_date)
+    if to_date:
+        query = query.where(ScheduleAssignment.schedule_date <= to_date)
+    return list(await db.scalars(query.distinct().order_by(ScheduleAssignment.schedule_date)))
+
+
 @router.put("/{user_id}", response_model=UserResponse)
 async def update_user(
     user_id: UUID,
     user_update: UserUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_admin),
 ):
     """Update a user (staff member) - admin only."""
-    user = db.query(User).filter(User.id == user_id, User.deleted_at.is_(None)).first()
+    user = await db.scalar(select(User).where(User.id == user_id, User.deleted_at.is_(None)))
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
 
@@ -207,14 +247,8 @@ async def update_user(
     if "position_id" in update_data:
         user.position_id = update_data["position_id"]
 
-    db.commit()
-    db.refresh(user)
-    user = (
-        db.query(User)
-        .options(joinedload(User.position))
-        .filter(User.id == user.id)
-        .first()
-    )
+    await db.commit()
+    user = await _load_user_with_position(db, user.id)
     return _user_to_response(user)
 
 
@@ -222,46 +256,49 @@ async def update_user(
 async def reset_user_password(
     user_id: UUID,
     reset: AdminPasswordReset,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_admin),
 ):
     """Reset another user's password (admin only)."""
-    user = db.query(User).filter(User.id == user_id, User.deleted_at.is_(None)).first()
+    user = await db.scalar(select(User).where(User.id == user_id, User.deleted_at.is_(None)))
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
 
-    if verify_password(reset.new_password, user.hashed_password):
+    if await verify_password_async(reset.new_password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="New password cannot be the same as the current password",
         )
 
-    user.hashed_password = get_password_hash(reset.new_password)
-    db.commit()
+    user.hashed_password = await get_password_hash_async(reset.new_password)
+    await db.commit()
     return {"detail": "Password reset successfully"}
 
 
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_user(
     user_id: UUID,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_admin),
 ):
     """Soft delete a user (staff member) - admin only.
 
     The user is marked as deleted but remains in the database for historical records.
     """
-    user = db.query(User).filter(User.id == user_id, User.deleted_at.is_(None)).first()
+    user = await db.scalar(select(User).where(User.id == user_id, User.deleted_at.is_(None)))
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
 
-    assigned_dates = [
-        schedule.date
-        for schedule in db.query(Schedule).all()
-        if _schedule_contains_user(schedule, str(user_id))
-    ]
+    assigned_dates = list(
+        await db.scalars(
+            select(ScheduleAssignment.schedule_date)
+            .where(ScheduleAssignment.user_id == user_id)
+            .distinct()
+            .order_by(ScheduleAssignment.schedule_date)
+        )
+    )
     if assigned_dates:
-        preview_dates = ", ".join(sorted(assigned_dates)[:5])
+        preview_dates = ", ".join(assigned_dates[:5])
         more_count = len(assigned_dates) - 5
         suffix = f" and {more_count} more" if more_count > 0 else ""
         raise HTTPException(
@@ -273,10 +310,10 @@ async def delete_user(
         )
 
     # Soft delete - mark as deleted
-    user.deleted_at = db.query(func.now()).scalar()
+    user.deleted_at = await db.scalar(select(func.now()))
     user.is_active = False
     user_id = user.id
-    db.commit()
+    await db.commit()
     return None
 
 
@@ -130,6 +130,100 @@ class ScheduleResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class ScheduleBulkUpsert(BaseModel):
+    schedules: list[ScheduleCreate] = Field(min_length=1, max_length=366)
+
+
+class ShiftAssignmentError(BaseModel):
+    """One invalid entry of a shift payload."""
+
+    shift: str | None = None
+    user_id: str | None = None
+    code: str  # e.g. invalid_shift, duplicate_across_shifts, user_not_found, user_deleted
+    message: str
+
+
+class ScheduleBulkResult(BaseModel):
+    date: str
+    status: str  # created, updated, skipped or error
+    id: UUID | None = None
+    errors: list[ShiftAssignmentError] = Field(default_factory=list)
+
+
+class ScheduleBulkResponse(BaseModel):
+    results: list[ScheduleBulkResult]
+
+
+class ScheduleTemplateCreate(BaseModel):
+    name: str = Field(min_length=1, max_length=100)
+    days: list[ShiftAssignment] = Field(min_length=1, max_length=56)  # One entry per cycle day
+
+
+class ScheduleTemplateUpdate(BaseModel):
+    name: str | None = Field(default=None, min_length=1, max_length=100)
+    days: list[ShiftAssignment] | None = Field(default=None, min_length=1, max_length=56)
+
+
+class ScheduleTemplateResponse(BaseModel):
+    id: UUID
+    name: str
+    cycle_days: int
+    days: list[dict]
+    edited_by: str | None = None
+    created_at: datetime
+    updated_at: datetime
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ScheduleGenerateRequest(BaseModel):
+    from_date: str = Field(pattern=r"^\d{4}-\d{2}-\d{2}$")
+    to_date: str = Field(pattern=r"^\d{4}-\d{2}-\d{2}$")
+    anchor_date: str | None = Field(
+        default=None, pattern=r"^\d{4}-\d{2}-\d{2}$"
+    )  # Date that maps to template day 0 (defaults to from_date)
+    overwrite: bool = True  # False keeps existing days and reports them as skipped
+
+
+class ScheduleAnalyticsUser(BaseModel):
+    user_id: UUID
+    full_name: str | None = None  # None when the user no longer exists
+    shifts: dict[str, int]  # Shift key -> number of shifts worked
+    total: int
+    hours: float
+    weeks: dict[str, float]  # ISO week (YYYY-Www) -> hours worked
+
+
+class ScheduleUnderstaffedShift(BaseModel):
+    date: str
+    shift: str
+    staffed: int
+    required: int
+
+
+class ScheduleRestViolation(BaseModel):
+    user_id: UUID
+    full_name: str | None = None
+    night_date: str  # Date of the C shift
+    morning_date: str  # Following date with an A shift
+
+
+class ScheduleAnalyticsResponse(BaseModel):
+    from_date: str
+    to_date: str
+    min_staff: int
+    users: list[ScheduleAnalyticsUser]
+    understaffed: list[ScheduleUnderstaffedShift]
+    rest_violations: list[ScheduleRestViolation]
+
+
+class ScheduleRosterResponse(BaseModel):
+    from_date: str
+    to_date: str
+    shifts: list[str]  # Shift key for each position of a day's array
+    users: list[str]  # Index -> user ID
+    days: dict[str, list[list[int]]]  # {date: [[user indexes] per shift]}, empty days omitted
+
+
 # ============ Attachment Schemas ============
 
 
@@ -200,6 +294,7 @@ class HandoverResponse(BaseModel):
     shift: str | None = None
     due_date: str | None = None
     due_time: str | None = None
+    due_at: datetime | None = None
     edited_at: datetime | None = None
     edited_by: str | None = None
     created_at: datetime
@@ -207,6 +302,17 @@ class HandoverResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class HandoverSearchHit(HandoverResponse):
+    rank: float
+
+
+class HandoverSearchPage(BaseModel):
+    items: list[HandoverSearchHit]
+    limit: int
+    offset: int
+    next_offset: int | None = None
+
+
 # ============ Setting Schemas ============
 
 
@@ -238,4 +344,45 @@ class PresignedUrlRequest(BaseModel):
 
 class PresignedUrlResponse(BaseModel):
     url: str
-    fields: dict  # For form-based uploads
\ No newline at end of file
+    fields: dict  # For form-based uploads
+
+
+# ============ Background Job Schemas ============
+
+
+class JobResponse(BaseModel):
+    id: UUID
+    kind: str
+    status: str
+    params: dict
+    progress: dict
+    result: dict | None = None
+    error: str | None = None
+    created_by: str | None = None
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    model_config = ConfigDict(from_attributes=True)
+
+
+class SchedulerLeaderStatus(BaseModel):
+    worker: str | None = None
+    renewed_at: datetime | None = None
+    active: bool  # Lease renewed within SCHEDULER_LEASE_TIMEOUT_SECONDS
+
+
+class SchedulerTaskStatus(BaseModel):
+    name: str
+    interval_seconds: int
+    last_started_at: datetime | None = None
+    last_finished_at: datetime | None = None
+    last_status: str | None = None
+    last_message: str | None = None
+    next_run_at: datetime | None = None
+
+
+class SchedulerStatusResponse(BaseModel):
+    worker: str  # Worker that answered the request
+    is_leader: bool
+    leader: SchedulerLeaderStatus | None = None
+    tasks: list[SchedulerTaskStatus]
@@ -0,0 +1,27 @@
+"""add normalized_version marker to schedules
+
+Revision ID: a9b8c7d6e5f4
+Revises: b8a7c6d5e4f3
+Create Date: 2026-10-17
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "a9b8c7d6e5f4"
+down_revision = "b8a7c6d5e4f3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing rows start at 0 and are picked up by app.core.schedule_normalization
+    op.add_column(
+        "schedules",
+        sa.Column("normalized_version", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("schedules", "normalized_version")
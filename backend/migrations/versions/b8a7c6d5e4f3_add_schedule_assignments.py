@@ -0,0 +1,106 @@
+"""add schedule_assignments table indexed by user and date
+
+Revision ID: b8a7c6d5e4f3
+Revises: c3b2a1f0e9d8
+Create Date: 2026-10-17
+"""
+
+import uuid
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "b8a7c6d5e4f3"
+down_revision = "c3b2a1f0e9d8"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 500
+
+schedules_table = sa.table(
+    "schedules",
+    sa.column("id", postgresql.UUID(as_uuid=True)),
+    sa.column("date", sa.String(length=10)),
+    sa.column("shifts", postgresql.JSON),
+)
+
+
+def _assignment_rows(schedule_id, schedule_date: str, shifts) -> list[dict]:
+    rows = []
+    seen: set[uuid.UUID] = set()
+    raw_shifts = shifts if isinstance(shifts, dict) else {}
+    for shift, entries in raw_shifts.items():
+        if not isinstance(entries, list):
+            continue
+        for slot, entry in enumerate(entries):
+            try:
+                user_id = uuid.UUID(str(entry))
+            except ValueError:
+                # Unresolved legacy name
+                continue
+            if user_id in seen:
+                continue
+            seen.add(user_id)
+            rows.append(
+                {
+                    "id": uuid.uuid4(),
+                    "schedule_id": schedule_id,
+                    "schedule_date": schedule_date,
+                    "shift": shift,
+                    "user_id": user_id,
+                    "slot": slot,
+                }
+            )
+    return rows
+
+
+def upgrade() -> None:
+    assignments_table = op.create_table(
+        "schedule_assignments",
+        sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("schedule_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("schedule_date", sa.String(length=10), nullable=False),
+        sa.Column("shift", sa.String(length=1), nullable=False),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("slot", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["schedule_id"], ["schedules.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+    # Backfill before indexing so the bulk insert is not slowed by index maintenance
+    bind = op.get_bind()
+    pending: list[dict] = []
+    for schedule_id, schedule_date, shifts in bind.execute(
+        sa.select(schedules_table.c.id, schedules_table.c.date, schedules_table.c.shifts)
+    ):
+        pending.extend(_assignment_rows(schedule_id, schedule_date, shifts))
+        if len(pending) >= BATCH_SIZE:
+            op.bulk_insert(assignments_table, pending)
+            pending = []
+    if pending:
+        op.bulk_insert(assignments_table, pending)
+
+    op.create_index(
+        "idx_schedule_assignment_user_date",
+        "schedule_assignments",
+        ["user_id", "schedule_date"],
+    )
+    op.create_index(
+        "idx_schedule_assignment_date_shift",
+        "schedule_assignments",
+        ["schedule_date", "shift"],
+    )
+    op.create_index(
+        "idx_schedule_assignment_schedule",
+        "schedule_assignments",
+        ["schedule_id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_schedule_assignment_schedule", table_name="schedule_assignments")
+    op.drop_index("idx_schedule_assignment_date_shift", table_name="schedule_assignments")
+    op.drop_index("idx_schedule_assignment_user_date", table_name="schedule_assignments")
+    op.drop_table("schedule_assignments")
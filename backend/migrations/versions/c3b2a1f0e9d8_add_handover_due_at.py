@@ -0,0 +1,86 @@
+"""add due_at column and open-items partial index to handovers
+
+Revision ID: c3b2a1f0e9d8
+Revises: d7c6b5a4e3f2
+Create Date: 2026-10-17
+"""
+
+from datetime import datetime
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c3b2a1f0e9d8"
+down_revision = "d7c6b5a4e3f2"
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 1000
+
+handovers_table = sa.table(
+    "handovers",
+    sa.column("id", sa.Uuid()),
+    sa.column("due_date", sa.String()),
+    sa.column("due_time", sa.String()),
+    sa.column("due_at", sa.DateTime()),
+)
+
+
+def _due_at(due_date: str | None, due_time: str | None) -> datetime | None:
+    # Same rules as app.models.handover_due_at: None if missing or malformed
+    if not due_date:
+        return None
+    try:
+        return datetime.strptime(f"{due_date} {due_time or '00:00'}", "%Y-%m-%d %H:%M")
+    except ValueError:
+        return None
+
+
+def upgrade() -> None:
+    op.add_column("handovers", sa.Column("due_at", sa.DateTime(timezone=False), nullable=True))
+
+    # Backfill from the string fields, parsed in Python like the app does: the
+    # fields were never validated, so values such as 2026-02-30 or 25:99 exist and
+    # must become NULL instead of failing a SQL cast (and the whole upgrade)
+    bind = op.get_bind()
+    last_id = None
+    while True:
+        query = (
+            sa.select(handovers_table.c.id, handovers_table.c.due_date, handovers_table.c.due_time)
+            .where(handovers_table.c.due_date.is_not(None))
+            .order_by(handovers_table.c.id)
+            .limit(BACKFILL_BATCH_SIZE)
+        )
+        if last_id is not None:
+            query = query.where(handovers_table.c.id > last_id)
+        rows = bind.execute(query).all()
+        if not rows:
+            break
+        updates = [
+            {"row_id": row.id, "value": due_at}
+            for row in rows
+            if (due_at := _due_at(row.due_date, row.due_time)) is not None
+        ]
+        if updates:
+            bind.execute(
+                sa.update(handovers_table)
+                .where(handovers_table.c.id == sa.bindparam("row_id"))
+                .values(due_at=sa.bindparam("value")),
+                updates,
+            )
+        last_id = rows[-1].id
+
+    op.create_index(
+        "idx_handover_open_due",
+        "handovers",
+        ["due_at", "id"],
+        postgresql_where=sa.text(
+            "deleted_at IS NULL AND completed IS false AND (followup IS true OR promised IS true)"
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_handover_open_due", table_name="handovers")
+    op.drop_column("handovers", "due_at")
@@ -0,0 +1,43 @@
+"""add jobs table for background backup/restore jobs
+
+Revision ID: d1e2f3a4b5c6
+Revises: f0e1d2c3b4a5
+Create Date: 2026-10-17
+"""
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "d1e2f3a4b5c6"
+down_revision = "f0e1d2c3b4a5"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "jobs",
+        sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("kind", sa.String(length=20), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("params", sa.JSON(), nullable=False),
+        sa.Column("progress", sa.JSON(), nullable=False),
+        sa.Column("result", sa.JSON(), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("created_by", sa.String(length=255), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("heartbeat_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("idx_job_status_created", "jobs", ["status", "created_at"])
+    op.create_index("idx_job_kind_created", "jobs", ["kind", "created_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("idx_job_kind_created", table_name="jobs")
+    op.drop_index("idx_job_status_created", table_name="jobs")
+    op.drop_table("jobs")
@@ -0,0 +1,50 @@
+"""add generated search_vector column and GIN index to handovers
+
+Revision ID: d7c6b5a4e3f2
+Revises: e1a2b3c4d5f6
+Create Date: 2026-10-17
+"""
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "d7c6b5a4e3f2"
+down_revision = "e1a2b3c4d5f6"
+branch_labels = None
+depends_on = None
+
+# Kept in sync with app.models.HANDOVER_SEARCH_EXPRESSION (copied so the migration
+# does not change if the model does)
+SEARCH_EXPRESSION = (
+    "setweight(to_tsvector('simple'::regconfig, coalesce(room, '')), 'A') || "
+    "setweight(to_tsvector('simple'::regconfig, coalesce(guest_name, '')), 'A') || "
+    "setweight(to_tsvector('simple'::regconfig, coalesce(category, '')), 'B') || "
+    "setweight(to_tsvector('english'::regconfig, coalesce(text, '')), 'C') || "
+    "setweight(to_tsvector('english'::regconfig, coalesce(promise_text, '')), 'C')"
+)
+
+
+def upgrade() -> None:
+    # STORED generated column: Postgres computes it on write, existing rows are backfilled
+    op.add_column(
+        "handovers",
+        sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR(),
+            sa.Computed(SEARCH_EXPRESSION, persisted=True),
+            nullable=True,
+        ),
+    )
+    op.create_index(
+        "idx_handover_search",
+        "handovers",
+        ["search_vector"],
+        postgresql_using="gin",
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_handover_search", table_name="handovers")
+    op.drop_column("handovers", "search_vector")
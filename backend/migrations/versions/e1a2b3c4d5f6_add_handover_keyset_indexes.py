@@ -0,0 +1,36 @@
+"""add partial indexes for handover keyset pagination
+
+Revision ID: e1a2b3c4d5f6
+Revises: f2e1d0c9b8a7
+Create Date: 2026-10-17
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "e1a2b3c4d5f6"
+down_revision = "f2e1d0c9b8a7"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Live (non-deleted) notes ordered by (timestamp, id), globally and per date
+    op.create_index(
+        "idx_handover_active_timestamp",
+        "handovers",
+        ["timestamp", "id"],
+        postgresql_where=sa.text("deleted_at IS NULL"),
+    )
+    op.create_index(
+        "idx_handover_active_date_timestamp",
+        "handovers",
+        ["date", "timestamp", "id"],
+        postgresql_where=sa.text("deleted_at IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_handover_active_date_timestamp", table_name="handovers")
+    op.drop_index("idx_handover_active_timestamp", table_name="handovers")
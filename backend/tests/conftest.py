@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import hashlib
 import io
 import sys
 import types
@@ -7,12 +8,15 @@ from datetime import UTC, datetime
 
 import boto3
 import pytest
+from botocore.exceptions import ClientError
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import Computed, create_engine
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool
 
 
 @compiles(PG_UUID, "sqlite")
@@ -20,9 +24,33 @@ def _compile_uuid_sqlite(_type, _compiler, **_kw):
     return "CHAR(36)"
 
 
+@compiles(TSVECTOR, "sqlite")
+def _compile_tsvector_sqlite(_type, _compiler, **_kw):
+    return "TEXT"
+
+
+@compiles(Computed, "sqlite")
+def _compile_computed_sqlite(_computed, _compiler, **_kw):
+    # Postgres-only generation expressions (e.g. to_tsvector) do not exist in SQLite
+    return "GENERATED ALWAYS AS (NULL) VIRTUAL"
+
+
+def _client_error(code: str, http_status: int, headers: dict | None = None) -> ClientError:
+    return ClientError(
+        {
+            "Error": {"Code": code, "Message": code},
+            "ResponseMetadata": {"HTTPStatusCode": http_status, "HTTPHeaders": headers or {}},
+        },
+        "GetObject",
+    )
+
+
 class FakeS3Client:
     def __init__(self):
         self.objects: dict[str, dict] = {}
+        self.multipart_uploads: dict[str, dict] = {}
+        self.aborted_uploads: list[str] = []
+        self.presigned_count = 0
 
     def head_bucket(self, Bucket):
         return {"Bucket": Bucket}
@@ -40,23 +68,92 @@ class FakeS3Client:
         }
         return {"ETag": "fake"}
 
-    def get_object(self, Bucket, Key):
+    def create_multipart_upload(self, Bucket, Key, ContentType=None, Metadata=None):
+        upload_id = f"upload-{len(self.multipart_uploads) + 1}"
+        self.multipart_uploads[upload_id] = {
+            "Key": Key,
+            "ContentType": ContentType,
+            "Metadata": Metadata,
+            "Parts": {},
+        }
+        return {"UploadId": upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        self.multipart_uploads[UploadId]["Parts"][PartNumber] = bytes(Body)
+        return {"ETag": f"part-{PartNumber}"}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        upload = self.multipart_uploads.pop(UploadId)
+        body = b"".join(upload["Parts"][part["PartNumber"]] for part in MultipartUpload["Parts"])
+        return self.put_object(Bucket, Key, body, upload["ContentType"], upload["Metadata"])
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.multipart_uploads.pop(UploadId, None)
+        self.aborted_uploads.append(Key)
+
+    def head_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise _client_error("404", 404)
         obj = self.objects[Key]
-        return {"Body": io.BytesIO(obj["Body"])}
+        return {
+            "ContentType": obj["ContentType"],
+            "ContentLength": len(obj["Body"]),
+            "LastModified": obj["LastModified"],
+        }
 
-    def list_objects_v2(self, Bucket, MaxKeys=None):
+    def get_object(self, Bucket, Key, Range=None, IfMatch=None, IfNoneMatch=None, **_kwargs):
+        if Key not in self.objects:
+            raise _client_error("NoSuchKey", 404)
+        obj = self.objects[Key]
+        body = obj["Body"]
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+        if IfMatch and IfMatch != etag:
+            raise _client_error("PreconditionFailed", 412)
+        if IfNoneMatch and etag in IfNoneMatch:
+            raise _client_error("304", 304, {"etag": etag})
+        response = {
+            "ContentType": obj["ContentType"],
+            "ETag": etag,
+            "LastModified": obj["LastModified"],
+        }
+        if Range:
+            first, _, last = Range.removeprefix("bytes=").partition("-")
+            start = len(body) - int(last) if not first else int(first)
+            end = min(int(last), len(body) - 1) if first and last else len(body) - 1
+            if start >= len(body):
+                raise _client_error("InvalidRange", 416)
+            response["ContentRange"] = f"bytes {start}-{end}/{len(body)}"
+            body = body[start : end + 1]
+        return response | {"Body": io.BytesIO(body), "ContentLength": len(body)}
+
+    def list_objects_v2(self, Bucket, Prefix="", MaxKeys=1000, ContinuationToken=None):
+        # Like S3: keys in lexicographic order, at most MaxKeys per page
+        keys = sorted(
+            key
+            for key, value in self.objects.items()
+            if value["Bucket"] == Bucket
+            and key.startswith(Prefix)
+            and (ContinuationToken is None or key > ContinuationToken)
+        )
+        page = keys[:MaxKeys]
         contents = [
             {
                 "Key": key,
-                "Size": len(value["Body"]),
-                "LastModified": value["LastModified"],
+                "Size": len(self.objects[key]["Body"]),
+                "LastModified": self.objects[key]["LastModified"],
             }
-            for key, value in self.objects.items()
-            if value["Bucket"] == Bucket
+            for key in page
         ]
-        if MaxKeys is not None:
-            contents = contents[:MaxKeys]
-        return {"Contents": contents} if contents else {}
+        response: dict = {"IsTruncated": len(keys) > MaxKeys}
+        if contents:
+            response["Contents"] = contents
+        if response["IsTruncated"]:
+            response["NextContinuationToken"] = page[-1]
+        return response
+
+    def generate_presigned_url(self, ClientMethod, Params, ExpiresIn):
+        self.presigned_count += 1
+        return f"https://minio.test/{Params['Bucket']}/{Params['Key']}?sig={self.presigned_count}"
 
     def delete_object(self, Bucket, Key):
         self.objects.pop(Key, None)
@@ -64,12 +161,14 @@ class FakeS3Client:
 
 
 @pytest.fixture
-def app(monkeypatch):
+def app(monkeypatch, tmp_path):
     fake_s3_client = FakeS3Client()
     monkeypatch.setattr(boto3, "client", lambda *args, **kwargs: fake_s3_client)
 
     fake_magic_module = types.SimpleNamespace(
-        Magic=lambda mime=True: types.SimpleNamespace(from_buffer=lambda _content: "application/pdf")
+        Magic=lambda mime=True: types.SimpleNamespace(
+            from_buffer=lambda _content: "application/pdf"
+        )
     )
     monkeypatch.setitem(sys.modules, "magic", fake_magic_module)
     monkeypatch.setitem(sys.modules, "python_magic_bin", fake_magic_module)
@@ -87,26 +186,40 @@ def app(monkeypatch):
     monkeypatch.setattr(rate_limit.auth_rate_limiter, "check_rate_limit", _allow)
     monkeypatch.setattr(rate_limit.upload_rate_limiter, "check_rate_limit", _allow)
 
-    from app.main import app as fastapi_app, backup_scheduler
+    from app.main import app as fastapi_app, backup_scheduler, job_runner, pg_listener
     from app.core.database import Base, get_db
+    from app.core.principals import principal_cache
+    from app.core.revocation import revocation_cache
+    from app.core.roster_cache import roster_cache
+    from app.routers.files import presigned_url_cache
 
     monkeypatch.setattr(backup_scheduler, "start", _noop_async)
     monkeypatch.setattr(backup_scheduler, "stop", _noop_async)
-
+    monkeypatch.setattr(pg_listener, "start", _noop_async)
+    monkeypatch.setattr(pg_listener, "stop", _noop_async)
+    monkeypatch.setattr(job_runner, "start", _noop_async)
+    monkeypatch.setattr(job_runner, "stop", _noop_async)
+    revocation_cache.invalidate()
+    principal_cache.clear()
+    roster_cache.clear()
+    presigned_url_cache.clear()
+
+    # File-backed so the sync fixture session and the async app session share data
+    database_path = tmp_path / "test.db"
     engine = create_engine(
-        "sqlite://",
+        f"sqlite:///{database_path}",
         connect_args={"check_same_thread": False},
-        poolclass=StaticPool,
     )
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{database_path}", poolclass=NullPool)
     TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    TestingAsyncSessionLocal = async_sessionmaker(
+        bind=async_engine, autoflush=False, expire_on_commit=False
+    )
     Base.metadata.create_all(bind=engine)
 
-    def override_get_db():
-        db = TestingSessionLocal()
-        try:
+    async def override_get_db():
+        async with TestingAsyncSessionLocal() as db:
             yield db
-        finally:
-            db.close()
 
     fastapi_app.dependency_overrides[get_db] = override_get_db
     fastapi_app.state.testing_session_factory = TestingSessionLocal
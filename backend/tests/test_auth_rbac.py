@@ -196,3 +196,52 @@ def test_staff_can_create_and_soft_delete_handovers(client):
     list_after_delete = client.get("/api/handovers?date=2026-05-09", headers=staff_headers)
     assert list_after_delete.status_code == 200, list_after_delete.text
     assert list_after_delete.json() == []
+
+
+def test_deactivated_user_is_rejected_despite_cached_principal(client):
+    _, admin_headers = bootstrap_admin(client)
+    staff = create_staff_account(client, admin_headers)
+    staff_headers = login_headers(client, "staff@example.com", "SecurePass123!")
+
+    # Prime the principal cache for the staff member
+    assert client.get("/api/handovers", headers=staff_headers).status_code == 200
+
+    deactivate_response = client.put(
+        f"/api/users/{staff['id']}",
+        json={"is_active": False},
+        headers=admin_headers,
+    )
+    assert deactivate_response.status_code == 200, deactivate_response.text
+
+    response = client.get("/api/handovers", headers=staff_headers)
+    assert response.status_code == 401, response.text
+    assert response.json()["detail"] == "User no longer active"
+
+
+def test_deleting_position_refreshes_cached_principals(client):
+    from app.core.principals import principal_cache
+
+    _, admin_headers = bootstrap_admin(client)
+    staff = create_staff_account(client, admin_headers)
+    position = client.post(
+        "/api/users/positions", json={"name": "Receptionist"}, headers=admin_headers
+    ).json()
+    assign_response = client.put(
+        f"/api/users/{staff['id']}",
+        json={"position_id": position["id"]},
+        headers=admin_headers,
+    )
+    assert assign_response.status_code == 200, assign_response.text
+
+    # Prime the principal cache for the staff member
+    staff_headers = login_headers(client, "staff@example.com", "SecurePass123!")
+    assert client.get("/api/handovers", headers=staff_headers).status_code == 200
+    assert str(principal_cache.get(staff["id"]).position_id) == position["id"]
+
+    delete_response = client.delete(f"/api/users/positions/{position['id']}", headers=admin_headers)
+    assert delete_response.status_code == 204, delete_response.text
+
+    cached = principal_cache.get(staff["id"])
+    assert cached is None or cached.position_id is None
+    staff_record = client.get(f"/api/users/{staff['id']}", headers=admin_headers).json()
+    assert staff_record["position_id"] is None
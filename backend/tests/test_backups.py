@@ -0,0 +1,487 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import subprocess
+from datetime import UTC, datetime, timedelta
+from uuid import uuid4
+
+import pytest
+
+from app.core import backup, jobs
+from app.core.notifications import pg_listener
+from app.core.scheduler import BackupScheduler
+from app.core.security import get_password_hash
+from app.models import (
+    Handover,
+    Job,
+    Schedule,
+    ScheduleAssignment,
+    ScheduleTemplate,
+    Setting,
+    User,
+)
+
+
+class FakeProcess:
+    def __init__(self, cmd, output: bytes = b"", returncode: int = 0, **kwargs):
+        self.cmd = cmd
+        self.stdout = io.BytesIO(output)
+        self.stdin = None
+        self.returncode = returncode
+
+    def wait(self):
+        return self.returncode
+
+    def kill(self):
+        pass
+
+
+@pytest.fixture
+def manager(app, monkeypatch):
+    monkeypatch.setattr(backup, "BACKUP_PART_SIZE", 1024)
+    manager = backup.BackupManager()
+    manager.engine = app.state.testing_session_factory.kw["bind"]
+    return manager
+
+
+@pytest.fixture
+def runner(app, manager, monkeypatch):
+    monkeypatch.setattr(jobs, "backup_manager", manager)
+    return jobs.JobRunner(session_factory=app.state.testing_session_factory)
+
+
+def admin_headers(client, db_session) -> dict[str, str]:
+    db_session.add(
+        User(
+            email="admin@example.com",
+            hashed_password=get_password_hash("SecurePass123!"),
+            full_name="Admin",
+            color="#3498db",
+            theme="light",
+            is_active=True,
+            is_admin=True,
+        )
+    )
+    db_session.commit()
+    response = client.post(
+        "/api/auth/login", json={"email": "admin@example.com", "password": "SecurePass123!"}
+    )
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def test_create_backup_streams_custom_format_dump(manager, monkeypatch):
+    dump = bytes(range(256)) * 10  # 2560 bytes: three parts
+    commands = []
+
+    def popen(cmd, **kwargs):
+        commands.append(cmd)
+        return FakeProcess(cmd, dump)
+
+    monkeypatch.setattr(backup.subprocess, "Popen", popen)
+
+    filename = manager.create_backup("manual")
+    assert filename.startswith("backup_manual_") and filename.endswith(".dump")
+    assert "--format=custom" in commands[0]
+    assert "--exclude-table-data=jobs" in commands[0]
+    assert "--exclude-table-data=scheduler_state" in commands[0]
+    assert manager.s3_client.objects[filename]["Body"] == dump
+
+    manifest = manager.read_manifest(filename)
+    assert manifest["size"] == len(dump)
+    assert manifest["sha256"] == hashlib.sha256(dump).hexdigest()
+    assert [b["filename"] for b in manager.list_backups()] == [filename]
+
+
+def test_failed_dump_leaves_no_backup(manager, monkeypatch):
+    monkeypatch.setattr(
+        backup.subprocess, "Popen", lambda cmd, **kwargs: FakeProcess(cmd, b"partial", 1)
+    )
+
+    assert manager.create_backup("manual") is None
+    assert manager.list_backups() == []
+
+
+def test_dry_run_restore_verifies_archive_in_scratch_database(manager, monkeypatch):
+    dump = b"PGDMP" + bytes(2000)
+    monkeypatch.setattr(backup.subprocess, "Popen", lambda cmd, **kwargs: FakeProcess(cmd, dump))
+    filename = manager.create_backup("manual")
+
+    commands = []
+
+    def run(cmd, **kwargs):
+        commands.append(cmd)
+        output = b"; header\n1; TABLE a\n2; TABLE DATA a\n" if "-l" in cmd else b"3\n"
+        return subprocess.CompletedProcess(cmd, 0, output, b"")
+
+    def popen(cmd, **kwargs):
+        commands.append(cmd)
+        process = FakeProcess(cmd)
+        process.stderr = io.BytesIO(
+            b"pg_restore: creating TABLE public.a\npg_restore: processing data for table public.a\n"
+        )
+        return process
+
+    monkeypatch.setattr(backup.subprocess, "run", run)
+    monkeypatch.setattr(backup.subprocess, "Popen", popen)
+
+    assert manager.restore_backup(filename, dry_run=True) is True
+    progress = manager.restore_progress
+    assert progress["status"] == "completed"
+    assert progress["bytes_done"] == len(dump)
+    assert (progress["items_done"], progress["items_total"]) == (2, 2)
+    assert progress["tables"] == 3
+
+    restore_cmd = next(cmd for cmd in commands if cmd[0] == "pg_restore" and "-l" not in cmd)
+    scratch = restore_cmd[restore_cmd.index("-d") + 1]
+    assert "_restore_check_" in scratch
+    assert "--jobs=4" in restore_cmd
+    assert commands[-1][-1] == f'DROP DATABASE IF EXISTS "{scratch}"'
+
+
+def test_live_restore_leaves_operational_tables_alone(manager, monkeypatch):
+    dump = b"PGDMP" + bytes(2000)
+    monkeypatch.setattr(backup.subprocess, "Popen", lambda cmd, **kwargs: FakeProcess(cmd, dump))
+    filename = manager.create_backup("manual")
+    listing = (
+        b"; header\n"
+        b"215; 1259 16390 TABLE public handovers letsee\n"
+        b"216; 1259 16400 TABLE public jobs letsee\n"
+        b"217; 1259 16410 TABLE public scheduler_state letsee\n"
+        b"3301; 0 16390 TABLE DATA public handovers letsee\n"
+        b"3302; 0 16400 TABLE DATA public jobs letsee\n"
+        b"3401; 2606 16500 CONSTRAINT public jobs jobs_pkey letsee\n"
+        b"3501; 1259 16600 INDEX public idx_job_kind_created letsee\n"
+    )
+    restored_entries = []
+
+    def run(cmd, **kwargs):
+        output = listing if "-l" in cmd else b"3\n"
+        return subprocess.CompletedProcess(cmd, 0, output, b"")
+
+    def popen(cmd, **kwargs):
+        list_path = next(arg for arg in cmd if arg.startswith("--use-list="))
+        with open(list_path.removeprefix("--use-list=")) as list_file:
+            restored_entries.extend(list_file.read().split())
+        process = FakeProcess(cmd)
+        process.stderr = io.BytesIO(b"")
+        return process
+
+    monkeypatch.setattr(backup.subprocess, "run", run)
+    monkeypatch.setattr(backup.subprocess, "Popen", popen)
+
+    assert manager.restore_backup(filename) is True
+    assert manager.restore_progress["items_total"] == 2
+    assert "handovers" in restored_entries
+    assert not {"jobs", "scheduler_state", "idx_job_kind_created"} & set(restored_entries)
+
+
+def test_live_restore_resets_caches(client, db_session, manager, monkeypatch):
+    # The roster cache is only used while cross-worker invalidations arrive
+    monkeypatch.setattr(pg_listener, "connected", True)
+    headers = admin_headers(client, db_session)
+    db_session.add(Schedule(date="2026-05-01", shifts={"A": [], "M": [], "B": [], "C": []}))
+    db_session.commit()
+    url = "/api/schedules/roster?from=2026-05-01&to=2026-05-31"
+    assert list(client.get(url, headers=headers).json()["days"]) == ["2026-05-01"]
+
+    monkeypatch.setattr(
+        backup.subprocess, "Popen", lambda cmd, **kwargs: FakeProcess(cmd, b"PGDMP base")
+    )
+    filename = manager.create_backup("manual")
+
+    def run(cmd, **kwargs):
+        output = b"; header\n1; TABLE a\n" if "-l" in cmd else b"3\n"
+        return subprocess.CompletedProcess(cmd, 0, output, b"")
+
+    def popen(cmd, **kwargs):
+        # pg_restore replaces the table behind the ORM's back
+        with manager.engine.begin() as connection:
+            connection.execute(Schedule.__table__.delete())
+        process = FakeProcess(cmd)
+        process.stderr = io.BytesIO(b"")
+        return process
+
+    monkeypatch.setattr(backup.subprocess, "run", run)
+    monkeypatch.setattr(backup.subprocess, "Popen", popen)
+
+    assert manager.restore_backup(filename) is True
+    assert client.get(url, headers=headers).json()["days"] == {}
+
+
+def test_restore_rejects_archive_with_wrong_checksum(manager, monkeypatch):
+    monkeypatch.setattr(
+        backup.subprocess, "Popen", lambda cmd, **kwargs: FakeProcess(cmd, b"PGDMP original")
+    )
+    filename = manager.create_backup("manual")
+    manager.s3_client.objects[filename]["Body"] = b"PGDMP tampered"
+    monkeypatch.setattr(
+        backup.subprocess,
+        "Popen",
+        lambda cmd, **kwargs: pytest.fail("pg_restore must not run"),
+    )
+
+    assert manager.restore_backup(filename) is False
+    assert "checksum" in manager.restore_progress["error"]
+
+
+def test_backup_request_is_queued_and_run_by_job_runner(
+    client, db_session, manager, runner, monkeypatch
+):
+    monkeypatch.setattr(
+        backup.subprocess, "Popen", lambda cmd, **kwargs: FakeProcess(cmd, b"PGDMP" + bytes(3000))
+    )
+    headers = admin_headers(client, db_session)
+
+    response = client.post("/api/backups/create", headers=headers)
+    assert response.status_code == 202, response.text
+    job_id = response.json()["job"]["id"]
+    assert response.json()["job"]["status"] == "queued"
+    assert response.json()["job"]["created_by"] == "admin@example.com"
+
+    assert runner.run_one() is True
+    assert runner.run_one() is False
+
+    job = client.get(f"/api/backups/jobs/{job_id}", headers=headers).json()
+    assert job["status"] == "completed"
+    assert job["progress"]["bytes_done"] == 3005
+    filename = job["result"]["backup_filename"]
+    assert job["result"]["manifest"]["size"] == 3005
+    assert [b["filename"] for b in manager.list_backups()] == [filename]
+
+    listed = client.get("/api/backups/jobs?kind=backup", headers=headers).json()
+    assert [item["id"] for item in listed] == [job_id]
+    assert client.get(f"/api/backups/jobs/{uuid4()}", headers=headers).status_code == 404
+
+
+def test_runner_waits_for_running_job_and_fails_stale_ones(client, db_session, runner):
+    headers = admin_headers(client, db_session)
+    running = Job(kind="backup", status="running", heartbeat_at=datetime.now(UTC))
+    db_session.add(running)
+    db_session.commit()
+
+    response = client.post("/api/backups/restore/backup_missing.dump", headers=headers)
+    assert response.status_code == 202, response.text
+    restore_id = response.json()["job"]["id"]
+
+    # Another worker's job is still reporting: nothing is claimed
+    assert runner.run_one() is False
+
+    running.heartbeat_at = datetime.now(UTC) - timedelta(hours=1)
+    db_session.commit()
+    assert runner.run_one() is True
+
+    db_session.refresh(running)
+    assert running.status == "failed"
+    restore = client.get("/api/backups/restore", headers=headers).json()
+    assert restore["id"] == restore_id
+    assert restore["status"] == "failed"
+    assert restore["error"]
+
+
+def test_runner_records_job_whose_row_disappeared(app, db_session, runner):
+    job = Job(kind="wipe", params={"n": 1})
+    db_session.add(job)
+    db_session.commit()
+    job_id = job.id
+
+    def wipe_jobs(params, progress):
+        # What a restore replacing the jobs table looks like to the running job
+        with app.state.testing_session_factory() as db:
+            db.query(Job).delete()
+            db.commit()
+        return {"n": params["n"]}
+
+    runner.handlers["wipe"] = wipe_jobs
+    assert runner.run_one() is True
+
+    db_session.expire_all()
+    restored = db_session.get(Job, job_id)
+    assert (restored.kind, restored.status, restored.result) == ("wipe", "completed", {"n": 1})
+    assert restored.finished_at is not None
+
+
+def test_scheduler_leader_runs_tasks_and_reports_status(app, client, db_session):
+    headers = admin_headers(client, db_session)
+    scheduler = BackupScheduler(session_factory=app.state.testing_session_factory)
+
+    assert scheduler.hold_leadership() is True
+    scheduler.run_task("backup")
+    # A repeated tick (e.g. right after a failover) does not queue a second backup
+    scheduler.run_task("backup")
+    first_cleanup = scheduler.next_run_at("backup_cleanup")
+
+    assert db_session.query(Job).filter(Job.kind == "backup").count() == 1
+    assert scheduler.next_run_at("backup_cleanup") == first_cleanup
+
+    response = client.get("/api/backups/scheduler", headers=headers)
+    assert response.status_code == 200, response.text
+    status = response.json()
+    assert status["leader"]["worker"] == scheduler.worker_id
+    assert status["leader"]["active"] is True
+
+    tasks = {task["name"]: task for task in status["tasks"]}
+    assert set(tasks) == {"backup", "backup_cleanup", "schedule_normalization", "token_cleanup"}
+    assert tasks["backup"]["last_status"] == "completed"
+    assert tasks["backup"]["last_message"].startswith("Skipped")
+    started = datetime.fromisoformat(tasks["backup"]["last_started_at"])
+    next_run = datetime.fromisoformat(tasks["backup"]["next_run_at"])
+    assert next_run - started == timedelta(hours=1)
+    assert tasks["backup_cleanup"]["last_status"] is None
+    assert tasks["backup_cleanup"]["next_run_at"] is not None
+    assert tasks["token_cleanup"]["next_run_at"] is None
+
+
+def fake_restore_tools(monkeypatch):
+    def run(cmd, **kwargs):
+        output = b"; header\n1; TABLE a\n" if "-l" in cmd else b"3\n"
+        return subprocess.CompletedProcess(cmd, 0, output, b"")
+
+    def popen(cmd, **kwargs):
+        process = FakeProcess(cmd)
+        process.stderr = io.BytesIO(b"pg_restore: creating TABLE public.a\n")
+        return process
+
+    monkeypatch.setattr(backup.subprocess, "run", run)
+    monkeypatch.setattr(backup.subprocess, "Popen", popen)
+
+
+def test_incremental_backup_exports_changes_and_restore_replays_chain(
+    manager, db_session, monkeypatch
+):
+    earlier = datetime.now(UTC) - timedelta(hours=2)
+    setting = Setting(key="hotel_name", value="Letsee", created_at=earlier, updated_at=earlier)
+    kept = Schedule(date="2026-05-01", shifts={"A": [], "M": [], "B": [], "C": []})
+    kept.created_at = kept.updated_at = earlier
+    removed = Schedule(date="2026-05-02", shifts={"A": [], "M": [], "B": [], "C": []})
+    removed.created_at = removed.updated_at = earlier
+    db_session.add_all([setting, kept, removed])
+    db_session.commit()
+
+    monkeypatch.setattr(
+        backup.subprocess, "Popen", lambda cmd, **kwargs: FakeProcess(cmd, b"PGDMP base")
+    )
+    base = manager.create_backup("manual")
+
+    user = User(
+        email="night@example.com",
+        hashed_password="x",
+        full_name="Night Auditor",
+        color="#3498db",
+        theme="light",
+    )
+    db_session.add(user)
+    db_session.flush()
+    user_id = user.id
+    now = datetime.now(UTC)
+    db_session.add(
+        Handover(
+            date="2026-05-01",
+            category="info",
+            text="Late checkout",
+            attachments=[],
+            timestamp=now,
+        )
+    )
+    setting.value = "Letsee Hotel"
+    kept.shifts = {"A": [str(user_id)], "M": [], "B": [], "C": []}
+    db_session.delete(removed)
+    db_session.add(ScheduleTemplate(name="Weekly", cycle_days=7, days=[{}] * 7))
+    db_session.commit()
+
+    increment = manager.create_backup("manual", incremental=True)
+    assert increment.endswith(backup.INCREMENTAL_EXTENSION)
+    manifest = manager.read_manifest(increment)
+    assert (manifest["parent"], manifest["base"]) == (base, base)
+    assert manifest["rows"] == {
+        "positions": 0,
+        "users": 1,
+        "schedule_templates": 1,
+        "settings": 1,
+        "schedules": 1,
+        "handovers": 1,
+    }
+    assert manager.backup_chain(increment) == [base, increment]
+
+    # Diverge from the backed-up state; replaying the chain must undo all of it
+    db_session.query(Handover).delete()
+    db_session.query(ScheduleTemplate).delete()
+    setting.value = "Stale"
+    kept.shifts = {"A": [], "M": [], "B": [], "C": []}
+    db_session.add(Schedule(date="2026-05-03", shifts={"A": [], "M": [], "B": [], "C": []}))
+    db_session.commit()
+    db_session.close()
+
+    fake_restore_tools(monkeypatch)
+    assert manager.restore_backup(increment) is True, manager.restore_progress["error"]
+    assert manager.restore_progress["chain"] == [base, increment]
+    assert manager.restore_progress["increments_done"] == 1
+
+    assert [h.text for h in db_session.query(Handover)] == ["Late checkout"]
+    assert db_session.query(Setting).one().value == "Letsee Hotel"
+    assert db_session.query(ScheduleTemplate).one().name == "Weekly"
+    assert [s.date for s in db_session.query(Schedule)] == ["2026-05-01"]
+    assignment = db_session.query(ScheduleAssignment).one()
+    assert (assignment.shift, assignment.user_id) == ("A", user_id)
+
+
+def seed_backup_chains(manager, days: int, increments_per_day: int) -> list[str]:
+    """Daily automatic full backups with hourly increments on top, oldest first."""
+    keys = []
+    for day in range(1, days + 1):
+        parent = None
+        for hour in range(increments_per_day + 1):
+            stamp = f"202605{day:02d}_{hour:02d}0000"
+            taken_at = datetime(2026, 5, day, hour, tzinfo=UTC)
+            if parent is None:
+                key = base = f"backup_auto_{stamp}.dump"
+                manifest = {"filename": key, "captured_at": taken_at.isoformat()}
+            else:
+                key = f"backup_auto_{stamp}{backup.INCREMENTAL_EXTENSION}"
+                manifest = {
+                    "filename": key,
+                    "captured_at": taken_at.isoformat(),
+                    "parent": parent,
+                    "base": base,
+                }
+            manager.s3_client.put_object(Bucket=manager.backup_bucket, Key=key, Body=b"x")
+            manager.s3_client.objects[key]["LastModified"] = taken_at
+            manager._write_manifest(key, manifest)
+            keys.append(key)
+            parent = key
+    return keys
+
+
+def test_list_backups_pages_through_listing_and_returns_newest(manager, monkeypatch):
+    keys = seed_backup_chains(manager, days=2, increments_per_day=2)
+    list_page = manager.s3_client.list_objects_v2
+    monkeypatch.setattr(
+        manager.s3_client, "list_objects_v2", lambda **kwargs: list_page(**kwargs, MaxKeys=2)
+    )
+
+    assert [b["filename"] for b in manager.list_backups(limit=2)] == [keys[-1], keys[-2]]
+    assert len(manager.list_backups(limit=50)) == len(keys)
+    assert manager._chain_head()["filename"] == keys[-1]
+
+
+def test_cleanup_keeps_chains_of_recent_increments(manager):
+    keys = seed_backup_chains(manager, days=3, increments_per_day=3)
+    day1, day2, day3 = keys[0:4], keys[4:8], keys[8:12]
+    manual = "backup_manual_20260501_120000.dump"
+    manager.s3_client.put_object(Bucket=manager.backup_bucket, Key=manual, Body=b"x")
+
+    # The newest 4 increments reach into day 2, whose whole chain stays restorable
+    assert manager.cleanup_old_backups(keep_daily=2, keep_hourly=4) == 4
+    remaining = [b["filename"] for b in manager.list_backups(limit=100)]
+    assert sorted(remaining) == sorted([manual, *day2, *day3])
+    assert manager.read_manifest(day1[0]) is None
+
+    # Older chains shrink to their full backup
+    assert manager.cleanup_old_backups(keep_daily=2, keep_hourly=1) == 3
+    remaining = [b["filename"] for b in manager.list_backups(limit=100)]
+    assert sorted(remaining) == sorted([manual, day2[0], *day3])
+
+    # Manual full backups are never deleted
+    assert manager.cleanup_old_backups(keep_daily=0, keep_hourly=0) == 5
+    assert [b["filename"] for b in manager.list_backups()] == [manual]
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import pytest
+
+from app.core.security import get_password_hash
+from app.models import User
+
+
+def login_headers(client, email: str, password: str = "SecurePass123!") -> dict[str, str]:
+    response = client.post("/api/auth/login", json={"email": email, "password": password})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def create_admin(db_session) -> User:
+    user = User(
+        email="admin@example.com",
+        hashed_password=get_password_hash("SecurePass123!"),
+        full_name="Admin",
+        color="#3498db",
+        theme="light",
+        is_active=True,
+        is_admin=True,
+    )
+    db_session.add(user)
+    db_session.commit()
+    return user
+
+
+def assert_revalidates(client, url: str, headers: dict[str, str]) -> str:
+    first = client.get(url, headers=headers)
+    assert first.status_code == 200, first.text
+    etag = first.headers["ETag"]
+
+    cached = client.get(url, headers=headers | {"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["ETag"] == etag
+    return etag
+
+
+@pytest.mark.parametrize(
+    ("url", "create_path", "payload"),
+    [
+        (
+            "/api/handovers?date=2026-05-09",
+            "/api/handovers",
+            {"date": "2026-05-09", "category": "info", "text": "Late checkout"},
+        ),
+        ("/api/settings", "/api/settings", {"key": "hotel_name", "value": "Letsee"}),
+    ],
+)
+def test_collection_etag_changes_after_write(client, db_session, url, create_path, payload):
+    create_admin(db_session)
+    headers = login_headers(client, "admin@example.com")
+
+    etag = assert_revalidates(client, url, headers)
+    created = client.post(create_path, json=payload, headers=headers)
+    assert created.status_code == 201, created.text
+
+    fresh = client.get(url, headers=headers | {"If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert fresh.headers["ETag"] != etag
+
+
+def test_schedule_and_user_etags_track_updates(client, db_session):
+    admin = create_admin(db_session)
+    headers = login_headers(client, "admin@example.com")
+
+    schedule_etag = assert_revalidates(client, "/api/schedules?from_date=2026-05-01", headers)
+    users_etag = assert_revalidates(client, "/api/users", headers)
+
+    upsert = client.put(
+        "/api/schedules/2026-05-09",
+        json={"shifts": {"A": [str(admin.id)], "M": [], "B": [], "C": []}},
+        headers=headers,
+    )
+    assert upsert.status_code == 200, upsert.text
+    renamed = client.put(f"/api/users/{admin.id}", json={"full_name": "Boss"}, headers=headers)
+    assert renamed.status_code == 200, renamed.text
+
+    for url, etag in (
+        ("/api/schedules?from_date=2026-05-01", schedule_etag),
+        ("/api/users", users_etag),
+    ):
+        response = client.get(url, headers=headers | {"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+
+    # Different filters never share a tag
+    other = client.get("/api/schedules?from_date=2026-05-02", headers=headers)
+    assert other.headers["ETag"] != schedule_etag
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import time
+from datetime import UTC, datetime, timedelta
+
+from app.core.events import RESYNC_EVENT, EventBroadcaster, event_broadcaster
+from app.models import Handover
+from app.routers.events import _event_stream
+
+
+def make_handover(room: str) -> Handover:
+    now = datetime(2026, 5, 9, 8, 0, tzinfo=UTC)
+    return Handover(
+        date="2026-05-09",
+        category="info",
+        room=room,
+        text="Note",
+        attachments=[],
+        timestamp=now,
+        created_at=now,
+        updated_at=now,
+    )
+
+
+async def test_committed_changes_reach_subscribers(db_session):
+    subscription = event_broadcaster.subscribe("listener")
+    try:
+        handover = make_handover("101")
+        db_session.add(handover)
+        db_session.flush()
+        assert subscription.queue.empty()  # nothing is delivered before commit
+        db_session.commit()
+
+        handover.deleted_at = datetime.now(UTC)
+        db_session.commit()
+
+        created = subscription.queue.get_nowait()
+        deleted = subscription.queue.get_nowait()
+        assert created == {
+            "entity": "handover",
+            "action": "created",
+            "id": str(handover.id),
+            "date": "2026-05-09",
+        }
+        assert deleted["action"] == "deleted"
+
+        db_session.add(make_handover("102"))
+        db_session.rollback()
+        assert subscription.queue.empty()
+    finally:
+        event_broadcaster.unsubscribe(subscription)
+
+
+async def test_slow_subscriber_gets_single_resync():
+    broadcaster = EventBroadcaster(queue_size=2, max_subscribers=1)
+    subscription = broadcaster.subscribe("slow")
+    assert broadcaster.subscribe("other") is None
+
+    for index in range(5):
+        broadcaster.broadcast({"entity": "schedule", "action": "updated", "id": str(index)})
+
+    assert subscription.lagging is True
+    assert subscription.queue.get_nowait() == RESYNC_EVENT
+    assert subscription.queue.empty()
+    assert subscription.dropped == 5
+
+
+def test_event_stream_requires_valid_token(client):
+    response = client.get("/api/events/stream?token=not-a-token")
+    assert response.status_code == 401, response.text
+
+
+class ConnectedRequest:
+    async def is_disconnected(self) -> bool:
+        return False
+
+
+async def test_event_stream_ends_once_token_is_revoked_or_user_deactivated(
+    app, client, db_session, monkeypatch
+):
+    from app.core.config import settings
+    from app.core.database import get_db
+    from app.core.security import create_access_token, get_password_hash
+    from app.models import User
+
+    monkeypatch.setattr(settings, "SSE_HEARTBEAT_SECONDS", 0.01)
+    user = User(
+        email="stream@example.com",
+        hashed_password=get_password_hash("SecurePass123!"),
+        full_name="Stream User",
+        color="#3498db",
+        theme="light",
+        is_active=True,
+        is_admin=False,
+    )
+    db_session.add(user)
+    db_session.commit()
+
+    async def open_stream(minutes: int):
+        # Distinct lifetimes so the two tokens differ (access tokens carry no jti)
+        token = create_access_token(str(user.id), timedelta(minutes=minutes))
+        db = await anext(app.dependency_overrides[get_db]())
+        subscription = event_broadcaster.subscribe(str(user.id), token=token)
+        stream = _event_stream(ConnectedRequest(), subscription, db)
+        assert await anext(stream) == "retry: 5000\n\n"
+        assert await anext(stream) == ": heartbeat\n\n"
+        return token, stream
+
+    token, stream = await open_stream(10)
+    client.post("/api/auth/logout", headers={"Authorization": f"Bearer {token}"})
+    assert [chunk async for chunk in stream] == []
+
+    _token, stream = await open_stream(20)
+    user.is_active = False
+    db_session.commit()
+    # The deactivation's own change event may still go out before the re-check
+    chunks = [chunk async for chunk in stream]
+    assert all(chunk.startswith("event: user") for chunk in chunks)
+    assert event_broadcaster.subscriber_count == 0
+
+
+async def test_event_stream_ends_when_token_expires():
+    subscription = event_broadcaster.subscribe("expired", token="t", expires_at=time.time())
+    stream = _event_stream(ConnectedRequest(), subscription, db=None)
+    assert await anext(stream) == "retry: 5000\n\n"
+    assert [chunk async for chunk in stream] == []
@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import asyncio
+import io
+
+import boto3
+import pytest
+from PIL import Image
+
+from app.core.security import get_password_hash
+from app.core.thumbnails import generate_thumbnail, thumbnail_key
+from app.models import User
+from app.routers import files
+
+
+def login_headers(client, db_session) -> dict[str, str]:
+    db_session.add(
+        User(
+            email="upload@example.com",
+            hashed_password=get_password_hash("SecurePass123!"),
+            full_name="Uploader",
+            color="#3498db",
+            theme="light",
+            is_active=True,
+            is_admin=False,
+        )
+    )
+    db_session.commit()
+    response = client.post(
+        "/api/auth/login", json={"email": "upload@example.com", "password": "SecurePass123!"}
+    )
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def test_upload_streams_large_files_as_multipart(client, db_session, monkeypatch):
+    monkeypatch.setattr(files, "s3_client", None)
+    monkeypatch.setattr(files, "UPLOAD_PART_SIZE", 16 * 1024)
+    monkeypatch.setattr(files, "MAX_FILE_SIZE", 40 * 1024)
+    storage = boto3.client("s3")
+    headers = login_headers(client, db_session)
+
+    small = client.post(
+        "/api/files/upload", files={"file": ("note.pdf", b"%PDF-1.4 small")}, headers=headers
+    )
+    assert small.status_code == 200, small.text
+    assert storage.objects[small.json()["file_key"]]["Body"] == b"%PDF-1.4 small"
+
+    content = b"%PDF-1.4\n" + bytes(range(256)) * 140  # Three parts
+    large = client.post("/api/files/upload", files={"file": ("scan.pdf", content)}, headers=headers)
+    assert large.status_code == 200, large.text
+    assert large.json()["size"] == len(content)
+    stored = storage.objects[large.json()["file_key"]]
+    assert stored["Body"] == content
+    assert stored["ContentType"] == "application/pdf"
+
+    too_large = client.post(
+        "/api/files/upload", files={"file": ("huge.pdf", content * 2)}, headers=headers
+    )
+    assert too_large.status_code == 413, too_large.text
+
+    # Without a declared size the limit is enforced while streaming
+    upload = files.UploadFile(io.BytesIO(content * 2), filename="huge.pdf")
+    with pytest.raises(files.FileTooLargeError):
+        asyncio.run(files.stream_to_storage(storage, "bucket", "attachments/huge.pdf", upload, b""))
+    assert storage.aborted_uploads == ["attachments/huge.pdf"]
+    assert storage.multipart_uploads == {}
+
+
+def test_download_supports_ranges_and_conditional_requests(client, db_session, monkeypatch):
+    monkeypatch.setattr(files, "s3_client", None)
+    headers = login_headers(client, db_session)
+    content = b"%PDF-1.4\n" + bytes(range(256)) * 4
+    key = client.post(
+        "/api/files/upload", files={"file": ("doc.pdf", content)}, headers=headers
+    ).json()["file_key"]
+    url = f"/api/files/download/{key}"
+
+    full = client.get(url, headers=headers)
+    assert full.status_code == 200
+    assert full.content == content
+    etag = full.headers["etag"]
+    assert full.headers["last-modified"]
+
+    partial = client.get(url, headers=headers | {"Range": "bytes=0-8"})
+    assert partial.status_code == 206
+    assert partial.content == b"%PDF-1.4\n"
+    assert partial.headers["content-range"] == f"bytes 0-8/{len(content)}"
+
+    suffix = client.get(url, headers=headers | {"Range": "bytes=-4", "If-Range": etag})
+    assert suffix.status_code == 206
+    assert suffix.content == content[-4:]
+
+    stale = client.get(url, headers=headers | {"Range": "bytes=0-8", "If-Range": '"old"'})
+    assert stale.status_code == 200
+    assert stale.content == content
+
+    unsatisfiable = client.get(url, headers=headers | {"Range": f"bytes={len(content)}-"})
+    assert unsatisfiable.status_code == 416
+    assert unsatisfiable.headers["Content-Range"] == f"bytes */{len(content)}"
+
+    cached = client.get(url, headers=headers | {"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["etag"] == etag
+
+    missing = client.get("/api/files/download/attachments/missing.pdf", headers=headers)
+    assert missing.status_code == 404
+
+
+def test_image_upload_gets_webp_thumbnail(client, db_session, monkeypatch):
+    monkeypatch.setattr(files, "s3_client", None)
+    storage = boto3.client("s3")
+    headers = login_headers(client, db_session)
+    png = io.BytesIO()
+    Image.new("RGB", (1200, 600), "red").save(png, format="PNG")
+
+    key = client.post(
+        "/api/files/upload", files={"file": ("photo.png", png.getvalue())}, headers=headers
+    ).json()["file_key"]
+    assert thumbnail_key(key) in storage.objects
+
+    response = client.get(f"/api/files/thumb/{key}", headers=headers)
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"] == "image/webp"
+    assert "immutable" in response.headers["cache-control"]
+    assert Image.open(io.BytesIO(response.content)).size == (320, 160)
+
+    cached = client.get(
+        f"/api/files/thumb/{key}", headers=headers | {"If-None-Match": response.headers["etag"]}
+    )
+    assert cached.status_code == 304
+
+    # Missing thumbnails are rendered on first request
+    del storage.objects[thumbnail_key(key)]
+    assert client.get(f"/api/files/thumb/{key}", headers=headers).status_code == 200
+
+    client.delete(f"/api/files/delete/{key}", headers=headers)
+    assert thumbnail_key(key) not in storage.objects
+    assert client.get(f"/api/files/thumb/{key}", headers=headers).status_code == 404
+
+
+def test_oversized_images_get_no_thumbnail(app):
+    storage = boto3.client("s3")
+    # 48 megapixels declared in a few kilobytes of PNG
+    png = io.BytesIO()
+    Image.new("1", (8000, 6000)).save(png, format="PNG")
+    key = "attachments/huge.png"
+    storage.put_object(Bucket="test", Key=key, Body=png.getvalue(), ContentType="image/png")
+
+    assert generate_thumbnail(storage, "test", key) == b""
+    assert storage.objects[thumbnail_key(key)]["Body"] == b""
+
+
+def test_files_without_preview_are_not_downloaded_for_thumbnails(client, db_session, monkeypatch):
+    monkeypatch.setattr(files, "s3_client", None)
+    storage = boto3.client("s3")
+    headers = login_headers(client, db_session)
+    key = "attachments/diagram.svg"
+    storage.put_object(Bucket="test", Key=key, Body=b"<svg/>", ContentType="image/svg+xml")
+    downloaded = []
+    get_object = storage.get_object
+    monkeypatch.setattr(
+        storage,
+        "get_object",
+        lambda **kwargs: downloaded.append(kwargs["Key"]) or get_object(**kwargs),
+    )
+
+    response = client.get(f"/api/files/thumb/{key}", headers=headers)
+    assert response.status_code == 404
+    assert response.headers["cache-control"] == "private, max-age=86400"
+    assert key not in downloaded
+    # The miss is remembered, so the original is not even inspected again
+    assert storage.objects[thumbnail_key(key)]["Body"] == b""
+    monkeypatch.setattr(storage, "head_object", None)
+    assert client.get(f"/api/files/thumb/{key}", headers=headers).status_code == 404
+    assert key not in downloaded
+
+
+def test_download_redirects_to_cached_presigned_url(client, db_session, monkeypatch):
+    monkeypatch.setattr(files, "s3_client", None)
+    monkeypatch.setattr(files.settings, "FILES_DOWNLOAD_REDIRECT", True)
+    storage = boto3.client("s3")
+    headers = login_headers(client, db_session)
+    url = "/api/files/download/attachments/report.pdf"
+
+    first = client.get(url, headers=headers, follow_redirects=False)
+    assert first.status_code == 307
+    assert first.headers["location"].startswith("https://minio.test/")
+    assert first.headers["cache-control"] == "no-store"
+
+    second = client.get(url, headers=headers, follow_redirects=False)
+    assert second.headers["location"] == first.headers["location"]
+    assert storage.presigned_count == 1
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+
+from app.core.security import get_password_hash
+from app.models import Handover, User
+
+
+def login_headers(client, email: str, password: str = "SecurePass123!") -> dict[str, str]:
+    response = client.post("/api/auth/login", json={"email": email, "password": password})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def seed_user(db_session, email: str = "desk@example.com") -> User:
+    user = User(
+        email=email,
+        hashed_password=get_password_hash("SecurePass123!"),
+        full_name="Front Desk",
+        color="#3498db",
+        theme="light",
+        is_active=True,
+        is_admin=False,
+    )
+    db_session.add(user)
+    db_session.commit()
+    return user
+
+
+def seed_handovers(db_session, count: int, date: str = "2026-05-09") -> None:
+    base = datetime(2026, 5, 9, 8, 0, tzinfo=UTC)
+    for index in range(count):
+        db_session.add(
+            Handover(
+                date=date,
+                category="info",
+                room=str(100 + index),
+                text=f"Note {index}",
+                attachments=[],
+                # Pairs share a timestamp so pagination must tie-break on id
+                timestamp=base + timedelta(minutes=index // 2),
+                created_at=base,
+                updated_at=base,
+            )
+        )
+    db_session.commit()
+
+
+def test_list_handovers_paginates_with_keyset_cursor(client, db_session):
+    seed_user(db_session)
+    seed_handovers(db_session, 7)
+    headers = login_headers(client, "desk@example.com")
+
+    seen: list[str] = []
+    cursor = None
+    pages = 0
+    while True:
+        url = "/api/handovers?limit=3" + (f"&cursor={cursor}" if cursor else "")
+        response = client.get(url, headers=headers)
+        assert response.status_code == 200, response.text
+        seen.extend(note["id"] for note in response.json())
+        pages += 1
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert pages == 3
+    full = client.get("/api/handovers", headers=headers).json()
+    assert seen == [note["id"] for note in full]
+    assert len(set(seen)) == 7
+
+
+def test_list_handovers_field_projection(client, db_session):
+    seed_user(db_session)
+    seed_handovers(db_session, 2)
+    headers = login_headers(client, "desk@example.com")
+
+    response = client.get("/api/handovers?fields=room,category", headers=headers)
+    assert response.status_code == 200, response.text
+    payload = response.json()
+    assert len(payload) == 2
+    assert set(payload[0]) == {"id", "timestamp", "room", "category"}
+
+    bad_response = client.get("/api/handovers?fields=room,password", headers=headers)
+    assert bad_response.status_code == 400, bad_response.text
+
+    bad_cursor = client.get("/api/handovers?limit=1&cursor=not-a-cursor", headers=headers)
+    assert bad_cursor.status_code == 400, bad_cursor.text
+
+
+def test_search_handovers_filters_and_paginates(client, db_session):
+    seed_user(db_session)
+    seed_handovers(db_session, 3)
+    seed_handovers(db_session, 2, date="2026-05-10")
+    db_session.add(
+        Handover(
+            date="2026-05-10",
+            category="maintenance",
+            room="204",
+            guest_name="Alice Smith",
+            text="Broken shower head",
+            attachments=[],
+            timestamp=datetime(2026, 5, 10, 9, 0, tzinfo=UTC),
+            created_at=datetime(2026, 5, 10, 9, 0, tzinfo=UTC),
+            updated_at=datetime(2026, 5, 10, 9, 0, tzinfo=UTC),
+        )
+    )
+    db_session.commit()
+    headers = login_headers(client, "desk@example.com")
+
+    response = client.get("/api/handovers/search?q=smith shower", headers=headers)
+    assert response.status_code == 200, response.text
+    page = response.json()
+    assert [hit["room"] for hit in page["items"]] == ["204"]
+    assert page["next_offset"] is None
+
+    first = client.get("/api/handovers/search?q=note&limit=2", headers=headers).json()
+    assert len(first["items"]) == 2
+    assert first["next_offset"] == 2
+
+    filtered = client.get(
+        "/api/handovers/search?q=note&date_from=2026-05-10&category=info", headers=headers
+    ).json()
+    assert {hit["date"] for hit in filtered["items"]} == {"2026-05-10"}
+    assert len(filtered["items"]) == 2
+
+    none = client.get("/api/handovers/search?q=shower&category=info", headers=headers).json()
+    assert none["items"] == []
+
+    # LIKE wildcards in the query are matched literally
+    wildcard = client.get("/api/handovers/search?q=%25", headers=headers).json()
+    assert wildcard["items"] == []
+
+
+def test_open_handovers_ordered_by_due_time(client, db_session):
+    seed_user(db_session)
+    headers = login_headers(client, "desk@example.com")
+
+    def create(room: str, **fields) -> str:
+        payload = {"date": "2026-05-09", "category": "request", "room": room, "text": "x"}
+        response = client.post("/api/handovers", json=payload | fields, headers=headers)
+        assert response.status_code == 201, response.text
+        return response.json()["id"]
+
+    create("101", followup=True, due_date="2026-05-11")
+    create("102", promised=True, due_date="2026-05-10", due_time="18:00")
+    create("103", followup=True)
+    create("104", due_date="2026-05-09")
+    done_id = create("105", followup=True, due_date="2026-05-09")
+    client.put(f"/api/handovers/{done_id}", json={"completed": True}, headers=headers)
+
+    response = client.get("/api/handovers/open", headers=headers)
+    assert response.status_code == 200, response.text
+    open_notes = response.json()
+    assert [note["room"] for note in open_notes] == ["102", "101", "103"]
+    assert open_notes[0]["due_at"] == "2026-05-10T18:00:00"
+    assert open_notes[2]["due_at"] is None
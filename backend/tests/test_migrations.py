@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import importlib.util
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+import sqlalchemy as sa
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+
+VERSIONS = Path(__file__).resolve().parent.parent / "migrations" / "versions"
+
+
+def load_migration(filename: str):
+    spec = importlib.util.spec_from_file_location(filename.removesuffix(".py"), VERSIONS / filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_due_at_backfill_leaves_invalid_values_null(tmp_path, monkeypatch):
+    migration = load_migration("c3b2a1f0e9d8_add_handover_due_at.py")
+    monkeypatch.setattr(migration, "BACKFILL_BATCH_SIZE", 2)
+    engine = sa.create_engine(f"sqlite:///{tmp_path / 'migration.db'}")
+    metadata = sa.MetaData()
+    handovers = sa.Table(
+        "handovers",
+        metadata,
+        sa.Column("id", sa.Uuid(), primary_key=True),
+        sa.Column("due_date", sa.String(10)),
+        sa.Column("due_time", sa.String(5)),
+        sa.Column("deleted_at", sa.DateTime()),
+        sa.Column("completed", sa.Boolean()),
+        sa.Column("followup", sa.Boolean()),
+        sa.Column("promised", sa.Boolean()),
+    )
+    metadata.create_all(engine)
+    rows = {
+        "dated": ("2026-05-01", "14:30"),
+        "whole_day": ("2026-05-02", ""),
+        "impossible_date": ("2026-02-30", "10:00"),
+        "impossible_time": ("2026-05-03", "25:99"),
+        "undated": (None, None),
+    }
+    ids = {name: uuid.uuid4() for name in rows}
+    with engine.begin() as connection:
+        connection.execute(
+            handovers.insert(),
+            [
+                {"id": ids[name], "due_date": due_date, "due_time": due_time}
+                for name, (due_date, due_time) in rows.items()
+            ],
+        )
+
+        with Operations.context(MigrationContext.configure(connection)):
+            migration.upgrade()
+
+        due_at = dict(connection.execute(sa.text("SELECT id, due_at FROM handovers")).all())
+
+    by_name = {name: due_at[ids[name].hex] for name in rows}
+    assert datetime.fromisoformat(by_name["dated"]) == datetime(2026, 5, 1, 14, 30)
+    assert datetime.fromisoformat(by_name["whole_day"]) == datetime(2026, 5, 2)
+    assert by_name["impossible_date"] is None
+    assert by_name["impossible_time"] is None
+    assert by_name["undated"] is None
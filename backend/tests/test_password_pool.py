@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.password_pool import PasswordWorkPool
+
+
+async def test_password_pool_rejects_when_queue_is_full():
+    pool = PasswordWorkPool(max_workers=1, max_pending=1)
+    release = threading.Event()
+
+    try:
+        blocked = asyncio.create_task(pool.run(release.wait, 5))
+        await asyncio.sleep(0.05)
+
+        with pytest.raises(HTTPException) as exc_info:
+            await pool.run(lambda: True)
+        assert exc_info.value.status_code == 503
+        assert exc_info.value.headers == {"Retry-After": "1"}
+
+        release.set()
+        assert await blocked is True
+        assert await pool.run(lambda: "ok") == "ok"
+    finally:
+        pool.shutdown()
+
+    stats = pool.stats()
+    assert stats["completed"] == 2
+    assert stats["rejected"] == 1
+    assert stats["pending"] == 0
@@ -1,7 +1,11 @@
 from __future__ import annotations
 
+from app.core import schedule_normalization
+from app.core.jobs import JobRunner
+from app.core.schedule_normalization import SCHEDULE_FORMAT_VERSION, ScheduleNormalizer
+from app.core.scheduler import BackupScheduler
 from app.core.security import get_password_hash
-from app.models import Schedule, User
+from app.models import Job, Schedule, User
 
 
 def login_headers(client, email: str, password: str) -> dict[str, str]:
@@ -38,7 +42,7 @@ def create_user(
     return user
 
 
-def test_schedule_get_migrates_legacy_name_entries_to_user_ids(client, db_session):
+def test_normalization_job_migrates_legacy_name_entries_to_user_ids(app, client, db_session):
     admin = create_user(
         db_session,
         email="admin@example.com",
@@ -69,15 +73,26 @@ def test_schedule_get_migrates_legacy_name_entries_to_user_ids(client, db_sessio
         edited_by=admin.full_name,
     )
     db_session.add(legacy_schedule)
+    db_session.add(
+        Schedule(date="2026-05-10", shifts={"A": ["Nobody Known"]}, edited_by=admin.full_name)
+    )
     db_session.commit()
     db_session.refresh(legacy_schedule)
 
+    # Reads never rewrite rows
     headers = login_headers(client, "admin@example.com", "SecurePass123!")
     response = client.get("/api/schedules?date=2026-05-09", headers=headers)
-
     assert response.status_code == 200, response.text
-    payload = response.json()
-    assert payload[0]["shifts"] == {
+    assert response.json()[0]["shifts"]["A"] == ["Alice Example"]
+
+    normalizer = ScheduleNormalizer(batch_size=1, session_factory=app.state.testing_session_factory)
+    progress = normalizer.run()
+    assert progress["status"] == "completed"
+    assert (progress["total"], progress["processed"], progress["updated"]) == (2, 2, 1)
+    assert progress["unresolved"] == [{"date": "2026-05-10", "entries": ["Nobody Known"]}]
+
+    response = client.get("/api/schedules?date=2026-05-09", headers=headers)
+    assert response.json()[0]["shifts"] == {
         "A": [str(alice.id)],
         "M": [str(bob.id)],
         "B": [],
@@ -87,13 +102,53 @@ def test_schedule_get_migrates_legacy_name_entries_to_user_ids(client, db_sessio
     db_session.expire_all()
     stored_schedule = db_session.query(Schedule).filter(Schedule.date == "2026-05-09").first()
     assert stored_schedule is not None
-    assert stored_schedule.shifts == {
-        "A": [str(alice.id)],
-        "M": [str(bob.id)],
-        "B": [],
-        "C": [],
+    assert stored_schedule.normalized_version == SCHEDULE_FORMAT_VERSION
+
+    # Resuming only revisits the row that is still pending
+    assert normalizer.run()["total"] == 1
+
+
+def test_normalization_runs_as_persisted_job_queued_by_scheduler(
+    app, client, db_session, monkeypatch
+):
+    session_factory = app.state.testing_session_factory
+    monkeypatch.setattr(
+        schedule_normalization.schedule_normalizer, "session_factory", session_factory
+    )
+    create_user(db_session, email="admin@example.com", full_name="Admin User", is_admin=True)
+    alice = create_user(db_session, email="alice@example.com", full_name="Alice Example")
+    db_session.add(Schedule(date="2026-05-09", shifts={"A": ["Alice Example"]}))
+    db_session.commit()
+    headers = login_headers(client, "admin@example.com", "SecurePass123!")
+    assert client.get("/api/schedules/normalize/status", headers=headers).json() == {
+        "status": "idle"
     }
 
+    # Legacy rows are picked up without an operator step
+    scheduler = BackupScheduler(session_factory=session_factory)
+    scheduler.run_task("schedule_normalization")
+    job = db_session.query(Job).filter(Job.kind == "normalize_schedules").one()
+    assert job.status == "queued"
+
+    conflict = client.post("/api/schedules/normalize", headers=headers)
+    assert conflict.status_code == 409
+
+    assert JobRunner(session_factory=session_factory).run_one() is True
+    status = client.get("/api/schedules/normalize/status", headers=headers).json()
+    assert status["status"] == "completed"
+    assert status["result"] == {"processed": 1, "updated": 1, "unresolved": 0}
+    assert status["progress"]["processed"] == 1
+
+    response = client.get("/api/schedules?date=2026-05-09", headers=headers)
+    assert response.json()[0]["shifts"]["A"] == [str(alice.id)]
+
+    # Nothing left to do, so no further jobs are queued
+    scheduler.run_task("schedule_normalization")
+    assert db_session.query(Job).filter(Job.kind == "normalize_schedules").count() == 1
+    queued = client.post("/api/schedules/normalize?batch_size=50", headers=headers)
+    assert queued.status_code == 202, queued.text
+    assert queued.json()["params"] == {"batch_size": 50}
+
 
 def test_schedule_endpoints_reject_invalid_calendar_dates(client, db_session):
     create_user(
@@ -115,6 +170,38 @@ def test_schedule_endpoints_reject_invalid_calendar_dates(client, db_session):
     assert upsert_response.status_code == 400, upsert_response.text
 
 
+def test_schedule_validation_reports_every_invalid_assignment(client, db_session):
+    create_user(
+        db_session,
+        email="admin-validate@example.com",
+        full_name="Admin Validate",
+        is_admin=True,
+    )
+    alice = create_user(db_session, email="alice-validate@example.com", full_name="Alice")
+    gone = create_user(db_session, email="gone-validate@example.com", full_name="Gone")
+    gone.deleted_at = gone.created_at
+    db_session.commit()
+    headers = login_headers(client, "admin-validate@example.com", "SecurePass123!")
+
+    response = client.put(
+        "/api/schedules/2026-06-01",
+        json={
+            "shifts": {
+                "A": [str(alice.id), str(gone.id)],
+                "C": [str(alice.id), "00000000-0000-0000-0000-000000000000", "bogus"],
+            }
+        },
+        headers=headers,
+    )
+    assert response.status_code == 400, response.text
+    assert [(error["shift"], error["code"]) for error in response.json()["detail"]] == [
+        ("C", "duplicate_across_shifts"),
+        ("A", "user_deleted"),
+        ("C", "user_not_found"),
+        ("C", "invalid_user_id"),
+    ]
+
+
 def test_admin_cannot_delete_staff_member_assigned_to_schedule(client, db_session):
     create_user(
         db_session,
@@ -141,3 +228,279 @@ def test_admin_cannot_delete_staff_member_assigned_to_schedule(client, db_sessio
 
     assert response.status_code == 400, response.text
     assert "Cannot delete staff member" in response.json()["detail"]
+
+
+def test_schedule_assignments_follow_schedule_writes(client, db_session):
+    create_user(
+        db_session,
+        email="admin-assign@example.com",
+        full_name="Admin Assign",
+        is_admin=True,
+    )
+    alice = create_user(db_session, email="alice-assign@example.com", full_name="Alice")
+    bob = create_user(db_session, email="bob-assign@example.com", full_name="Bob")
+    headers = login_headers(client, "admin-assign@example.com", "SecurePass123!")
+
+    for date, shifts in (
+        ("2026-05-09", {"A": [str(alice.id), str(bob.id)], "M": [], "B": [], "C": []}),
+        ("2026-05-10", {"A": [], "M": [], "B": [], "C": [str(alice.id)]}),
+    ):
+        response = client.put(f"/api/schedules/{date}", json={"shifts": shifts}, headers=headers)
+        assert response.status_code == 200, response.text
+
+    on_shift = client.get("/api/schedules/on-shift?date=2026-05-09&shift=A", headers=headers)
+    assert on_shift.json() == [str(alice.id), str(bob.id)]
+    dates = client.get(f"/api/users/{alice.id}/schedule-dates", headers=headers)
+    assert dates.json() == ["2026-05-09", "2026-05-10"]
+
+    # Moving Bob off the roster and deleting a day updates the assignments
+    client.put(
+        "/api/schedules/2026-05-09",
+        json={"shifts": {"A": [str(alice.id)], "M": [], "B": [], "C": []}},
+        headers=headers,
+    )
+    client.delete("/api/schedules/2026-05-10", headers=headers)
+
+    dates = client.get(f"/api/users/{alice.id}/schedule-dates", headers=headers)
+    assert dates.json() == ["2026-05-09"]
+    assert client.delete(f"/api/users/{bob.id}", headers=headers).status_code == 204
+
+
+def test_schedule_roster_matrix_is_cached_and_invalidated(client, db_session):
+    create_user(
+        db_session,
+        email="admin-roster@example.com",
+        full_name="Admin Roster",
+        is_admin=True,
+    )
+    alice = create_user(db_session, email="alice-roster@example.com", full_name="Alice")
+    bob = create_user(db_session, email="bob-roster@example.com", full_name="Bob")
+    headers = login_headers(client, "admin-roster@example.com", "SecurePass123!")
+
+    for date, shifts in (
+        ("2026-05-31", {"A": [str(alice.id)], "M": [], "B": [str(bob.id)], "C": []}),
+        ("2026-06-01", {"A": [str(bob.id)], "M": [], "B": [], "C": [str(alice.id)]}),
+        ("2026-06-15", {"A": [], "M": [], "B": [], "C": []}),
+    ):
+        client.put(f"/api/schedules/{date}", json={"shifts": shifts}, headers=headers)
+
+    response = client.get("/api/schedules/roster?from=2026-05-31&to=2026-06-01", headers=headers)
+    assert response.status_code == 200, response.text
+    roster = response.json()
+    assert roster["shifts"] == ["A", "M", "B", "C"]
+    assert roster["users"] == [str(alice.id), str(bob.id)]
+    assert roster["days"] == {
+        "2026-05-31": [[0], [], [1], []],
+        "2026-06-01": [[1], [], [], [0]],
+    }
+
+    client.put(
+        "/api/schedules/2026-06-01",
+        json={"shifts": {"A": [], "M": [str(alice.id)], "B": [], "C": []}},
+        headers=headers,
+    )
+    client.delete("/api/schedules/2026-05-31", headers=headers)
+
+    roster = client.get(
+        "/api/schedules/roster?from=2026-05-01&to=2026-06-30", headers=headers
+    ).json()
+    assert roster["users"] == [str(alice.id)]
+    assert roster["days"] == {
+        "2026-06-01": [[], [0], [], []],
+        "2026-06-15": [[], [], [], []],
+    }
+
+    too_long = client.get("/api/schedules/roster?from=2026-01-01&to=2027-06-01", headers=headers)
+    assert too_long.status_code == 400
+
+
+def test_bulk_schedule_upsert_is_all_or_nothing(client, db_session):
+    create_user(
+        db_session,
+        email="admin-bulk@example.com",
+        full_name="Admin Bulk",
+        is_admin=True,
+    )
+    alice = create_user(db_session, email="alice-bulk@example.com", full_name="Alice")
+    bob = create_user(db_session, email="bob-bulk@example.com", full_name="Bob")
+    headers = login_headers(client, "admin-bulk@example.com", "SecurePass123!")
+    client.put(
+        "/api/schedules/2026-07-01",
+        json={"shifts": {"A": [str(bob.id)], "M": [], "B": [], "C": []}},
+        headers=headers,
+    )
+
+    invalid = client.put(
+        "/api/schedules/bulk",
+        json={
+            "schedules": [
+                {"date": "2026-07-01", "shifts": {"A": [str(alice.id)]}},
+                {"date": "2026-07-02", "shifts": {"A": [str(alice.id)], "B": [str(alice.id)]}},
+                {"date": "2026-07-03", "shifts": {"C": ["00000000-0000-0000-0000-000000000000"]}},
+            ]
+        },
+        headers=headers,
+    )
+    assert invalid.status_code == 400, invalid.text
+    assert [error["date"] for error in invalid.json()["detail"]] == ["2026-07-02", "2026-07-03"]
+    untouched = client.get("/api/schedules/2026-07-01", headers=headers).json()
+    assert untouched["shifts"]["A"] == [str(bob.id)]
+
+    response = client.put(
+        "/api/schedules/bulk",
+        json={
+            "schedules": [
+                {"date": "2026-07-01", "shifts": {"A": [str(alice.id)]}},
+                {"date": "2026-07-02", "shifts": {"B": [str(alice.id)], "C": [str(bob.id)]}},
+            ]
+        },
+        headers=headers,
+    )
+    assert response.status_code == 200, response.text
+    results = response.json()["results"]
+    assert [(r["date"], r["status"]) for r in results] == [
+        ("2026-07-01", "updated"),
+        ("2026-07-02", "created"),
+    ]
+
+    schedules = client.get("/api/schedules?from_date=2026-07-01", headers=headers).json()
+    assert {s["date"]: s["shifts"]["A"] for s in schedules} == {
+        "2026-07-01": [str(alice.id)],
+        "2026-07-02": [],
+    }
+    dates = client.get(f"/api/users/{bob.id}/schedule-dates", headers=headers).json()
+    assert dates == ["2026-07-02"]
+    roster = client.get("/api/schedules/roster?from=2026-07-01&to=2026-07-31", headers=headers)
+    assert roster.json()["days"]["2026-07-02"] == [[], [], [0], [1]]
+
+
+def test_schedule_template_generates_rotation(client, db_session):
+    create_user(
+        db_session,
+        email="admin-rota@example.com",
+        full_name="Admin Rota",
+        is_admin=True,
+    )
+    alice = create_user(db_session, email="alice-rota@example.com", full_name="Alice")
+    bob = create_user(db_session, email="bob-rota@example.com", full_name="Bob")
+    headers = login_headers(client, "admin-rota@example.com", "SecurePass123!")
+
+    invalid = client.post(
+        "/api/schedules/templates",
+        json={"name": "Bad", "days": [{"A": [str(alice.id)], "C": [str(alice.id)]}]},
+        headers=headers,
+    )
+    assert invalid.status_code == 400, invalid.text
+    assert invalid.json()["detail"][0]["day"] == 0
+
+    created = client.post(
+        "/api/schedules/templates",
+        json={
+            "name": "Two-day rota",
+            "days": [{"A": [str(alice.id)], "C": [str(bob.id)]}, {"A": [str(bob.id)]}],
+        },
+        headers=headers,
+    )
+    assert created.status_code == 201, created.text
+    template = created.json()
+    assert template["cycle_days"] == 2
+    duplicate = client.post(
+        "/api/schedules/templates",
+        json={"name": "Two-day rota", "days": [{}]},
+        headers=headers,
+    )
+    assert duplicate.status_code == 400
+
+    client.put(
+        "/api/schedules/2026-08-02",
+        json={"shifts": {"M": [str(alice.id)], "A": [], "B": [], "C": []}},
+        headers=headers,
+    )
+    response = client.post(
+        f"/api/schedules/templates/{template['id']}/generate",
+        json={
+            "from_date": "2026-08-01",
+            "to_date": "2026-08-04",
+            "anchor_date": "2026-07-31",
+            "overwrite": False,
+        },
+        headers=headers,
+    )
+    assert response.status_code == 200, response.text
+    assert [(r["date"], r["status"]) for r in response.json()["results"]] == [
+        ("2026-08-01", "created"),
+        ("2026-08-02", "skipped"),
+        ("2026-08-03", "created"),
+        ("2026-08-04", "created"),
+    ]
+    schedules = client.get(
+        "/api/schedules?from_date=2026-08-01&to_date=2026-08-04", headers=headers
+    ).json()
+    assert {s["date"]: s["shifts"]["A"] for s in schedules} == {
+        "2026-08-01": [str(bob.id)],
+        "2026-08-02": [],
+        "2026-08-03": [str(bob.id)],
+        "2026-08-04": [str(alice.id)],
+    }
+
+    deleted = client.delete(f"/api/schedules/templates/{template['id']}", headers=headers)
+    assert deleted.status_code == 204
+    assert client.get("/api/schedules/templates", headers=headers).json() == []
+
+
+def test_schedule_analytics_reports_coverage_and_rest_violations(client, db_session):
+    create_user(
+        db_session,
+        email="admin-stats@example.com",
+        full_name="Admin Stats",
+        is_admin=True,
+    )
+    alice = create_user(db_session, email="alice-stats@example.com", full_name="Alice")
+    bob = create_user(db_session, email="bob-stats@example.com", full_name="Bob")
+    headers = login_headers(client, "admin-stats@example.com", "SecurePass123!")
+    client.put(
+        "/api/schedules/bulk",
+        json={
+            "schedules": [
+                {"date": "2026-09-06", "shifts": {"A": [str(bob.id)], "C": [str(alice.id)]}},
+                {"date": "2026-09-07", "shifts": {"A": [str(alice.id)], "C": [str(bob.id)]}},
+            ]
+        },
+        headers=headers,
+    )
+
+    url = "/api/schedules/analytics?from=2026-09-01&to=2026-09-30&shift=A&shift=C"
+    response = client.get(url, headers=headers)
+    assert response.status_code == 200, response.text
+    report = response.json()
+    by_name = {user["full_name"]: user for user in report["users"]}
+    assert by_name["Alice"]["shifts"] == {"A": 1, "M": 0, "B": 0, "C": 1}
+    # 2026-09-06 is a Sunday, 2026-09-07 starts ISO week 37
+    assert by_name["Alice"]["weeks"] == {"2026-W36": 8.0, "2026-W37": 8.0}
+    assert report["understaffed"] == []
+    assert [(v["full_name"], v["night_date"]) for v in report["rest_violations"]] == [
+        ("Alice", "2026-09-06")
+    ]
+
+    # Cached report, fresh names
+    alice.full_name = "Alice Renamed"
+    db_session.commit()
+    report = client.get(url, headers=headers).json()
+    assert "Alice Renamed" in {user["full_name"] for user in report["users"]}
+    assert report["rest_violations"][0]["full_name"] == "Alice Renamed"
+
+    client.put(
+        "/api/schedules/2026-09-07",
+        json={"shifts": {"A": [str(bob.id)], "M": [], "B": [], "C": []}},
+        headers=headers,
+    )
+    report = client.get(url, headers=headers).json()
+    assert report["rest_violations"] == []
+    assert report["understaffed"] == [
+        {"date": "2026-09-07", "shift": "C", "staffed": 0, "required": 1}
+    ]
+
+    bad = client.get(
+        "/api/schedules/analytics?from=2026-09-01&to=2026-09-30&shift=X", headers=headers
+    )
+    assert bad.status_code == 400
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+
+from app.core.revocation import revocation_cache
+from app.core.security import build_wildcard_token, get_password_hash
+from app.models import RevokedToken, User
+
+
+def create_user(db_session, *, email: str, password: str = "SecurePass123!") -> User:
+    user = User(
+        email=email,
+        hashed_password=get_password_hash(password),
+        full_name="Cache User",
+        color="#3498db",
+        theme="light",
+        is_active=True,
+        is_admin=False,
+    )
+    db_session.add(user)
+    db_session.commit()
+    db_session.refresh(user)
+    return user
+
+
+def login_headers(client, email: str, password: str = "SecurePass123!") -> dict[str, str]:
+    response = client.post("/api/auth/login", json={"email": email, "password": password})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def test_logout_updates_loaded_revocation_cache(client, db_session):
+    create_user(db_session, email="cache@example.com")
+    revocation_cache.load(db_session)
+    headers = login_headers(client, "cache@example.com")
+
+    assert client.get("/api/auth/me", headers=headers).status_code == 200
+
+    logout_response = client.post("/api/auth/logout", headers=headers)
+    assert logout_response.status_code == 200, logout_response.text
+
+    access_token = headers["Authorization"].split(" ", 1)[1]
+    assert revocation_cache.ready is True
+    assert revocation_cache.is_revoked(
+        access_token, "00000000-0000-0000-0000-000000000000", "access"
+    )
+
+    response = client.get("/api/auth/me", headers=headers)
+    assert response.status_code == 401, response.text
+    assert response.json()["detail"] == "Token has been revoked"
+
+
+def test_wildcard_revocation_is_enforced_with_and_without_cache(client, db_session):
+    user = create_user(db_session, email="wildcard@example.com")
+    headers = login_headers(client, "wildcard@example.com")
+    db_session.add(
+        RevokedToken(
+            token=build_wildcard_token(user.id, "all"),
+            token_type="all",
+            user_id=user.id,
+            revoked_at=datetime.now(UTC),
+            expires_at=datetime.now(UTC) + timedelta(days=1),
+        )
+    )
+    db_session.commit()
+
+    # Cache not loaded: falls back to the revoked_tokens query
+    revocation_cache.invalidate()
+    assert client.get("/api/auth/me", headers=headers).status_code == 401
+
+    revocation_cache.load(db_session)
+    assert revocation_cache.is_revoked("some-token", user.id, "access") is True
+    assert revocation_cache.is_revoked("some-token", user.id, "refresh") is True
+    assert client.get("/api/auth/me", headers=headers).status_code == 401
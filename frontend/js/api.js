@@ -49,6 +49,9 @@ function clearTokens() {
   localStorage.removeItem(REFRESH_TOKEN_KEY);
 }
 
+// Refresh tokens rotate on use, so concurrent callers share one request
+let refreshInFlight = null;
+
 // Fetch helper with auth
 async function apiFetch(endpoint, options = {}) {
   const url = `${API_BASE}${endpoint}`;
@@ -80,7 +83,21 @@ async function apiFetch(endpoint, options = {}) {
 
       try {
         const errorData = await response.json();
-        errorMessage = errorData.detail || errorMessage;
+        const { detail } = errorData;
+        if (Array.isArray(detail)) {
+          // Validation errors: one entry per invalid field or assignment; template
+          // errors are grouped per cycle day as {day, errors: [...]}
+          const describe = (item) => item.message || item.msg || JSON.stringify(item);
+          errorMessage = detail
+            .flatMap((item) =>
+              Array.isArray(item.errors)
+                ? item.errors.map((error) => `Day ${item.day + 1}: ${describe(error)}`)
+                : [describe(item)]
+            )
+            .join('; ');
+        } else {
+          errorMessage = detail || errorMessage;
+        }
       } catch {
         // Response wasn't JSON, use status text
       }
@@ -150,6 +167,34 @@ const AuthAPI = {
       body: JSON.stringify({ current_password: currentPassword, new_password: newPassword }),
     });
   },
+
+  async refresh() {
+    /**
+     * Exchange the stored refresh token for a new token pair.
+     * @returns {Promise<object|null>} null when there is no usable refresh token
+     */
+    const refreshToken = localStorage.getItem(REFRESH_TOKEN_KEY);
+    if (!refreshToken) return null;
+    if (!refreshInFlight) {
+      // Plain fetch: apiFetch would redirect to the login page on a 401
+      refreshInFlight = fetch(`${API_BASE}/auth/refresh`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ refresh_token: refreshToken }),
+      })
+        .then(async (response) => {
+          if (!response.ok) return null;
+          const data = await response.json();
+          setToken(data.access_token, data.refresh_token);
+          return data;
+        })
+        .catch(() => null)
+        .finally(() => {
+          refreshInFlight = null;
+        });
+    }
+    return refreshInFlight;
+  },
 };
 
 // ============ Users API (Staff Management) ============
@@ -398,6 +443,33 @@ const FilesAPI = {
     return response.blob();
   },
 
+  async getThumbnail(fileKey) {
+    /**
+     * Fetch the WebP preview of an uploaded image or PDF.
+     * @param {string} fileKey - The file key of the original attachment
+     * @returns {Blob|null} Thumbnail, or null when the file has none
+     */
+    const token = getToken();
+    const headers = {};
+    if (token) {
+      headers['Authorization'] = `Bearer ${token}`;
+    }
+
+    const response = await fetch(`${API_BASE}/files/thumb/${encodeURIComponent(fileKey)}`, {
+      method: 'GET',
+      headers,
+    });
+
+    if (response.status === 404) {
+      return null;
+    }
+    if (!response.ok) {
+      throw new Error('Thumbnail download failed');
+    }
+
+    return response.blob();
+  },
+
   async deleteFile(fileKey) {
     /**
      * Delete a file from Minio.
@@ -418,6 +490,67 @@ const FilesAPI = {
   },
 };
 
+// ============ Live events (SSE) ============
+
+const EventsAPI = {
+  connect({ onEvent, onOpen, onError } = {}) {
+    /**
+     * Open the change-event stream (EventSource cannot send headers, so the token
+     * goes in the query string). Events: handover, schedule, user, resync.
+     * The server ends the stream once the token expires or is revoked; the stream
+     * is then reopened with a refreshed token, with onError/onOpen fired around
+     * the gap so callers can poll meanwhile.
+     * @returns {{close: Function}|null} null when not logged in or unsupported
+     */
+    if (!getToken() || typeof EventSource === 'undefined') return null;
+
+    let source = null;
+    let closed = false;
+    let retryDelay = 1000;
+
+    const open = () => {
+      const token = getToken();
+      if (closed || !token) return;
+      source = new EventSource(`${API_BASE}/events/stream?token=${encodeURIComponent(token)}`);
+      ['handover', 'schedule', 'user', 'resync'].forEach((type) => {
+        source.addEventListener(type, (event) => {
+          let payload = { entity: type };
+          try {
+            payload = JSON.parse(event.data);
+          } catch (e) {
+            // keep the bare entity type
+          }
+          if (onEvent) onEvent(payload);
+        });
+      });
+      source.addEventListener('open', (event) => {
+        retryDelay = 1000;
+        if (onOpen) onOpen(event);
+      });
+      source.addEventListener('error', async (event) => {
+        if (onError) onError(event);
+        // CONNECTING means the browser retries by itself; CLOSED means the
+        // server refused the stream, usually because the token is no longer valid
+        if (closed || event.target.readyState !== EventSource.CLOSED) return;
+        source = null;
+        const refreshed = await AuthAPI.refresh();
+        // Without a new token stay on polling; the next API call leads to the login
+        if (!refreshed || closed) return;
+        setTimeout(open, retryDelay);
+        retryDelay = Math.min(retryDelay * 2, 60000);
+      });
+    };
+
+    open();
+    return {
+      close() {
+        closed = true;
+        if (source) source.close();
+      },
+    };
+  },
+};
+
 // ============ Legacy DB wrapper (for compatibility) ============
 
 const DB = {
@@ -663,6 +796,10 @@ const DB = {
     return FilesAPI.downloadFile(fileKey);
   },
 
+  async getThumbnail(fileKey) {
+    return FilesAPI.getThumbnail(fileKey);
+  },
+
   async deleteFile(fileKey) {
     return FilesAPI.deleteFile(fileKey);
   },
@@ -685,6 +822,7 @@ const DB = {
 
 // Make DB available globally for browser scripts
 window.DB = DB;
+window.EventsAPI = EventsAPI;
 window.API_BASE = API_BASE;
 window.toLocalDateKey = toLocalDateKey;
 
@@ -296,8 +296,30 @@ async function init() {
       pollTimer = null;
     }
   }
-  startSchedulePolling();
-  window.addEventListener('beforeunload', stopSchedulePolling);
+  // Live updates: poll only while the event stream is unavailable
+  async function refreshFromEvent(event) {
+    try {
+      if (event.entity === 'user' || event.entity === 'resync') await loadPeople();
+      await loadSchedules();
+      renderCalendar();
+      await updatePeopleBlock();
+      if (typeof renderPeopleList === 'function') await renderPeopleList();
+    } catch (e) {
+      console.warn('Live refresh failed:', e?.message || e);
+    }
+  }
+  const eventSource = EventsAPI.connect({
+    onEvent: (event) => {
+      if (event.entity !== 'handover') refreshFromEvent(event);
+    },
+    onOpen: stopSchedulePolling,
+    onError: startSchedulePolling,
+  });
+  if (!eventSource) startSchedulePolling();
+  window.addEventListener('beforeunload', () => {
+    stopSchedulePolling();
+    if (eventSource) eventSource.close();
+  });
 }
 
 // Load current user
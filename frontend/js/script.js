@@ -505,10 +505,35 @@ function renderHandoverNotesSync(dateData, schedule, shiftPeople) {
       ? actions.map((n) => renderNote(n, shiftPeople)).join('')
       : `<div class="empty-group">${'No Completed Notes'}</div>`;
 
+  loadAttachmentThumbnails();
+
   // Update bulk UI after render
   updateBulkUI();
 }
 
+// Thumbnail object URLs by file key (null when the file has no thumbnail)
+const attachmentThumbnails = new Map();
+
+// Fill in the card previews from /api/files/thumb instead of downloading originals
+function loadAttachmentThumbnails() {
+  document.querySelectorAll('img.attachment-thumb[data-thumb-key]').forEach(async (img) => {
+    const fileKey = img.dataset.thumbKey;
+    if (!attachmentThumbnails.has(fileKey)) {
+      attachmentThumbnails.set(
+        fileKey,
+        DB.getThumbnail(fileKey)
+          .then((blob) => (blob ? URL.createObjectURL(blob) : null))
+          .catch(() => null)
+      );
+    }
+    const url = await attachmentThumbnails.get(fileKey);
+    if (url && img.isConnected) {
+      img.src = url;
+      img.classList.remove('hidden');
+    }
+  });
+}
+
 // Render individual note
 function renderNote(note, shiftPeople = '') {
   const timestamp = new Date(note.timestamp);
@@ -622,7 +647,16 @@ function renderNote(note, shiftPeople = '') {
               // New Minio format - open in browser with auth header
               const safeNameForJs = escapeJsString(filename);
               const safeFileKeyForJs = escapeJsString(att.file_key);
-              return `<a href="#" onclick="openAttachment('${safeFileKeyForJs}','${safeNameForJs}','${isImage ? 'image' : 'pdf'}'); return false;" class="attachment-link" title="${safeFilename}">${isImage ? '🖼️' : '📄'} ${safeFilename}</a>`;
+              // Only raster images and PDFs have server-side thumbnails
+              const contentType = att.content_type || '';
+              const hasThumb = contentType
+                ? (contentType.startsWith('image/') && contentType !== 'image/svg+xml') ||
+                  contentType === 'application/pdf'
+                : /\.(jpg|jpeg|png|gif|webp|pdf)$/i.test(filename);
+              const thumb = hasThumb
+                ? `<img class="attachment-thumb hidden" data-thumb-key="${escapeHtml(att.file_key)}" alt="" loading="lazy">`
+                : '';
+              return `<a href="#" onclick="openAttachment('${safeFileKeyForJs}','${safeNameForJs}','${isImage ? 'image' : 'pdf'}'); return false;" class="attachment-link" title="${safeFilename}">${thumb}${isImage ? '🖼️' : '📄'} ${safeFilename}</a>`;
             } else if (att.url && att.url.startsWith('data:image')) {
               // Old base64 format (image)
               return `<a href="${escapeHtml(att.url)}" target="_blank" class="attachment-link" title="${safeFilename}">🖼️ ${safeFilename}</a>`;
@@ -1964,11 +1998,32 @@ document.addEventListener('DOMContentLoaded', async () => {
     }
   }
   window.stopDataPolling = stopDataPolling;
-  startDataPolling();
 
-  // Ensure polling stops on unload
+  // Live updates over SSE; fall back to polling while the stream is down
+  const eventSource = EventsAPI.connect({
+    onEvent: async (event) => {
+      try {
+        if (event.entity === 'handover' || event.entity === 'resync') {
+          if (typeof invalidateRenderCache === 'function') invalidateRenderCache();
+          await renderHandoverNotes(true);
+        }
+        if (event.entity !== 'handover') {
+          if (event.entity !== 'schedule') await _refreshPeopleCache();
+          await updatePeopleBlock();
+        }
+      } catch (e) {
+        console.warn('Live refresh failed:', e?.message || e);
+      }
+    },
+    onOpen: stopDataPolling,
+    onError: startDataPolling,
+  });
+  if (!eventSource) startDataPolling();
+
+  // Ensure polling and the event stream stop on unload
   window.addEventListener('beforeunload', () => {
     if (typeof window.stopDataPolling === 'function') window.stopDataPolling();
+    if (eventSource) eventSource.close();
   });
 
   document.getElementById('note-modal')?.addEventListener('click', (e) => {
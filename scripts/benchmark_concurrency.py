@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Concurrent-request throughput benchmark for the Letsee API.
+
+Usage:
+    python benchmark_concurrency.py --email admin@example.com --password SecurePass123
+
+Or with custom load:
+    python benchmark_concurrency.py --email admin@example.com --password SecurePass123 \\
+        --concurrency 50 --requests 2000 --path /api/handovers --path /api/schedules
+
+This script:
+1. Logs in once to obtain an access token
+2. Fires the requested number of authenticated GETs with a fixed number in flight
+3. Prints throughput and latency percentiles per path
+
+Run it against the same deployment (same WEB_CONCURRENCY, same data) before and
+after a change to compare concurrent-request throughput.
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+
+import httpx
+
+# Configuration
+API_BASE_URL = "http://localhost:8000"
+DEFAULT_PATHS = ["/api/handovers", "/api/schedules", "/api/users", "/api/settings"]
+
+
+async def login(client: httpx.AsyncClient, email: str, password: str) -> str:
+    """Log in and return an access token."""
+    response = await client.post("/api/auth/login", json={"email": email, "password": password})
+    if response.status_code != 200:
+        print(f"❌ Login failed ({response.status_code}): {response.text}")
+        sys.exit(1)
+    return response.json()["access_token"]
+
+
+async def run_path(
+    client: httpx.AsyncClient, path: str, token: str, total: int, concurrency: int
+) -> dict:
+    """Issue ``total`` GETs to ``path`` with ``concurrency`` requests in flight."""
+    latencies: list[float] = []
+    errors = 0
+    remaining = total
+    headers = {"Authorization": f"Bearer {token}"}
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            try:
+                response = await client.get(path, headers=headers)
+                if response.status_code != 200:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "path": path,
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": elapsed,
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "max_ms": latencies[-1] * 1000,
+    }
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60) as client:
+        token = await login(client, args.email, args.password)
+
+        print(f"Concurrency: {args.concurrency}, requests per path: {args.requests}\n")
+        print(f"{'path':<24}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}{'errors':>8}")
+        for path in args.path or DEFAULT_PATHS:
+            result = await run_path(client, path, token, args.requests, args.concurrency)
+            print(
+                f"{result['path']:<24}{result['rps']:>10.1f}{result['p50_ms']:>10.1f}"
+                f"{result['p95_ms']:>10.1f}{result['max_ms']:>10.1f}{result['errors']:>8}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark concurrent API throughput")
+    parser.add_argument("--base-url", default=API_BASE_URL, help="API base URL")
+    parser.add_argument("--email", required=True, help="Login email")
+    parser.add_argument("--password", required=True, help="Login password")
+    parser.add_argument("--concurrency", type=int, default=20, help="Requests in flight")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per path")
+    parser.add_argument(
+        "--path", action="append", help="Path to benchmark (repeatable, default: list endpoints)"
+    )
+    args = parser.parse_args()
+
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()